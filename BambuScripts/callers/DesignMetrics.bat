@@ -29,6 +29,8 @@ if "%~1"=="" (
 )
 
 set "SCRIPT=%~dp0..\workers\design_metrics_worker.py"
+:: the precompiled zipapp (design_metrics_worker.py --make-pyz) starts faster
+if exist "%~dp0..\workers\design_metrics_worker.pyz" set "SCRIPT=%~dp0..\workers\design_metrics_worker.pyz"
 echo.
 "!PYEXE!" "!SCRIPT!" %*
 
@@ -7,10 +7,14 @@ setlocal enabledelayedexpansion
 ::   - Any folder(s): searched RECURSIVELY for every design folder
 ::     (a folder with a Full.gcode.3mf). You can drop several at once.
 ::
-:: Appends each NEW design's FULL metric set to:
+:: Adds each NEW design's FULL metric set to the SQLite store
+::     BambuScripts\data\production_metrics.db
+:: (started from production_metrics.csv the first time) and writes it back out as
 ::     BambuScripts\data\production_metrics.csv
-:: Designs already in that CSV are skipped (parsed only once). To start
-:: the file over, run the worker manually with --overwrite.
+:: Designs already in the store are skipped unless their TSV / 3mf changed
+:: since (re-sliced designs are re-parsed; removed designs are dropped).
+:: To start the file over, run the worker manually with --overwrite.
+:: Designs are parsed in parallel, one process per CPU core (--jobs 0).
 :: ============================================================
 
 :: --- locate a real Python (the WindowsApps "python"/"py" aliases are dead stubs) ---
@@ -29,8 +33,10 @@ if "%~1"=="" (
 )
 
 set "SCRIPT=%~dp0..\workers\design_metrics_worker.py"
+:: the precompiled zipapp (design_metrics_worker.py --make-pyz) starts faster
+if exist "%~dp0..\workers\design_metrics_worker.pyz" set "SCRIPT=%~dp0..\workers\design_metrics_worker.pyz"
 echo.
-"!PYEXE!" "!SCRIPT!" %* --full --csv production_metrics.csv --select
+"!PYEXE!" "!SCRIPT!" %* --full --db production_metrics.db --export-csv production_metrics.csv --select --jobs 0 --baselines
 
 echo.
 pause
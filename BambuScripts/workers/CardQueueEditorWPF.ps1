@@ -7620,6 +7620,44 @@ $script:StatsAllGraphs   = $false        # $true = drop images, show every varia
 $script:StatsTotalBaseline = 100.0
 $script:StatsTotalSd       = 23.4
 
+# The constants above are the fallback. data\eff_datasets.json (corpus_stats.py, updated
+# by every HarvestMetrics run) carries each harvested printer|type corpus's current
+# Baseline / Sd / Slope / R2 / ResidSd / percentiles; labels, directions and weights
+# stay as defined here. A dataset only appears there once it has >= 25 designs.
+function Import-EffDatasets {
+    $path = Join-Path (Join-Path (Split-Path $scriptDir -Parent) "data") "eff_datasets.json"
+    if (-not (Test-Path -LiteralPath $path)) { return }
+    try {
+        $json = [System.IO.File]::ReadAllText($path, [System.Text.Encoding]::UTF8) | ConvertFrom-Json -ErrorAction Stop
+    } catch {
+        Write-Log ("Stats: ignoring {0}: {1}" -f $path, $_.Exception.Message)
+        return
+    }
+    $defaults = $script:EfficiencyVars    # the built-in definitions, before X1C|STANDARD replaces them
+    foreach ($p in $json.PSObject.Properties) {
+        $src = $p.Value
+        $vars = @()
+        foreach ($def in $defaults) {
+            $v = $def.Clone()
+            $j = $src.Vars | Where-Object { $_.Key -eq $def.Key } | Select-Object -First 1
+            if ($null -eq $j) { $vars += $v; continue }    # not in the corpus output: keep the built-in values
+            foreach ($f in 'Baseline', 'Sd', 'Slope', 'R2', 'ResidSd', 'P10', 'P25', 'P50', 'P75', 'P90', 'N') {
+                if ($null -ne $j.$f) { $v[$f] = [double]$j.$f }
+            }
+            $vars += $v
+        }
+        $tpMean = if ($null -ne $src.TpMean) { [double]$src.TpMean } else { $script:StatsTpMean }
+        $script:EffDatasets[$p.Name] = @{ Label = [string]$src.Label; Vars = $vars; TpMean = $tpMean }
+        if ($p.Name -eq 'X1C|STANDARD') {
+            $script:EfficiencyVars = $vars
+            $script:StatsTpMean    = $tpMean
+            if ($null -ne $src.TotalSd -and [double]$src.TotalSd -gt 0) { $script:StatsTotalSd = [double]$src.TotalSd }
+        }
+        Write-Log ("Stats: dataset {0} from {1} (n={2})" -f $p.Name, (Split-Path $path -Leaf), $src.N)
+    }
+}
+Import-EffDatasets
+
 function Get-EffVar([string]$key) {
     foreach ($v in $script:EfficiencyVars) { if ($v.Key -eq $key) { return $v } }
     return $null
@@ -7641,6 +7679,8 @@ function Get-EffVar([string]$key) {
 # Parsed on demand when a design's Stats card is rendered and cached by gcode path +
 # write time, so it is never re-parsed unless the design is re-sliced. travel_ratio is
 # deliberately NOT pulled here (it needs the ~10s full-body pass).
+# The worker also keeps its own on-disk cache (data/metrics_cache, keyed by 3mf size /
+# mtime / gcode CRC), so after an editor restart a re-ask is a ~0.1s cache hit.
 $script:DesignMetricsCache = @{}
 $script:PythonExe = $null
 
@@ -7656,35 +7696,82 @@ function Get-PythonExe {
     return $found
 }
 
-# Returns @{ plate_utilization; color_changes_per_layer } for a design, or $null.
-# When -ParseIfMissing is false it only returns an already-cached result (used by the
-# bulk summary so entering Stats doesn't spawn Python once per loaded design).
-function Get-DesignLiveMetrics($pj, [bool]$ParseIfMissing) {
+# design_metrics_worker.pyz when it has been built (--make-pyz: precompiled, starts
+# faster - it runs the .py itself once the script has changed), else the script.
+function Get-DesignMetricsWorker {
+    $pyz = Join-Path $scriptDir "design_metrics_worker.pyz"
+    if (Test-Path -LiteralPath $pyz) { return $pyz }
+    return (Join-Path $scriptDir "design_metrics_worker.py")
+}
+
+# The live-metric cache key of a design: gcode path + write time (re-slice = new key).
+function Get-DesignLiveMetricsKey($pj) {
     $gcode = $pj.GcodeFilePath
     if ([string]::IsNullOrWhiteSpace($gcode) -or -not (Test-Path -LiteralPath $gcode)) { return $null }
-    $key = "$gcode|$((Get-Item -LiteralPath $gcode).LastWriteTimeUtc.Ticks)"
+    return "$gcode|$((Get-Item -LiteralPath $gcode).LastWriteTimeUtc.Ticks)"
+}
+
+# One worker result object (its part_b) -> the live-metrics hashtable, or $null.
+function ConvertTo-DesignLiveMetrics($obj) {
+    $b = $obj.part_b
+    if ($null -eq $b) { return $null }
+    $res = @{}
+    $pu = 0.0; if ([double]::TryParse("$($b.plate_utilization_pct)", [ref]$pu) -and $pu -gt 0) { $res.plate_utilization = $pu }
+    $cc = 0.0; if ([double]::TryParse("$($b.color_changes_per_layer)", [ref]$cc) -and $cc -gt 0) { $res.color_changes_per_layer = $cc }
+    $lh = 0.0; if ([double]::TryParse("$($b.effective_layer_height_mm)", [ref]$lh) -and $lh -gt 0) { $res.layer_height = $lh }
+    return $res
+}
+
+# Returns @{ plate_utilization; color_changes_per_layer } for a design, or $null.
+# When -ParseIfMissing is false it only returns an already-cached result (the bulk
+# summary fills the cache for every design first, in one Python run - see
+# Update-DesignLiveMetricsBatch).
+function Get-DesignLiveMetrics($pj, [bool]$ParseIfMissing) {
+    $key = Get-DesignLiveMetricsKey $pj
+    if ($null -eq $key) { return $null }
     if ($script:DesignMetricsCache.ContainsKey($key)) { return $script:DesignMetricsCache[$key] }
     if (-not $ParseIfMissing) { return $null }
+    $gcode = $pj.GcodeFilePath
     $res = $null
     try {
         $py     = Get-PythonExe
-        $worker = Join-Path $scriptDir "design_metrics_worker.py"
+        $worker = Get-DesignMetricsWorker
         $json   = & $py $worker $gcode --json --no-body 2>$null | Out-String
-        if (-not [string]::IsNullOrWhiteSpace($json)) {
-            $obj = $json | ConvertFrom-Json
-            $b   = $obj.part_b
-            if ($null -ne $b) {
-                $res = @{}
-                $pu = 0.0; if ([double]::TryParse("$($b.plate_utilization_pct)", [ref]$pu) -and $pu -gt 0) { $res.plate_utilization = $pu }
-                $cc = 0.0; if ([double]::TryParse("$($b.color_changes_per_layer)", [ref]$cc) -and $cc -gt 0) { $res.color_changes_per_layer = $cc }
-                $lh = 0.0; if ([double]::TryParse("$($b.effective_layer_height_mm)", [ref]$lh) -and $lh -gt 0) { $res.layer_height = $lh }
-            }
-        }
+        if (-not [string]::IsNullOrWhiteSpace($json)) { $res = ConvertTo-DesignLiveMetrics ($json | ConvertFrom-Json) }
     } catch { Write-Log "Get-DesignLiveMetrics failed ($gcode): $($_.Exception.Message)" "WARN" }
     $script:DesignMetricsCache[$key] = $res
     return $res
 }
 
+# Fills the live-metrics cache for every given design that isn't cached yet from ONE
+# worker run: --paths-from a temp list, --no-body --stream parses them on a few threads
+# and prints one JSON line per design as each finishes (its "path" = the gcode path).
+function Update-DesignLiveMetricsBatch($pjs) {
+    $want = @{}
+    foreach ($pj in $pjs) {
+        $key = Get-DesignLiveMetricsKey $pj
+        if ($null -ne $key -and -not $script:DesignMetricsCache.ContainsKey($key)) { $want[$pj.GcodeFilePath] = $key }
+    }
+    if ($want.Count -eq 0) { return }
+    $list = [System.IO.Path]::GetTempFileName()
+    try {
+        [System.IO.File]::WriteAllLines($list, [string[]]@($want.Keys))
+        $py     = Get-PythonExe
+        $worker = Get-DesignMetricsWorker
+        & $py $worker --paths-from $list --no-body --stream 2>$null | ForEach-Object {
+            if ([string]::IsNullOrWhiteSpace($_)) { return }
+            try { $obj = $_ | ConvertFrom-Json } catch { return }
+            if (-not $want.ContainsKey([string]$obj.path)) { return }
+            $res = $null
+            if ($obj.error) { Write-Log "Live metrics failed ($($obj.path)): $($obj.error)" "WARN" }
+            else { $res = ConvertTo-DesignLiveMetrics $obj }
+            $script:DesignMetricsCache[$want[[string]$obj.path]] = $res
+        }
+        Write-Log ("Stats: live metrics for {0} design(s) in one worker run" -f $want.Count)
+    } catch { Write-Log "Update-DesignLiveMetricsBatch failed: $($_.Exception.Message)" "WARN" }
+    finally { Remove-Item -LiteralPath $list -Force -ErrorAction SilentlyContinue }
+}
+
 # Renders (once, cached) the plate-utilization overlay PNG for a design: pick.png
 # with the objects as USED, unused-available in yellow, and the exclusion /
 # calibration / prime-tower zones tinted. Returns the PNG path, or $null.
@@ -7703,7 +7790,7 @@ function Get-DesignUtilImage($pj) {
     try {
         $out    = Join-Path $pj.TempWork "plate_util.png"
         $py     = Get-PythonExe
-        $worker = Join-Path $scriptDir "design_metrics_worker.py"
+        $worker = Get-DesignMetricsWorker
         $wargs  = @($worker, $gcode, "--util-image", $out)
         if ($pickBase) { $wargs += @("--pick-base", $pickBase) }
         & $py @wargs 2>$null | Out-Null
@@ -8718,6 +8805,9 @@ function Refresh-StatsSummary {
     if ($null -eq $panel) { return }
     $panel.Children.Clear()
 
+    # Every card's gcode extras (plate utilization, color changes / layer) in one worker run.
+    Update-DesignLiveMetricsBatch @(foreach ($gpJob in $script:jobs) { $gpJob.Parents })
+
     $rows = New-Object System.Collections.Generic.List[object]
     $total = 0
     foreach ($gpJob in $script:jobs) {
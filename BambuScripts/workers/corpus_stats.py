@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+"""corpus_stats.py
+
+Efficiency baselines for the Card Queue Editor's Stats tab, from the harvested corpus
+(data/production_metrics.csv) instead of hand-copied constants. Per (printer, file
+type) dataset and per efficiency variable: the mean (Baseline), SD, percentiles and
+the univariate fit of throughput on it (Slope / R2 / ResidSd). SDs are population
+SDs, as in docs/Stats-Methodology.md.
+
+Incremental: running (Welford) aggregates are kept in a state file together with
+each design's source fingerprint and contributed values, so an update only parses the
+designs whose fingerprint is new or changed and takes out the ones that are gone - the
+corpus is never re-summed. Percentiles come from a bounded log-bucket sketch (relative
+error SKETCH_ACCURACY), not from every value. --rebuild starts over from the CSV.
+
+Writes data/eff_datasets.json in the shape of the editor's $script:EffDatasets:
+  {"X1C|STANDARD": {"Label": "X1C-Standard", "N": 298, "TpMean": 75.1, "TotalSd": 23.4,
+                    "Vars": [{"Key", "Label", "Unit", "Baseline", "Sd", "Direction",
+                              "Weight", "Fmt", "N", "P10".."P90", "Slope", "R2", "ResidSd"}]}}
+Datasets with fewer than MIN_ROWS designs are left out (the editor skips designs
+that have no dataset).
+
+Usage:
+  python corpus_stats.py                          # production_metrics.csv -> eff_datasets.json
+  python corpus_stats.py other_metrics.csv --rebuild
+  python corpus_stats.py --print                  # + a table of the baselines
+  python design_metrics_worker.py "C:\\ZB_Designs" --full --csv production_metrics.csv --baselines
+"""
+import argparse
+import csv
+import json
+import math
+import os
+import sys
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+OUT_PATH = os.path.join(DATA_DIR, "eff_datasets.json")
+STATE_PATH = os.path.join(DATA_DIR, "eff_stats_state.json")
+STATE_VERSION = 2
+MIN_ROWS = 25                        # designs a dataset needs before its baselines are trusted
+PERCENTILES = (10, 25, 50, 75, 90)
+SKETCH_ACCURACY = 0.005              # relative error of the percentiles (sketch bucket width)
+FINGERPRINT_KEYS = ("src_tsv_size", "src_tsv_mtime", "src_3mf_size", "src_3mf_mtime", "src_gcode_crc")
+# (design_metrics_worker.FINGERPRINT_KEYS - a harvest row's source stamp)
+
+# The editor's efficiency variables ($script:EfficiencyVars) and the CSV column each
+# comes from. Throughput is the dependent variable - the y of every fit.
+VARS = (
+    {"Key": "throughput", "Label": "Throughput", "Unit": "obj/day", "Direction": "Higher", "Weight": 3.0, "Fmt": "N1",
+     "col": "throughput_wig_day"},
+    {"Key": "objs_per_plate", "Label": "Objects / Plate", "Unit": "", "Direction": "Higher", "Weight": 2.0, "Fmt": "N0",
+     "col": "objects_pre_merge"},
+    {"Key": "color_changes", "Label": "Color Changes", "Unit": "", "Direction": "Lower", "Weight": 1.5, "Fmt": "N0",
+     "col": "color_changes"},
+    {"Key": "filament_per_unit", "Label": "Filament / Unit", "Unit": "g", "Direction": "Lower", "Weight": 1.5,
+     "Fmt": "N2", "col": "filament_per_unit_g"},
+    {"Key": "time_per_gram", "Label": "Time / Gram", "Unit": "min/g", "Direction": "Lower", "Weight": 0.0, "Fmt": "N2",
+     "col": "time_per_gram_min"},
+    {"Key": "print_time", "Label": "Print Time", "Unit": "h", "Direction": "Lower", "Weight": 1.0, "Fmt": "N1",
+     "col": "print_time_h"},
+    {"Key": "model_usage", "Label": "Model Filament", "Unit": "g", "Direction": "Lower", "Weight": 1.0, "Fmt": "N0",
+     "col": "model_material_g"},
+    {"Key": "plate_utilization", "Label": "Plate Utilization", "Unit": "%", "Direction": "Higher", "Weight": 0.0,
+     "Fmt": "N1", "col": "plate_utilization_pct"},
+    {"Key": "color_changes_per_layer", "Label": "Color Changes / Layer", "Unit": "", "Direction": "Lower",
+     "Weight": 0.0, "Fmt": "N2", "col": "color_changes_per_layer"},
+    {"Key": "layer_height", "Label": "Avg Layer Height", "Unit": "mm", "Direction": "Higher", "Weight": 0.0,
+     "Fmt": "N3", "col": "effective_layer_height_mm"},
+)
+
+
+# =============================================================================
+#  running aggregates
+# =============================================================================
+_LOG_GAMMA = math.log((1 + SKETCH_ACCURACY) / (1 - SKETCH_ACCURACY))
+_SKETCH_BIAS = 1 << 14               # keeps every non-zero bucket key away from 0, sign = the value's
+_SKETCH_TINY = 1e-30                 # smaller magnitudes count as 0
+
+
+class _Sketch:
+    """Percentiles of a multiset that values can leave as well as join, in bounded
+    space: each value is counted in a logarithmic bucket (DDSketch), so any percentile
+    is within SKETCH_ACCURACY of the true one, relative. The bucket count depends on
+    the values' range, not on how many there are."""
+
+    __slots__ = ("counts",)
+
+    def __init__(self, counts=None):
+        self.counts = {int(k): c for k, c in (counts or {}).items()}     # JSON keys come back as str
+
+    @staticmethod
+    def _key(x):
+        if abs(x) < _SKETCH_TINY: return 0
+        k = math.ceil(math.log(abs(x)) / _LOG_GAMMA) + _SKETCH_BIAS
+        return k if x > 0 else -k
+
+    @staticmethod
+    def _value(key):
+        if not key: return 0.0
+        gamma = math.exp(_LOG_GAMMA)
+        v = 2.0 * gamma ** (abs(key) - _SKETCH_BIAS) / (gamma + 1)
+        return v if key > 0 else -v
+
+    def add(self, x):
+        k = self._key(x)
+        self.counts[k] = self.counts.get(k, 0) + 1
+
+    def remove(self, x):
+        k = self._key(x)
+        c = self.counts.get(k, 0) - 1
+        if c > 0: self.counts[k] = c
+        else: self.counts.pop(k, None)
+
+    def percentile(self, q):
+        """Linear-interpolated percentile (between the buckets of the two ranks around it)."""
+        n = sum(self.counts.values())
+        if not n: return None
+        pos = q / 100.0 * (n - 1)
+        i = int(pos)
+        lo = hi = None
+        seen = 0
+        for k in sorted(self.counts):
+            seen += self.counts[k]
+            if lo is None and seen > i: lo = self._value(k)
+            if seen > i + 1 or seen == n:
+                hi = self._value(k); break
+        return lo if i + 1 >= n else lo + (hi - lo) * (pos - i)
+
+
+class _Fit:
+    """One variable x against throughput y: Welford running means, M2s and co-moment
+    (so adding OR removing a design is O(1)), plus a _Sketch of x for the percentiles."""
+
+    __slots__ = ("n", "mx", "my", "m2x", "m2y", "cxy", "sketch")
+
+    def __init__(self, d=None):
+        d = d or {}
+        self.n = d.get("n", 0)
+        self.mx = d.get("mx", 0.0); self.my = d.get("my", 0.0)
+        self.m2x = d.get("m2x", 0.0); self.m2y = d.get("m2y", 0.0); self.cxy = d.get("cxy", 0.0)
+        self.sketch = _Sketch(d.get("sketch"))
+
+    def add(self, x, y):
+        self.n += 1
+        dx = x - self.mx; self.mx += dx / self.n
+        dy = y - self.my; self.my += dy / self.n
+        self.m2x += dx * (x - self.mx)
+        self.m2y += dy * (y - self.my)
+        self.cxy += dx * (y - self.my)
+        self.sketch.add(x)
+
+    def remove(self, x, y):
+        """Exactly undo an add(x, y)."""
+        if self.n <= 1:
+            self.__init__(); return
+        mx0 = (self.n * self.mx - x) / (self.n - 1)
+        my0 = (self.n * self.my - y) / (self.n - 1)
+        self.m2x -= (x - mx0) * (x - self.mx)
+        self.m2y -= (y - my0) * (y - self.my)
+        self.cxy -= (x - mx0) * (y - self.my)
+        self.n -= 1; self.mx, self.my = mx0, my0
+        self.sketch.remove(x)
+
+    def as_dict(self):
+        d = {k: getattr(self, k) for k in self.__slots__}
+        d["sketch"] = self.sketch.counts
+        return d
+
+    def summary(self, fit=True):
+        n = self.n
+        out = {"Baseline": round(self.mx, 4), "Sd": round(math.sqrt(max(0.0, self.m2x) / n), 4), "N": n}
+        for q in PERCENTILES:
+            out["P%d" % q] = round(self.sketch.percentile(q), 4)
+        if fit:
+            sxx, syy, sxy = max(0.0, self.m2x), max(0.0, self.m2y), self.cxy
+            out["Slope"] = round(sxy / sxx, 4) if sxx else 0.0
+            out["R2"] = round(sxy * sxy / (sxx * syy), 3) if sxx and syy else 0.0
+            out["ResidSd"] = round(math.sqrt(max(0.0, syy - (sxy * sxy / sxx if sxx else 0.0)) / n), 2)
+        return out
+
+
+def _num(v):
+    try:
+        f = float(v)
+    except (TypeError, ValueError):
+        return None
+    return f if math.isfinite(f) else None
+
+
+def row_values(row):
+    """(dataset key, label, [value or None per VARS]) for a design row of the CSV, or None
+    when the row can't be scored (per-plate row, no printer / file type, no throughput)."""
+    if row.get("plate") not in (None, "", "all"):
+        return None
+    printer, ftype = (row.get("printer") or "").strip(), (row.get("file_type") or "").strip()
+    tp = _num(row.get("throughput_wig_day"))
+    if not printer or not ftype or not tp or tp <= 0:
+        return None
+    return (printer + "|" + ftype).upper(), "%s-%s" % (printer, ftype), [_num(row.get(v["col"])) for v in VARS]
+
+
+def row_fingerprint(row):
+    """The row's source stamp (FINGERPRINT_KEYS), or None for a CSV without one."""
+    fp = [row.get(k) or "" for k in FINGERPRINT_KEYS]
+    return fp if any(fp) else None
+
+
+class CorpusStats:
+    """Per-dataset running aggregates + what each design contributed to them."""
+
+    def __init__(self, state=None):
+        state = state or {}
+        self.source = state.get("source")
+        self.rows = state.get("rows", {})          # folder key -> {"fp", "ds", "x": [value per VARS]}
+        self.datasets = {k: {"label": d["label"], "n": d["n"],
+                             "vars": {vk: _Fit(f) for vk, f in d["vars"].items()}}
+                         for k, d in state.get("datasets", {}).items()}
+
+    @classmethod
+    def load(cls, path=STATE_PATH):
+        try:
+            with open(path, encoding="utf-8") as fh:
+                state = json.load(fh)
+        except (OSError, ValueError):
+            return cls()
+        return cls(state if state.get("version") == STATE_VERSION else None)
+
+    def save(self, path=STATE_PATH):
+        state = {"version": STATE_VERSION, "source": self.source, "rows": self.rows,
+                 "datasets": {k: {"label": d["label"], "n": d["n"],
+                                  "vars": {vk: f.as_dict() for vk, f in d["vars"].items()}}
+                              for k, d in self.datasets.items()}}
+        _write_json(path, state, indent=None)
+
+    def _add(self, key, rec, label):
+        ds = self.datasets.setdefault(rec["ds"], {"label": label, "n": 0, "vars": {}})
+        ds["n"] += 1
+        y = rec["x"][0]                                # VARS[0]: throughput
+        for v, x in zip(VARS, rec["x"]):
+            if x is not None: ds["vars"].setdefault(v["Key"], _Fit()).add(x, y)
+        self.rows[key] = rec
+
+    def _remove(self, key):
+        rec = self.rows.pop(key)
+        ds = self.datasets[rec["ds"]]
+        ds["n"] -= 1
+        y = rec["x"][0]
+        for v, x in zip(VARS, rec["x"]):
+            if x is not None: ds["vars"][v["Key"]].remove(x, y)
+        if ds["n"] <= 0:
+            del self.datasets[rec["ds"]]
+
+    def sync(self, rows, source=None):
+        """Bring the aggregates in line with the CSV rows: designs with a new or changed
+        source fingerprint are parsed and folded in, the ones no longer there taken out;
+        an untouched design costs a fingerprint compare (a CSV without fingerprints: a
+        compare of its parsed values). -> (added, changed, removed)"""
+        added = changed = 0
+        seen = set()
+        for row in rows:
+            if row.get("plate") not in (None, "", "all"): continue
+            key = os.path.normcase(os.path.normpath(row.get("folder") or row.get("design") or ""))
+            fp = row_fingerprint(row)
+            old = self.rows.get(key)
+            if fp and old and old["fp"] == fp:
+                seen.add(key); continue
+            v = row_values(row)
+            if not v: continue
+            seen.add(key)
+            rec = {"fp": fp, "ds": v[0], "x": v[2]}
+            if old and old["ds"] == rec["ds"] and old["x"] == rec["x"]:
+                old["fp"] = fp; continue                  # re-stamped, same values
+            if old: self._remove(key); changed += 1
+            else: added += 1
+            self._add(key, rec, v[1])
+        gone = [k for k in self.rows if k not in seen]
+        for key in gone:
+            self._remove(key)
+        if source: self.source = source
+        return added, changed, len(gone)
+
+    def eff_datasets(self, min_rows=MIN_ROWS):
+        """The EffDatasets JSON object (see the module docstring)."""
+        out = {}
+        for key in sorted(self.datasets):
+            ds = self.datasets[key]
+            if ds["n"] < min_rows: continue
+            vars_ = []
+            for v in VARS:
+                f = ds["vars"].get(v["Key"])
+                if not f or f.n < 2: continue
+                d = {k: v[k] for k in ("Key", "Label", "Unit")}
+                s = f.summary(fit=v["Key"] != "throughput")
+                d["Baseline"], d["Sd"] = s.pop("Baseline"), s.pop("Sd")
+                d.update({k: v[k] for k in ("Direction", "Weight", "Fmt")})
+                d.update(s)
+                vars_.append(d)
+            tp = next((d for d in vars_ if d["Key"] == "throughput"), None)
+            out[key] = {"Label": ds["label"], "N": ds["n"],
+                        "TpMean": round(tp["Baseline"], 2) if tp else None,
+                        "TotalSd": round(tp["Sd"] / tp["Baseline"] * 100, 1) if tp and tp["Baseline"] else None,
+                        "Vars": vars_}
+        return out
+
+
+# =============================================================================
+#  files
+# =============================================================================
+def _write_json(path, obj, indent=2):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(obj, fh, indent=indent)
+    os.replace(tmp, path)
+
+
+def load_rows(path):
+    with open(path, newline="", encoding="utf-8") as fh:
+        return list(csv.DictReader(fh))
+
+
+def update_baselines(rows, source, out_path=OUT_PATH, state_path=STATE_PATH, rebuild=False, min_rows=MIN_ROWS):
+    """Fold the changed designs of `rows` into the saved aggregates and rewrite the
+    EffDatasets JSON. -> (CorpusStats, one-line summary)"""
+    st = CorpusStats() if rebuild else CorpusStats.load(state_path)
+    added, changed, removed = st.sync(rows, os.path.basename(source))
+    st.save(state_path)
+    ds = st.eff_datasets(min_rows)
+    _write_json(out_path, ds)
+    small = sorted(k for k, d in st.datasets.items() if d["n"] < min_rows)
+    msg = ("Baselines: %d new, %d changed, %d removed design(s) -> %d dataset(s) in %s"
+           % (added, changed, removed, len(ds), out_path))
+    if small:
+        msg += " (under %d designs, left out: %s)" % (min_rows, ", ".join(small))
+    return st, msg
+
+
+def print_datasets(ds):
+    for key, d in ds.items():
+        print("\n%s  (%s, n=%d)   throughput mean %s, index SD %s" % (key, d["Label"], d["N"], d["TpMean"], d["TotalSd"]))
+        print("  %-24s %10s %9s %9s %9s %9s %10s %6s %8s" % ("variable", "baseline", "sd", "p10", "p50", "p90",
+                                                            "slope", "R2", "resid sd"))
+        print("  " + "-" * 100)
+        for v in d["Vars"]:
+            print("  %-24s %10.4g %9.4g %9.4g %9.4g %9.4g %10s %6s %8s"
+                  % (v["Key"], v["Baseline"], v["Sd"], v["P10"], v["P50"], v["P90"],
+                     v.get("Slope", "-"), v.get("R2", "-"), v.get("ResidSd", "-")))
+
+
+def main():
+    for stream in (sys.stdout, sys.stderr):
+        try:
+            stream.reconfigure(encoding="utf-8", errors="replace")
+        except Exception:
+            pass
+    ap = argparse.ArgumentParser(description="Stats-tab efficiency baselines per printer|file type from the "
+                                             "harvested metrics CSV (incremental).")
+    ap.add_argument("csv", nargs="?", default="production_metrics.csv",
+                    help="The harvest CSV: a path, or a name in BambuScripts/data (default production_metrics.csv).")
+    ap.add_argument("--out", default=OUT_PATH, help="EffDatasets JSON to write (default data/eff_datasets.json).")
+    ap.add_argument("--state", default=STATE_PATH, help="Running-aggregate state (default data/eff_stats_state.json).")
+    ap.add_argument("--rebuild", action="store_true", help="Ignore the saved state and start from the whole CSV.")
+    ap.add_argument("--min-rows", type=int, default=MIN_ROWS,
+                    help="Designs a dataset needs to be written (default %d)." % MIN_ROWS)
+    ap.add_argument("--print", action="store_true", help="Also print the baselines table.")
+    args = ap.parse_args()
+    path = args.csv if os.path.isfile(args.csv) else os.path.join(DATA_DIR, os.path.basename(args.csv))
+    if not os.path.isfile(path):
+        sys.stderr.write("No such CSV: %s\n" % path)
+        sys.exit(1)
+    st, msg = update_baselines(load_rows(path), path, args.out, args.state, args.rebuild, args.min_rows)
+    sys.stderr.write(msg + "\n")
+    if args.print:
+        print_datasets(st.eff_datasets(args.min_rows))
+
+
+if __name__ == "__main__":
+    main()
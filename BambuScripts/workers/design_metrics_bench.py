@@ -0,0 +1,482 @@
+#!/usr/bin/env python3
+"""design_metrics_bench.py
+
+Synthetic Bambu plates + benchmarks for design_metrics_worker.py - no real designs
+(or the NAS) needed. Every fast-path benchmark also checks it gives exactly the
+reference answer.
+
+  fixtures - write synthetic design folders: a *_Full.gcode.3mf (HEADER_BLOCK,
+             CONFIG_BLOCK, M73 progress, ; FEATURE: + object labels, tool changes
+             through a prime tower, project_settings.config with printable_area +
+             bed_exclude_area, plate_1.json, pick_1.png, layer profile) + _Data.tsv,
+             scaled by layers / objects / colours / tool-change interval.
+  suite    - time each stage over generated plates: parse_data_tsv, plate_utilization,
+             gcode_header, gcode_body (per engine) and the full harvest extract;
+             reports designs/s and MB/s (uncompressed input), saves / compares a
+             baseline JSON.
+  util     - plate_utilization's pick coverage: NumPy masks vs the per-pixel loop,
+             on synthetic 512 / 1024 px picks with a prime tower to exclude.
+  pipeline - the gcode body pass per engine with the gcode inflated inline vs on the
+             reader thread (_Prefetch): seconds, speed-up, and how much of the
+             inflate time overlapped with parsing.
+  startup  - cold start, a fresh interpreter per run: `import design_metrics_worker`
+             and a --no-body readout (script, and with --pyz the zipapp) against
+             fixed budgets, plus the heavy modules a bare import must not load.
+             Exit 1 past a budget; tests/test_design_metrics_startup.py runs the same
+             checks under pytest (the timed ones with DMW_TIMING_TESTS=1).
+
+Usage:
+  python design_metrics_bench.py fixtures OUT_DIR --designs 3 --layers 300 --objects 40
+  python design_metrics_bench.py suite --save baseline.json
+  python design_metrics_bench.py suite --compare baseline.json
+  python design_metrics_bench.py util --sizes 512 1024 2048 --repeat 5
+  python design_metrics_bench.py pipeline --layers 600 --objects 60
+  python design_metrics_bench.py startup --pyz
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import design_metrics_worker as dmw                      # noqa: E402
+
+BED = (0.0, 0.0, 256.0, 256.0)                            # printable area bbox, mm
+TOWER = (205.0, 200.0, 240.0, 238.0)                      # prime-tower bbox, mm
+EXCLUDE = (0.0, 0.0, 18.0, 28.0)                          # X1C's bed_exclude_area, mm
+NOISE_S = 0.005                                           # slow-downs below this many seconds are timer noise
+IMPORT_BUDGET_MS = 150                                    # cold `import design_metrics_worker`, interpreter included
+STARTUP_BUDGET_MS = 500                                   # cold --no-body --no-cache readout of a small plate
+LAZY_MODULES = ("PIL", "numpy", "sqlite3", "csv", "concurrent.futures", "xml.etree.ElementTree")
+FEATURES = ("Outer wall", "Inner wall", "Sparse infill", "Internal solid infill",
+            "Top surface", "Overhang wall", "Bridge", "Support")
+
+
+# =============================================================================
+#  synthetic plates
+# =============================================================================
+def _object_boxes(objects):
+    """Grid of object footprints (mm bboxes) clear of the exclusion zone, the front
+    calibration strip and the prime tower."""
+    cols = max(1, min(objects, 9))
+    boxes = []
+    for o in range(objects):
+        cx = 30.0 + (o % cols) * 19.0
+        cy = 40.0 + (o // cols) * 19.0 % 150.0
+        boxes.append((cx - 7.0, cy - 7.0, cx + 7.0, cy + 7.0))
+    return boxes
+
+
+def synthetic_gcode(layers=200, objects=20, colors=4, toolchange_every=5, layer_h=0.2, seed=1):
+    """A plate_1.gcode shaped like Bambu Studio's: header + config blocks, start
+    gcode, then per layer CHANGE_LAYER / Z_HEIGHT, retract + z-hop travel, a colour
+    swap through the prime tower every `toolchange_every` layers, per-object labels
+    and feature runs, and M73 progress."""
+    rnd = random.Random(seed)
+    out = io.StringIO(); w = out.write
+    minutes = layers * 3
+    w("; HEADER_BLOCK_START\n; BambuStudio 01.10.01.50\n")
+    w("; model printing time: %dm; total estimated time: %dm\n" % (minutes - 5, minutes))
+    w("; total layer number: %d\n; total filament length [mm] : 12345.67\n" % layers)
+    w("; max_z_height: %.2f\n; HEADER_BLOCK_END\n\n" % (layers * layer_h))
+    w("; CONFIG_BLOCK_START\n; layer_height = %.2f\n; printable_area = 0x0,256x0,256x256,0x256\n" % layer_h)
+    w("; change_filament_gcode = M620 S[next_extruder]A\\nT[next_extruder]\n")
+    w("T0\n; CONFIG_BLOCK_END\n\n")                        # a T inside the config block must not count
+    w("; EXECUTABLE_BLOCK_START\nM73 P0 R%d\nM83\nG90\nG1 Z.4 F1200\n" % minutes)
+    w("; FEATURE: Custom\nG1 X18 Y1 F12000\nG1 X240 Y1 E24 F3000\nT0\n")   # front purge line
+    boxes = _object_boxes(objects)
+    x = y = 128.0
+    for L in range(layers):
+        z = layer_h * (L + 1)
+        w("; CHANGE_LAYER\n; Z_HEIGHT: %.2f\n; LAYER_HEIGHT: %.2f\n" % (z, layer_h))
+        w("M73 P%d R%d\n" % (L * 100 // layers, minutes - L * minutes // layers))
+        w("G1 E-.8 F1800\nG1 X%.3f Y%.3f Z%.2f F30000\nG1 Z%.2f\nG1 E.8 F1800\n"   # lifted travel
+          % (x, y, z + .4, z))
+        if colors > 1 and L % toolchange_every == 0:
+            w("M620 S%dA\nT%d\nM621 S%dA\n" % ((L // toolchange_every) % colors,
+                                                (L // toolchange_every) % colors, (L // toolchange_every) % colors))
+        if colors > 1:
+            w("; FEATURE: Prime tower\n; LINE_WIDTH: 0.5\nG1 X%.3f Y%.3f F30000\n" % (TOWER[0] + 2, TOWER[1] + 2))
+            for k in range(12):
+                w("G1 X%.3f Y%.3f E%.5f\n" % (TOWER[0] + 2 + (k % 2) * 30, TOWER[1] + 2 + k * 3, 0.9))
+        for o, (bx0, by0, bx1, by1) in enumerate(boxes):
+            w("; start printing object, unique label id: %d\n" % (100 + o))
+            w("G1 X%.3f Y%.3f F30000\nG1 E.8 F1800\n" % (bx0, by0))
+            for f in FEATURES[: 3 + (o + L) % 5]:
+                w("; FEATURE: %s\n; LINE_WIDTH: 0.42\n" % f)
+                for _ in range(8):
+                    x = rnd.uniform(bx0, bx1); y = rnd.uniform(by0, by1)
+                    w("G1 X%.3f Y%.3f E%.5f\n" % (x, y, rnd.uniform(0.01, 0.2)))
+                w("G1 X%.3f Y%.3f F12000\n" % (x, y + 0.5))
+            w("G1 E-.8 F1800\n; stop printing object, unique label id: %d\n" % (100 + o))
+    w("M73 P100 R0\n; EXECUTABLE_BLOCK_END\n")
+    return out.getvalue()
+
+
+def synthetic_pick(size, objects=40, seed=1, boxes=None):
+    """An RGBA pick like Bambu's: transparent bed, one flat colour per object,
+    plus the prime tower's own colour. boxes = object bboxes in mm (else random
+    rectangles and ellipses). Needs Pillow."""
+    from PIL import Image, ImageDraw
+    rnd = random.Random(seed)
+    im = Image.new("RGBA", (size, size), (0, 0, 0, 0))
+    d = ImageDraw.Draw(im)
+    s = size / 256.0
+    for i in range(len(boxes) if boxes else objects):
+        if boxes:
+            bx0, by0, bx1, by1 = boxes[i]
+            r = (bx0 * s, (BED[3] - by1) * s, bx1 * s, (BED[3] - by0) * s)   # pick y is flipped vs bed y
+        else:
+            x0, y0 = rnd.uniform(5, 215) * s, rnd.uniform(20, 225) * s
+            r = (x0, y0, x0 + rnd.uniform(8, 30) * s, y0 + rnd.uniform(8, 30) * s)
+        col = (rnd.randrange(256), rnd.randrange(256), rnd.randrange(256), 255)
+        (d.ellipse if i % 3 == 0 else d.rectangle)(r, fill=col)
+    d.rectangle((TOWER[0] * s, (BED[3] - TOWER[3]) * s, TOWER[2] * s, (BED[3] - TOWER[1]) * s),
+                fill=(250, 250, 250, 255))
+    return im
+
+
+def make_design(parent, name="X1C_Bench_Theme", layers=200, objects=20, colors=4,
+                toolchange_every=5, pick_px=512, seed=1):
+    """Write one synthetic design folder (3mf + _Data.tsv) under parent; returns the folder.
+    Without Pillow the 3mf has no pick_1.png (plate_utilization then reports an error)."""
+    folder = os.path.join(parent, name)
+    os.makedirs(folder, exist_ok=True)
+    boxes = _object_boxes(objects)
+    pt = lambda x, y: "%gx%g" % (x, y)
+    cfg = {"printable_area": [pt(BED[0], BED[1]), pt(BED[2], BED[1]), pt(BED[2], BED[3]), pt(BED[0], BED[3])],
+           "bed_exclude_area": [pt(EXCLUDE[0], EXCLUDE[1]), pt(EXCLUDE[2], EXCLUDE[1]),
+                                pt(EXCLUDE[2], EXCLUDE[3]), pt(EXCLUDE[0], EXCLUDE[3])],
+           "layer_height": "0.2", "printer_model": "Bambu Lab X1 Carbon"}
+    pj = {"bbox_objects": [{"name": "Body_%d.stl" % o, "id": 100 + o, "bbox": list(b)} for o, b in enumerate(boxes)]}
+    if colors > 1:
+        pj["bbox_objects"].append({"name": "wipe_tower", "id": 9999, "bbox": list(TOWER)})
+    png = None
+    if dmw.have_pillow():
+        png = io.BytesIO(); synthetic_pick(pick_px, seed=seed, boxes=boxes).save(png, "PNG")
+    g3 = os.path.join(folder, name + "_Full.gcode.3mf")
+    with zipfile.ZipFile(g3, "w", zipfile.ZIP_DEFLATED) as z:
+        z.writestr("Metadata/plate_1.gcode", synthetic_gcode(layers, objects, colors, toolchange_every, seed=seed))
+        z.writestr("Metadata/project_settings.config", json.dumps(cfg, indent=4))
+        z.writestr("Metadata/plate_1.json", json.dumps(pj))
+        if png: z.writestr("Metadata/pick_1.png", png.getvalue())
+        z.writestr("Metadata/layer_heights_profile.txt", "0|0.2|%g|0.2" % (layers * 0.2))
+    slots = []
+    for c in range(8):
+        slots += ["%.2f" % (300.0 / colors), "Colour %d" % (c + 1)] if c < colors else ["0", ""]
+    hours = layers * 3 // 60
+    row = ["X1C", "Standard", name, "", "Bench", "1/2/2025", str(hours), str(layers * 3 % 60)] + slots + \
+          [str((layers // toolchange_every) if colors > 1 else 0), str(objects), "300", "340", "21.5"]
+    with open(os.path.join(folder, name + "_Data.tsv"), "w", encoding="utf-8") as fh:
+        fh.write("\t".join(row) + "\n")
+    return folder
+
+
+def make_corpus(parent, designs=3, **kw):
+    """designs synthetic folders (different seeds) under parent -> [folders]."""
+    return [make_design(parent, "X1C_Bench_%02d" % i, seed=i + 1, **kw) for i in range(designs)]
+
+
+# =============================================================================
+#  suite
+# =============================================================================
+def _best(fn, repeat):
+    best, out = None, None
+    for _ in range(repeat):
+        t = time.perf_counter(); out = fn(); dt = time.perf_counter() - t
+        best = dt if best is None else min(best, dt)
+    return best, out
+
+
+def _member_bytes(g3, names):
+    with zipfile.ZipFile(g3) as z:
+        return sum(zi.file_size for zi in z.infolist() if zi.filename in names)
+
+
+def run_suite(folders, engines, repeat):
+    """{stage: {seconds, designs_per_s, mb_per_s}} - best of `repeat` over all folders."""
+    files = [dmw.find_design_files(f) for f in folders]
+    mb = lambda n: n / 1048576.0
+    tsv_mb = mb(sum(os.path.getsize(t) for _, t, _ in files))
+    util_mb = mb(sum(_member_bytes(g, ("Metadata/project_settings.config", "Metadata/plate_1.json",
+                                       "Metadata/pick_1.png")) for _, _, g in files))
+    gcode_mb = mb(sum(_member_bytes(g, ("Metadata/plate_1.gcode",)) for _, _, g in files))
+    def each_arc(fn):
+        out = []
+        for _, _, g in files:
+            with dmw.DesignArchive(g) as arc:
+                out.append(fn(arc))
+        return out
+    stages = [("parse_data_tsv", tsv_mb, lambda: [dmw.parse_data_tsv(t) for _, t, _ in files]),
+              ("plate_utilization", util_mb, lambda: each_arc(lambda arc: dmw.plate_utilization(arc, "X1C"))),
+              ("gcode_header", None, lambda: each_arc(dmw.gcode_header))]
+    for e in engines:
+        stages.append(("gcode_body[%s]" % e, gcode_mb, lambda e=e: each_arc(lambda arc: dmw.gcode_body(arc, e))))
+    for e in engines:
+        stages.append(("harvest[%s]" % e, gcode_mb,
+                       lambda e=e: [dmw.flatten_result(dmw.extract_design(f, True, e)) for f in folders]))
+    out = {}
+    for name, size_mb, fn in stages:
+        t, _ = _best(fn, repeat)
+        out[name] = {"seconds": round(t, 4), "designs_per_s": round(len(folders) / t, 2),
+                     "mb_per_s": round(size_mb / t, 2) if size_mb is not None else None}
+        sys.stderr.write("  %s done\n" % name)
+    return out
+
+
+def print_suite(res, base=None, tolerance=0.15):
+    """Table of the stages; with a baseline, the speed ratio and a REGRESSION flag.
+    Returns the regressed stage names."""
+    print("\n  %-22s %10s %12s %10s%s" % ("stage", "seconds", "designs/s", "MB/s", "   vs baseline" if base else ""))
+    print("  " + "-" * (58 + (16 if base else 0)))
+    bad = []
+    for name, r in res["stages"].items():
+        line = "  %-22s %10.3f %12.2f %10s" % (name, r["seconds"], r["designs_per_s"],
+                                                "-" if r["mb_per_s"] is None else "%.1f" % r["mb_per_s"])
+        b = (base or {}).get("stages", {}).get(name)
+        if b:
+            ratio = b["seconds"] / r["seconds"]
+            line += "   %5.2fx" % ratio
+            if ratio < 1.0 - tolerance and r["seconds"] - b["seconds"] > NOISE_S:
+                line += "  REGRESSION"; bad.append(name)
+        print(line)
+    py = res["stages"].get("gcode_body[python]")
+    for e in ("bytes", "numpy"):
+        r = res["stages"].get("gcode_body[%s]" % e)
+        if py and r:
+            print("  gcode_body[%s] vs [python]: %.2fx" % (e, py["seconds"] / r["seconds"]))
+    return bad
+
+
+def _engines():
+    engines = ["python", "bytes"]
+    try:
+        import numpy  # noqa: F401
+        engines.append("numpy")
+    except ImportError:
+        sys.stderr.write("(NumPy not installed - numpy engine skipped)\n")
+    return engines
+
+
+def _corpus(args):
+    """(folders, params, temp dir to remove or None): the --fixtures designs, else a
+    corpus generated from the plate arguments."""
+    params = {"designs": args.designs, "layers": args.layers, "objects": args.objects,
+              "colors": args.colors, "toolchange_every": args.toolchange_every, "pick_px": args.pick_px}
+    if args.fixtures and os.path.isdir(args.fixtures) and dmw.find_design_folders([args.fixtures]):
+        folders = dmw.find_design_folders([args.fixtures])
+        return folders, {"fixtures": args.fixtures, "designs": len(folders)}, None
+    parent = args.fixtures or tempfile.mkdtemp(prefix="dmw_bench_")
+    sys.stderr.write("Generating %d plate(s) in %s ...\n" % (args.designs, parent))
+    folders = make_corpus(parent, args.designs, layers=args.layers, objects=args.objects, colors=args.colors,
+                          toolchange_every=args.toolchange_every, pick_px=args.pick_px)
+    return folders, params, (None if args.fixtures else parent)
+
+
+def bench_suite(args):
+    engines = _engines()
+    folders, params, tmp = _corpus(args)
+    try:
+        res = {"machine": {"python": platform.python_version(), "platform": platform.platform(),
+                           "cpus": os.cpu_count()},
+               "params": params, "repeat": args.repeat,
+               "stages": run_suite(folders, engines, args.repeat)}
+    finally:
+        if tmp: shutil.rmtree(tmp, ignore_errors=True)
+    base = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fh:
+            base = json.load(fh)
+        if base.get("params") != res["params"]:
+            sys.stderr.write("NOTE: baseline was run with different parameters: %s\n" % base.get("params"))
+    bad = print_suite(res, base, args.tolerance)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as fh:
+            json.dump(res, fh, indent=2)
+        print("\nBaseline saved -> %s" % args.save)
+    if bad:
+        print("\n%d stage(s) slower than the baseline by more than %d%%: %s"
+              % (len(bad), args.tolerance * 100, ", ".join(bad)))
+    return not bad
+
+
+# =============================================================================
+#  util
+# =============================================================================
+def bench_util(sizes, repeat):
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        sys.stderr.write("NumPy is required for the util benchmark:  pip install numpy\n")
+        sys.exit(2)
+    if not dmw.have_pillow():
+        sys.stderr.write("Pillow is required for the util benchmark:  pip install Pillow\n")
+        sys.exit(2)
+    print("pick coverage  (best of %d)\n" % repeat)
+    print("  %6s %10s %12s %12s %9s  %s" % ("px", "pixels", "loop ms", "numpy ms", "speed-up", "identical"))
+    print("  " + "-" * 64)
+    ok_all = True
+    for n in sizes:
+        pick = synthetic_pick(n)
+        geo = (BED[0], BED[3], (BED[2] - BED[0]) / n, (BED[3] - BED[1]) / n, TOWER)
+        t_py, ref = _best(lambda: dmw._pick_coverage_py(pick, *geo), max(1, repeat // 2))
+        t_np, got = _best(lambda: dmw.pick_coverage(pick, *geo), repeat)
+        same = got == ref and list(got[1]) == list(ref[1])
+        ok_all &= same
+        print("  %6d %10d %12.1f %12.2f %8.0fx  %s" % (n, n * n, t_py * 1e3, t_np * 1e3, t_py / t_np, same))
+    return ok_all
+
+
+# =============================================================================
+#  pipeline
+# =============================================================================
+def _body_pass(g3s, engine):
+    """gcode_body over every plate -> (results, inflate ms, ms the parser waited)."""
+    res, inf, wt = [], 0.0, 0.0
+    for g in g3s:
+        with dmw.DesignArchive(g) as arc:
+            for kind, out in dmw.gcode_stream(arc, True, engine):
+                if kind == "body": res.append(out)
+                elif kind == "pipeline": inf += out["inflate_ms"]; wt += out["wait_ms"]
+    return res, inf, wt
+
+
+def bench_pipeline(args):
+    folders, _, tmp = _corpus(args)
+    try:
+        g3s = [dmw.find_design_files(f)[2] for f in folders]
+        mb = sum(_member_bytes(g, ("Metadata/plate_1.gcode",)) for g in g3s) / 1048576.0
+        print("gcode body pass, inline inflate vs reader thread  (%d plate(s), %.1f MB, best of %d, "
+              "queue %d x %d KB)\n" % (len(g3s), mb, args.repeat, dmw.PREFETCH_DEPTH, dmw.PREFETCH_BLOCK >> 10))
+        print("  %-8s %10s %10s %9s %11s %10s %10s  %s" % ("engine", "inline s", "thread s", "speed-up",
+                                                            "inflate s", "waited s", "overlap", "identical"))
+        print("  " + "-" * 86)
+        depth, ok_all = dmw.PREFETCH_DEPTH, True
+        for e in _engines():
+            try:
+                dmw.PREFETCH_DEPTH = 0
+                t_in, (ref, _, _) = _best(lambda: _body_pass(g3s, e), args.repeat)
+            finally:
+                dmw.PREFETCH_DEPTH = depth
+            t_th, (got, inf, wt) = _best(lambda: _body_pass(g3s, e), args.repeat)
+            same = got == ref
+            ok_all &= same
+            print("  %-8s %10.3f %10.3f %8.2fx %11.3f %10.3f %9.0f%%  %s"
+                  % (e, t_in, t_th, t_in / t_th, inf / 1e3, wt / 1e3, 100.0 * max(0.0, inf - wt) / inf if inf else 0,
+                     same))
+        if (os.cpu_count() or 1) < 2:
+            print("\n(one CPU here - the reader thread can't run beside the parser, expect ~1x)")
+    finally:
+        if tmp: shutil.rmtree(tmp, ignore_errors=True)
+    return ok_all
+
+
+# =============================================================================
+#  startup
+# =============================================================================
+def _cold(cmd, repeat):
+    """Best wall seconds of `repeat` fresh interpreters running cmd. Bytecode writing is
+    left on (PYTHONDONTWRITEBYTECODE dropped), as on the editor boxes - the first run
+    leaves the __pycache__ entry the others import."""
+    env = {k: v for k, v in os.environ.items() if k != "PYTHONDONTWRITEBYTECODE"}
+    run = lambda: subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=env, check=True)
+    run()
+    return _best(run, repeat)[0]
+
+
+def bench_startup(args):
+    here = os.path.dirname(os.path.abspath(__file__))
+    py, worker = sys.executable, os.path.join(here, "design_metrics_worker.py")
+    probe = ("import sys; sys.path.insert(0, %r); import design_metrics_worker; "
+             "print(' '.join(m for m in %r if m in sys.modules))" % (here, LAZY_MODULES))
+    loaded = subprocess.run([py, "-c", probe], capture_output=True, text=True, check=True).stdout.split()
+    rows = [("import design_metrics_worker", _cold([py, "-c", probe], args.repeat), args.import_budget)]
+    tmp = tempfile.mkdtemp(prefix="dmw_startup_")
+    try:
+        folder = make_design(tmp, layers=20, objects=4)
+        argv = [folder, "--no-body", "--no-cache", "--json"]
+        rows.append(("--no-body  (script)", _cold([py, worker] + argv, args.repeat), args.budget))
+        if args.pyz:
+            pyz = dmw.build_pyz(os.path.join(tmp, dmw.PYZ_NAME))
+            rows.append(("--no-body  (zipapp)", _cold([py, pyz] + argv, args.repeat), args.budget))
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    print("cold start  (best of %d fresh interpreters)\n" % args.repeat)
+    print("  %-30s %9s %9s  %s" % ("run", "ms", "budget", "ok"))
+    print("  " + "-" * 56)
+    ok_all = not loaded
+    for name, sec, budget in rows:
+        ok = sec * 1e3 <= budget
+        ok_all &= ok
+        print("  %-30s %9.1f %9d  %s" % (name, sec * 1e3, budget, "yes" if ok else "OVER"))
+    print("\nheavy modules loaded by the bare import: %s" % (" ".join(loaded) if loaded else "none"))
+    if loaded:
+        print("(%s must be imported where they are used)" % " / ".join(loaded))
+    return ok_all
+
+
+def _plate_args(p, designs):
+    p.add_argument("--designs", type=int, default=designs)
+    p.add_argument("--layers", type=int, default=200)
+    p.add_argument("--objects", type=int, default=20)
+    p.add_argument("--colors", type=int, default=4)
+    p.add_argument("--toolchange-every", type=int, default=5, metavar="N", help="colour swap every N layers")
+    p.add_argument("--pick-px", type=int, default=512)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Synthetic plates + benchmarks for design_metrics_worker.py.")
+    sub = ap.add_subparsers(dest="bench", required=True)
+    b = sub.add_parser("fixtures", help="write synthetic design folders")
+    b.add_argument("out_dir")
+    _plate_args(b, 1)
+    b = sub.add_parser("suite", help="time every stage; save / compare a baseline JSON")
+    _plate_args(b, 3)
+    b.add_argument("--fixtures", metavar="DIR",
+                   help="use the design folders in DIR (generated there first if it has none) "
+                        "instead of a temp corpus")
+    b.add_argument("--repeat", type=int, default=3)
+    b.add_argument("--save", metavar="BASELINE.json", help="write the results as a baseline")
+    b.add_argument("--compare", metavar="BASELINE.json", help="compare against a saved baseline (exit 1 on regression)")
+    b.add_argument("--tolerance", type=float, default=0.15, help="allowed slow-down vs baseline (default 0.15)")
+    b = sub.add_parser("util", help="plate_utilization pick coverage: NumPy vs per-pixel loop")
+    b.add_argument("--sizes", type=int, nargs="+", default=[512, 1024])
+    b.add_argument("--repeat", type=int, default=3)
+    b = sub.add_parser("pipeline", help="gcode body pass: inline inflate vs the reader thread")
+    _plate_args(b, 1)
+    b.add_argument("--fixtures", metavar="DIR", help="use the design folders in DIR instead of a temp corpus")
+    b.add_argument("--repeat", type=int, default=3)
+    b = sub.add_parser("startup", help="cold-start budget of the import and the --no-body path (exit 1 past it)")
+    b.add_argument("--repeat", type=int, default=5)
+    b.add_argument("--budget", type=int, default=STARTUP_BUDGET_MS, metavar="MS",
+                   help="--no-body run budget (default %d ms)" % STARTUP_BUDGET_MS)
+    b.add_argument("--import-budget", type=int, default=IMPORT_BUDGET_MS, metavar="MS",
+                   help="bare import budget (default %d ms)" % IMPORT_BUDGET_MS)
+    b.add_argument("--pyz", action="store_true", help="also time the zipapp (built into a temp dir)")
+    args = ap.parse_args()
+    if args.bench == "fixtures":
+        for f in make_corpus(args.out_dir, args.designs, layers=args.layers, objects=args.objects,
+                             colors=args.colors, toolchange_every=args.toolchange_every, pick_px=args.pick_px):
+            print(f)
+        ok = True
+    elif args.bench == "suite":
+        ok = bench_suite(args)
+    elif args.bench == "pipeline":
+        ok = bench_pipeline(args)
+    elif args.bench == "startup":
+        ok = bench_startup(args)
+    else:
+        ok = bench_util(args.sizes, args.repeat)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,7 +8,7 @@ Per-design metric extractor for the efficiency analyses.
             material, filament/unit, waste/unit, throughput, per-colour grams.
 
   PART B  - parsed from the sliced *Full.gcode.3mf (things NOT in our data):
-            * plate utilization %                 (pick.png + plate_1.json + config)
+            * plate utilization %                 (pick.png or 3D/3dmodel.model + plate_N.json + config)
             * print height, layer count           (gcode header)
             * variable layer height               (layer_heights_profile.txt)
             * feature mix (wall/infill/tower/...)  (gcode body)
@@ -22,23 +22,51 @@ Usage:
   python design_metrics_worker.py "C:\\ZB_Designs\\...\\X1C_Avocado_Foodz"   # folder
   python design_metrics_worker.py "...\\X1C_Avocado_Foodz_Full.gcode.3mf"
   python design_metrics_worker.py "..." --json
+  python design_metrics_worker.py "C:\\ZB_Designs" --ndjson      # one JSON line per design as it finishes
   python design_metrics_worker.py "..." --no-body     # skip the heavy gcode body pass
+  python design_metrics_worker.py "..." --engine numpy   # vectorized gcode body pass
+  python design_metrics_worker.py "..." --engine bytes   # chunked bytes gcode body pass
+  python design_metrics_worker.py "..." --estimate 40    # body metrics from 40 sampled layers, with 95% CIs
+  python design_metrics_worker.py "..." --layers 120:140 # body metrics of just those layers (layer index)
+  python design_metrics_worker.py "..." --series layers.npz   # + per-layer arrays
+  python design_metrics_worker.py "..." --objects objects.csv  # + per-object table (.csv / .ndjson)
+  python design_metrics_worker.py "..." --util-source mesh   # utilization from the model meshes, not pick.png
+  python design_metrics_worker.py "..." --profile     # per-stage timings (_timings + table)
+  python design_metrics_worker.py --cache-stats       # on-disk result cache report
+  python design_metrics_worker.py --make-pyz          # precompiled zipapp: python design_metrics_worker.pyz ...
+  python design_metrics_worker.py --serve [--port N]  # resident JSON-lines server (editor)
+  python design_metrics_worker.py --paths-from list.txt --no-body --stream   # batch, one JSON line per design
+  python design_metrics_worker.py "C:\\ZB_Designs\\Farm" --util-images overlays --image-format webp
+  python design_metrics_worker.py "C:\\ZB_Designs" --full --csv production_metrics.csv --jobs 0
+  python design_metrics_worker.py "C:\\ZB_Designs" --full --csv production_metrics.csv --baselines
+  python design_metrics_worker.py "C:\\ZB_Designs" --full --db production_metrics.db --export-csv production_metrics.csv
+  python design_metrics_worker.py --db production_metrics.db --export-csv production_metrics.csv
 """
 import argparse
-import glob
+import contextlib
+import fnmatch
+import hashlib
 import io
+import itertools
 import json
 import math
 import os
+import queue
+import random
 import re
 import sys
+import threading
+import time
 import zipfile
+import zlib
 
-try:
-    from PIL import Image
-except ImportError:
-    sys.stderr.write("Pillow is required:  pip install Pillow\n")
-    sys.exit(2)
+# Heavy modules (Pillow, NumPy, sqlite3, csv, concurrent.futures, ElementTree) are imported
+# where they are used, so a run that never decodes an image or parses a body - a cached
+# --no-body readout, --cache-stats, an export - starts without them.
+_HERE = os.path.dirname(os.path.abspath(__file__))
+if os.path.isfile(_HERE):            # running from design_metrics_worker.pyz (--make-pyz)
+    _HERE = os.path.dirname(_HERE)
+DATA_DIR = os.path.join(os.path.dirname(_HERE), "data")
 
 # Front purge / flow-calibration line - fixed machine constant, keyed by bed size.
 # Verified front purge / flow-calibration line, keyed by PRINTER (the TSV/folder
@@ -67,40 +95,163 @@ def _feature_bucket(name):
 # =============================================================================
 #  file discovery
 # =============================================================================
+DISCOVERY_THREADS = 8                # directories listed at once - hides network-share latency
+DIR_INDEX_PATH = os.path.join(DATA_DIR, "dir_index.json")
+DIR_INDEX_SETTLE_NS = 2 * 10 ** 9    # a listing taken this soon after the dir's mtime isn't trusted next time
+USE_DIR_INDEX = True                 # --no-cache: list every directory again
+DESIGN_FILES_MAX = 4096              # folders whose discovered file names are kept (oldest dropped - --serve)
+
+_DESIGN_FILES = {}                   # folder -> its design file names, from discovery (or seeded by harvest())
+_design_files_lock = threading.Lock()
+_dir_index = None                    # dir -> [mtime_ns, subdir names, design file names]; see _scan_tree
+_dir_index_lock = threading.Lock()
+
+
+def _design_files_in(folder, names):
+    """(folder, tsv, 3mf) from the folder's file names - the globs find_design_files
+    used to run (same matching: case per OS, dot-files skipped)."""
+    names = sorted(n for n in names if not n.startswith("."))
+    tsv = [n for n in names if fnmatch.fnmatch(n, "*_Data.tsv")]
+    g3 = [n for n in names if fnmatch.fnmatch(n, "*Full.gcode.3mf")]
+    if not g3:
+        g3 = [n for n in names if fnmatch.fnmatch(n, "*.gcode.3mf") and not re.search(r"(?i)bod", n)]
+    return folder, (os.path.join(folder, tsv[0]) if tsv else None), (os.path.join(folder, g3[0]) if g3 else None)
+
+
+def _is_design_file(name):
+    n = name.lower()
+    return n.endswith(".gcode.3mf") or n.endswith("_data.tsv")
+
+
+def _remember_design_files(folder, names):
+    with _design_files_lock:
+        _DESIGN_FILES.pop(folder, None)
+        _DESIGN_FILES[folder] = names
+        while len(_DESIGN_FILES) > DESIGN_FILES_MAX:
+            del _DESIGN_FILES[next(iter(_DESIGN_FILES))]
+
+
 def find_design_files(path):
+    """(folder, tsv, 3mf) of a design folder (or of the folder of a given file): what
+    discovery already resolved, else one listing of the folder."""
     folder = path if os.path.isdir(path) else os.path.dirname(path)
-    tsv = sorted(glob.glob(os.path.join(folder, "*_Data.tsv")))
-    g3 = sorted(glob.glob(os.path.join(folder, "*Full.gcode.3mf")))
-    if not g3:
-        g3 = [f for f in glob.glob(os.path.join(folder, "*.gcode.3mf"))
-              if not re.search(r"(?i)bod", os.path.basename(f))]
-    return folder, (tsv[0] if tsv else None), (g3[0] if g3 else None)
+    names = _DESIGN_FILES.get(os.path.normpath(folder))
+    if names is None:
+        try:
+            with os.scandir(folder) as it:
+                names = [e.name for e in it if e.is_file()]
+        except OSError:
+            names = []
+    return _design_files_in(folder, names)
+
 
+def _load_dir_index():
+    global _dir_index
+    if _dir_index is None:
+        try:
+            with open(DIR_INDEX_PATH, encoding="utf-8") as fh:
+                _dir_index = json.load(fh)
+        except (OSError, ValueError):
+            _dir_index = {}
+    return _dir_index
 
-def _is_design_folder(folder):
+
+def _save_dir_index():
     try:
-        return any(f.lower().endswith("full.gcode.3mf") for f in os.listdir(folder))
+        os.makedirs(os.path.dirname(DIR_INDEX_PATH), exist_ok=True)
+        tmp = DIR_INDEX_PATH + ".%d.tmp" % os.getpid()
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(_dir_index, fh, separators=(",", ":"))
+        os.replace(tmp, DIR_INDEX_PATH)
     except OSError:
-        return False
+        pass
+
+
+def _list_dir(d, cached):
+    """[mtime_ns, subdirs, design files] of d. A directory's mtime moves whenever an
+    entry is added, removed or renamed in it, so an unchanged mtime means the cached
+    listing still holds and d costs one stat instead of a listing."""
+    mtime = os.stat(d).st_mtime_ns
+    if cached and cached[0] == mtime:
+        return cached
+    subdirs, files = [], []
+    with os.scandir(d) as it:
+        for e in it:
+            try:
+                if e.is_dir(follow_symlinks=False): subdirs.append(e.name)       # os.walk doesn't follow links
+                elif _is_design_file(e.name) and e.is_file(): files.append(e.name)
+            except OSError:
+                pass
+    # racy listing: the dir may still change within its mtime's granularity - relist next time
+    settled = time.time_ns() - mtime > DIR_INDEX_SETTLE_NS
+    return [mtime if settled else None, subdirs, files]
+
+
+def _scan_tree(root, pool, index):
+    """Every directory under root -> its [mtime_ns, subdirs, files], listed DISCOVERY_THREADS
+    at a time (unchanged directories from `index`). -> {dir: entry}"""
+    from concurrent.futures import FIRST_COMPLETED, wait
+    info = {}
+    pending = {pool.submit(_list_dir, root, index.get(root)): root}
+    while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for fut in done:
+            d = pending.pop(fut)
+            try:
+                info[d] = entry = fut.result()
+            except OSError:
+                continue
+            for sub in entry[1]:
+                p = os.path.join(d, sub)
+                pending[pool.submit(_list_dir, p, index.get(p))] = p
+    return info
 
 
 def find_design_folders(paths):
     """For each dropped path, recursively collect every design folder beneath it
     (a folder that directly contains a *Full.gcode.3mf). A dropped .3mf or a
     single design folder resolves to just that folder. Folders WITHOUT a
-    Full.gcode.3mf are skipped (per the harvest rule). De-duplicated, in order."""
+    Full.gcode.3mf are skipped (per the harvest rule). De-duplicated, in order.
+    Directories are listed with os.scandir on a thread pool, and the listings are
+    kept in DIR_INDEX_PATH keyed by each directory's mtime, so a re-run only lists
+    the directories that changed. Each design's TSV / 3mf paths come out of the same
+    listing (_DESIGN_FILES) - find_design_files doesn't list the folder again."""
     found, seen = [], set()
     def add(d):
         d = os.path.normpath(d)
         if d not in seen:
             seen.add(d); found.append(d)
+    dirs = [os.path.normpath(os.path.abspath(p)) for p in paths if os.path.isdir(p)]
+    info = {}
+    if dirs:
+        from concurrent.futures import ThreadPoolExecutor
+        with _dir_index_lock:
+            index = _load_dir_index() if USE_DIR_INDEX else {}
+            with ThreadPoolExecutor(DISCOVERY_THREADS) as pool:
+                for d in dirs:
+                    if d not in info: info.update(_scan_tree(d, pool, index))
+            if USE_DIR_INDEX:
+                stale = [k for k in index if k not in info and any(k == d or k.startswith(d.rstrip(os.sep) + os.sep)
+                                                                    for d in dirs)]
+                changed = [k for k, v in info.items() if index.get(k) is not v]
+                for k in stale: del index[k]
+                index.update(info)
+                if stale or changed: _save_dir_index()
     for p in paths:
         if os.path.isfile(p) and p.lower().endswith(".3mf"):
             add(os.path.dirname(p))
         elif os.path.isdir(p):
-            for root, dirs, files in os.walk(p):
-                if any(f.lower().endswith("full.gcode.3mf") for f in files):
-                    add(root)
+            root = os.path.normpath(os.path.abspath(p))
+            stack = [root]
+            while stack:                                      # top-down, in listing order - like os.walk
+                d = stack.pop()
+                entry = info.get(d)
+                if entry is None: continue
+                if any(f.lower().endswith("full.gcode.3mf") for f in entry[2]):
+                    folder = os.path.normpath(p + d[len(root):])    # spelled the way it was given, like os.walk
+                    _remember_design_files(folder, entry[2])
+                    add(folder)
+                stack.extend(os.path.join(d, sub) for sub in reversed(entry[1]))
     return found
 
 
@@ -177,19 +328,113 @@ def parse_data_tsv(tsv_path):
 # =============================================================================
 #  PART B - the sliced 3mf
 # =============================================================================
-def _read(zf, name):
-    t = name.lower()
-    for n in zf.namelist():
-        if n.replace("\\", "/").lower() == t:
-            return zf.read(n)
-    return None
-
-def _open(zf, name):
-    t = name.lower()
-    for n in zf.namelist():
-        if n.replace("\\", "/").lower() == t:
-            return zf.open(n)
-    return None
+class _TimedFile:
+    """Read-only file proxy adding the seconds + bytes spent in read() to io[0] / io[1] -
+    the disk / network share of a stage, as opposed to inflate + parse."""
+
+    def __init__(self, fh, io):
+        self._fh = fh; self._io = io
+
+    def read(self, n=-1):
+        t = time.perf_counter()
+        b = self._fh.read(n)
+        self._io[0] += time.perf_counter() - t; self._io[1] += len(b)
+        return b
+
+    def __getattr__(self, name):
+        return getattr(self._fh, name)
+
+
+_PLATE_RE = re.compile(r"metadata/plate_(\d+)\.gcode$")
+
+
+class DesignArchive:
+    """A sliced .gcode.3mf opened and indexed once, shared by every PART B extractor.
+    Members are found through one case-insensitive index; the decoded config, plate
+    JSONs, polygons and pick images are parsed on first use and kept. Safe to share
+    between threads (--serve, the per-plate threads): a race at worst parses something twice.
+    close() it when done (or use it as a context manager).
+    io: a [seconds, bytes] list to add the time / bytes of every file read to (--profile)."""
+
+    def __init__(self, path, io=None):
+        self._fh = _TimedFile(open(path, "rb"), io) if io is not None else None
+        try:
+            self.zf = zipfile.ZipFile(self._fh or path)
+        except Exception:
+            if self._fh: self._fh.close()
+            raise
+        self.path = path
+        self.index = {}                          # "metadata/plate_1.gcode" -> ZipInfo (first wins)
+        for zi in self.zf.infolist():
+            self.index.setdefault(zi.filename.replace("\\", "/").lower(), zi)
+        self._memo = {}
+
+    def close(self):
+        """Release the file. A member stream already open() keeps reading - zipfile holds
+        the file until its last stream is closed (not so under io, which the caller times
+        to the end anyway). What was parsed stays usable; new reads raise ValueError."""
+        self.zf.close()
+        if self._fh: self._fh.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _lazy(self, key, make):
+        try:
+            return self._memo[key]
+        except KeyError:
+            return self._memo.setdefault(key, make())
+
+    def info(self, name):
+        return self.index.get(name.lower())
+
+    def read(self, name):
+        """Member bytes (kept), or None."""
+        zi = self.info(name)
+        return self._lazy(("read", zi.filename), lambda: self.zf.read(zi)) if zi else None
+
+    def open(self, name):
+        """A fresh stream over the member (the gcode - too big to keep), or None."""
+        zi = self.info(name)
+        return self.zf.open(zi) if zi else None
+
+    @property
+    def config(self):
+        """project_settings.config as text, or None."""
+        def make():
+            b = self.read("Metadata/project_settings.config")
+            return b.decode("utf-8", "replace") if b else None
+        return self._lazy("config", make)
+
+    def plates(self):
+        """Numbers of the sliced plates (Metadata/plate_N.gcode), ascending; [1] if none."""
+        return self._lazy("plates", lambda: sorted(int(m.group(1)) for m in map(_PLATE_RE.match, self.index) if m) or [1])
+
+    def plate_json(self, plate=1):
+        """plate_N.json as a dict, or None (missing, empty or not JSON)."""
+        def make():
+            b = self.read("Metadata/plate_%d.json" % plate)
+            try:
+                pj = json.loads(b) if b else None
+            except ValueError:
+                return None
+            return pj if isinstance(pj, dict) else None
+        return self._lazy(("plate_json", plate), make)
+
+    def pick(self, plate=1):
+        """pick_N.png as an RGBA image, or None. Shared - treat as read-only."""
+        def make():
+            from PIL import Image
+            b = self.read("Metadata/pick_%d.png" % plate)
+            return Image.open(io.BytesIO(b)).convert("RGBA") if b else None
+        return self._lazy(("pick", plate), make)
+
+    def poly(self, key):
+        """_poly() of the config, cached per key."""
+        return self._lazy(("poly", key), lambda: _poly(self.config, key) if self.config else None)
 
 def _poly(cfg, key):
     m = re.search(r'"%s"\s*:\s*\[(.*?)\]' % re.escape(key), cfg, re.S)
@@ -205,44 +450,109 @@ def _area(r):
     return max(0.0, r[2] - r[0]) * max(0.0, r[3] - r[1]) if r else 0.0
 
 
-def plate_utilization(zf, printer=None):
-    """Plate utilization % from pick.png coverage over the available bed."""
-    cfg = _read(zf, "Metadata/project_settings.config")
-    pjb = _read(zf, "Metadata/plate_1.json")
-    pkb = _read(zf, "Metadata/pick_1.png")
-    if not (cfg and pjb and pkb):
-        return {"utilization_error": "missing pick_1.png / plate_1.json / config"}
-    cfg = cfg.decode("utf-8", "replace"); pj = json.loads(pjb)
-    pa = _poly(cfg, "printable_area") or [(0, 0), (256, 0), (256, 256), (0, 256)]
-    bx0, by0, bx1, by1 = _bbox(pa)
-    bed_w, bed_h = bx1 - bx0, by1 - by0
-    bed_area = bed_w * bed_h
-    excl = _bbox(_poly(cfg, "bed_exclude_area")) if _poly(cfg, "bed_exclude_area") else None
-    # calibration line is a per-printer machine constant; key by printer (X1C/P2S/H2S)
-    calib = CALIBRATION_LINES.get((printer or "").upper())
-    calib_estimated = False
-    if calib is None:
-        # Best-guess for non-verified beds (P2S / H2S / unknown): a front purge
-        # strip from just past the exclusion zone to near the right edge, 14mm
-        # tall. This formula reproduces the verified X1C value exactly. Tune per
-        # printer later from a real design of that machine.
-        excl_right = excl[2] if excl else 18.0
-        calib = (excl_right, 0.0, max(excl_right + 10.0, bed_w - 10.0), 14.0)
-        calib_estimated = True
-    tower = None
-    for o in pj.get("bbox_objects", []):
-        if re.search("wipe|prime", str(o.get("name", "")), re.I):
-            tower = tuple(float(v) for v in o["bbox"]); break
-
-    pick = Image.open(io.BytesIO(pkb)).convert("RGBA")
-    W, Hh = pick.size; mmppx, mmppy = bed_w / W, bed_h / Hh; px = pick.load()
+def pick_coverage(pick, bx0, by1, mmppx, mmppy, tower=None):
+    """Object pixels of an RGBA pick image: alpha > ALPHA_THRESHOLD, minus any pixel whose
+    corner (bx0 + x*mmppx, by1 - y*mmppy) lies in the prime-tower rect.
+    -> (object pixel count, {0xRRGGBB: pixels} per pick colour, largest first).
+    Whole-array masks with NumPy (the tower test is separable: a column mask times a row
+    mask, same float expressions as the per-pixel test, so the same pixels); without
+    NumPy the original per-pixel loop."""
+    W, Hh = pick.size
+    try:
+        import numpy as np
+    except ImportError:
+        return _pick_coverage_py(pick, bx0, by1, mmppx, mmppy, tower)
+    a = np.asarray(pick)
+    obj = a[:, :, 3] > ALPHA_THRESHOLD
+    if tower:
+        mx = bx0 + np.arange(W) * mmppx
+        my = by1 - np.arange(Hh) * mmppy
+        cols = (tower[0] <= mx) & (mx <= tower[2])
+        rows = (tower[1] <= my) & (my <= tower[3])
+        obj &= ~(rows[:, None] & cols[None, :])
+    rgb = a[obj][:, :3].astype(np.uint32)
+    keys, counts = np.unique((rgb[:, 0] << 16) | (rgb[:, 1] << 8) | rgb[:, 2], return_counts=True)
+    order = np.argsort(-counts, kind="stable")
+    return int(counts.sum()), {int(keys[i]): int(counts[i]) for i in order}
+
+
+def _pick_coverage_py(pick, bx0, by1, mmppx, mmppy, tower=None):
+    """pick_coverage() one pixel at a time - the fallback without NumPy, and the reference."""
+    from collections import Counter
+    W, Hh = pick.size; px = pick.load()
     def in_tower(xp, yp):
         if not tower: return False
         mx = bx0 + xp * mmppx; my = by1 - yp * mmppy
         return tower[0] <= mx <= tower[2] and tower[1] <= my <= tower[3]
-    obj_px = sum(1 for y in range(Hh) for x in range(W)
-                 if px[x, y][3] > ALPHA_THRESHOLD and not in_tower(x, y))
-    obj_area = obj_px * mmppx * mmppy
+    colours = Counter((p[0] << 16) | (p[1] << 8) | p[2] for y in range(Hh) for x in range(W)
+                      for p in (px[x, y],) if p[3] > ALPHA_THRESHOLD and not in_tower(x, y))
+    ranked = sorted(colours.items(), key=lambda kv: (-kv[1], kv[0]))
+    return sum(colours.values()), dict(ranked)
+
+
+def have_pillow():
+    """Is Pillow installed? (found, not imported - that waits for the first image)"""
+    import importlib.util
+    return importlib.util.find_spec("PIL") is not None
+
+
+def plate_geometry(arc, printer=None, plate=1):
+    """The bed zones plate_utilization() and render_util_image() both need, worked out
+    once per archive / plate / printer: (bed bbox, exclusion, calibration line,
+    calibration estimated?, prime tower bbox) - rects in bed mm."""
+    def make():
+        pj = arc.plate_json(plate) or {}
+        pa = arc.poly("printable_area") or [(0, 0), (256, 0), (256, 256), (0, 256)]
+        bbox = _bbox(pa)
+        excl = _bbox(arc.poly("bed_exclude_area")) if arc.poly("bed_exclude_area") else None
+        # calibration line is a per-printer machine constant; key by printer (X1C/P2S/H2S)
+        calib = CALIBRATION_LINES.get((printer or "").upper())
+        calib_estimated = False
+        if calib is None:
+            # Best-guess for non-verified beds (P2S / H2S / unknown): a front purge
+            # strip from just past the exclusion zone to near the right edge, 14mm
+            # tall. This formula reproduces the verified X1C value exactly. Tune per
+            # printer later from a real design of that machine.
+            excl_right = excl[2] if excl else 18.0
+            calib = (excl_right, 0.0, max(excl_right + 10.0, bbox[2] - bbox[0] - 10.0), 14.0)
+            calib_estimated = True
+        tower = None
+        for o in pj.get("bbox_objects", []):
+            if re.search("wipe|prime", str(o.get("name", "")), re.I):
+                tower = tuple(float(v) for v in o["bbox"]); break
+        return bbox, excl, calib, calib_estimated, tower
+    return arc._lazy(("geometry", plate, (printer or "").upper()), make)
+
+
+def plate_utilization(arc, printer=None, plate=1, source=None):
+    """Plate utilization % from pick.png coverage over the available bed - or, source
+    (default UTIL_SOURCE) "mesh", or "auto" on a 3mf without the pick (or without
+    Pillow to decode it), from the model meshes (mesh_utilization())."""
+    source = source or UTIL_SOURCE
+    pick = arc.info("Metadata/pick_%d.png" % plate) and have_pillow()
+    if source == "mesh" or (source == "auto" and not pick and arc.info(MESH_MODEL)):
+        return mesh_utilization(arc, printer, plate)
+    if not (arc.config and arc.plate_json(plate) is not None and arc.info("Metadata/pick_%d.png" % plate)):
+        return {"utilization_error": "missing pick_%d.png / plate_%d.json / config" % (plate, plate)}
+    if not pick:
+        return {"utilization_error": "Pillow is required for the pick coverage:  pip install Pillow"}
+    geom = plate_geometry(arc, printer, plate)
+    (bx0, by0, bx1, by1), tower = geom[0], geom[4]
+    pick = arc.pick(plate)
+    W, Hh = pick.size; mmppx, mmppy = (bx1 - bx0) / W, (by1 - by0) / Hh
+    obj_px, by_colour = pick_coverage(pick, bx0, by1, mmppx, mmppy, tower)
+    out = _utilization_out(arc, printer, plate, geom, obj_px * mmppx * mmppy)
+    out["utilization_source"] = "pick"
+    # one pick colour per object -> each object's footprint, largest first
+    out["object_area_by_color_mm2"] = {"#%06x" % c: round(n * mmppx * mmppy, 1) for c, n in by_colour.items()}
+    return out
+
+
+def _utilization_out(arc, printer, plate, geom, obj_area):
+    """The utilization keys both object-area sources share."""
+    pj = arc.plate_json(plate) or {}
+    (bx0, by0, bx1, by1), excl, calib, calib_estimated, tower = geom
+    bed_area = (bx1 - bx0) * (by1 - by0)
     available = bed_area - _area(excl) - _area(calib) - _area(tower)
     return {
         "plate_utilization_pct": round(obj_area / available * 100, 1) if available > 0 else 0.0,
@@ -260,39 +570,46 @@ def plate_utilization(zf, printer=None):
     }
 
 
-def render_util_image(zf, printer, out_path, scale=2, pick_base=None):
+UTIL_IMAGE_LEVEL = 1                 # default overlay compression 0-9 (fast PNG; PIL's own default is 6)
+_ALPHA_MASK = [255 if a > ALPHA_THRESHOLD else 0 for a in range(256)]    # alpha -> object mask, one LUT pass
+
+
+def save_image(im, out, fmt=None, level=None):
+    """Save an overlay as PNG (zlib level 0-9) or lossless WebP (level 0-9 -> effort:
+    quality level*100/9, method level*6/9). fmt defaults to out's extension; any other
+    format is left to PIL. out: a path or a binary file object."""
+    if fmt is None:
+        fmt = os.path.splitext(out)[1].lstrip(".") if isinstance(out, str) else "png"
+    fmt = (fmt or "png").lower()
+    level = UTIL_IMAGE_LEVEL if level is None else max(0, min(9, int(level)))
+    if fmt == "png":
+        im.save(out, "PNG", compress_level=level)
+    elif fmt == "webp":
+        im.save(out, "WEBP", lossless=True, quality=round(level * 100 / 9), method=level * 6 // 9)
+    else:
+        im.save(out, fmt.upper() if not isinstance(out, str) else None)
+
+
+def render_util_image(arc, printer, out_path, scale=2, pick_base=None, plate=1, fmt=None, level=None):
     """Render the pick image with the utilization zones overlaid:
        objects keep their pick colors (USED), unused-but-available stays dark,
        exclusion zone -> red, calibration line -> amber, prime tower -> purple.
-    Geometry comes from the 3mf (same as plate_utilization()). If pick_base is
-    given (e.g. the editor's randomized pick png) it is used as the object colour +
-    alpha base instead of the raw pick_1.png, so the overlay matches what the user
-    already sees on screen. Returns True on success."""
-    from PIL import ImageDraw
-    cfg = _read(zf, "Metadata/project_settings.config")
-    pjb = _read(zf, "Metadata/plate_1.json")
-    pkb = _read(zf, "Metadata/pick_1.png")
-    if not (cfg and pjb):
+    Geometry comes from the 3mf (plate_geometry(), shared with plate_utilization()).
+    If pick_base is given (e.g. the editor's randomized pick png) it is used as the
+    object colour + alpha base instead of the raw pick_1.png, so the overlay matches
+    what the user already sees on screen. plate: which plate of a multi-plate project.
+    fmt / level: see save_image(). Returns True on success."""
+    from PIL import Image, ImageDraw
+    if not (arc.config and arc.plate_json(plate) is not None):
         return False
     if pick_base and os.path.exists(pick_base):
         pick = Image.open(pick_base).convert("RGBA")
-    elif pkb:
-        pick = Image.open(io.BytesIO(pkb)).convert("RGBA")
+    elif arc.info("Metadata/pick_%d.png" % plate):
+        pick = arc.pick(plate)
     else:
         return False
-    cfg = cfg.decode("utf-8", "replace"); pj = json.loads(pjb)
-    pa = _poly(cfg, "printable_area") or [(0, 0), (256, 0), (256, 256), (0, 256)]
-    bx0, by0, bx1, by1 = _bbox(pa)
+    (bx0, by0, bx1, by1), excl, calib, _, tower = plate_geometry(arc, printer, plate)
     bed_w, bed_h = bx1 - bx0, by1 - by0
-    excl = _bbox(_poly(cfg, "bed_exclude_area")) if _poly(cfg, "bed_exclude_area") else None
-    calib = CALIBRATION_LINES.get((printer or "").upper())
-    if calib is None:
-        excl_right = excl[2] if excl else 18.0
-        calib = (excl_right, 0.0, max(excl_right + 10.0, bed_w - 10.0), 14.0)
-    tower = None
-    for o in pj.get("bbox_objects", []):
-        if re.search("wipe|prime", str(o.get("name", "")), re.I):
-            tower = tuple(float(v) for v in o["bbox"]); break
 
     W, Hh = pick.size
     mmppx, mmppy = bed_w / W, bed_h / Hh
@@ -307,8 +624,7 @@ def render_util_image(zf, printer, out_path, scale=2, pick_base=None):
         return (px0, py_top, px1, py_bot)
 
     base = Image.new("RGBA", (W, Hh), (20, 21, 27, 255))           # dark bed (unused-available stays dark)
-    obj_mask = pick.getchannel("A").point(lambda a: 255 if a > ALPHA_THRESHOLD else 0)
-    base.paste(pick, (0, 0), obj_mask)                            # USED = objects in their pick colors
+    base.paste(pick, (0, 0), pick.getchannel("A").point(_ALPHA_MASK))   # USED = objects in their pick colors
 
     ov = Image.new("RGBA", (W, Hh), (0, 0, 0, 0))                 # translucent zone tints on top
     d = ImageDraw.Draw(ov)
@@ -319,31 +635,217 @@ def render_util_image(zf, printer, out_path, scale=2, pick_base=None):
 
     if scale and scale != 1:
         base = base.resize((W * scale, Hh * scale), Image.NEAREST)
-    base.convert("RGB").save(out_path)
+    save_image(base.convert("RGB"), out_path, fmt, level)
     return True
 
 
-def gcode_header(zf):
+def gcode_header(arc, plate=1):
     """Print height + layer count (top ~60 lines of the gcode - instant)."""
+    return next(gcode_stream(arc, want_body=False, plate=plate))[1]
+
+
+HEADER_CHUNK = 16 << 10              # inflate this much at a time until the header is over
+PREFETCH_BLOCK = 1 << 20             # the body pass's reader thread inflates this much per block ...
+PREFETCH_DEPTH = 8                   # ... keeping at most this many queued (0 = inflate inline)
+
+
+class _Prefetch(io.RawIOBase):
+    """Read-ahead over a zip member stream: a background thread inflates it
+    PREFETCH_BLOCK at a time into a bounded queue (zlib releases the GIL, so inflate
+    overlaps the parser), and read() hands the blocks out. At most PREFETCH_DEPTH
+    blocks are in flight. The thread holds after the first block (the header) until
+    the parser asks for the second, so read-ahead isn't billed to the header stage.
+    inflate_s / wait_s: seconds the thread spent inflating and the parser spent
+    waiting for it - the difference ran in parallel."""
+
+    def __init__(self, fh, block=None, depth=None):
+        super().__init__()
+        self._fh = fh
+        self._q = queue.Queue(depth or PREFETCH_DEPTH)
+        self._buf = b""; self._pos = 0; self._eof = False
+        self._stop = threading.Event(); self._go = threading.Event()
+        self.inflate_s = self.wait_s = 0.0
+        self._t = threading.Thread(target=self._fill, args=(block or PREFETCH_BLOCK,), daemon=True)
+        self._t.start()
+
+    def _fill(self, block):
+        try:
+            while not self._stop.is_set():
+                t = time.perf_counter()
+                b = self._fh.read(block)
+                self.inflate_s += time.perf_counter() - t
+                self._put(b)
+                if not b: return
+                self._go.wait()
+        except BaseException as e:               # re-raised in the parser's thread
+            self._put(e)
+
+    def _put(self, item):
+        while not self._stop.is_set():
+            try:
+                self._q.put(item, timeout=0.1); return
+            except queue.Full:
+                pass
+
+    def _next(self):
+        if self._buf: self._go.set()                # past the first block
+        t = time.perf_counter()
+        item = self._q.get()
+        self.wait_s += time.perf_counter() - t
+        if isinstance(item, BaseException): raise item
+        if not item: self._eof = True
+        return item
+
+    def readable(self):
+        return True
+
+    def read(self, n=-1):
+        """Up to n bytes (all that is left for n < 0) - short only at the end of the stream."""
+        parts, got = [], 0
+        while (n < 0 or got < n) and not self._eof:
+            buf, pos = self._buf, self._pos
+            if pos >= len(buf):
+                self._buf, self._pos = self._next(), 0
+                continue
+            end = len(buf) if n < 0 else min(len(buf), pos + n - got)
+            parts.append(buf if pos == 0 and end == len(buf) else buf[pos:end])
+            got += end - pos; self._pos = end
+        return parts[0] if len(parts) == 1 else b"".join(parts)
+
+    def readinto(self, b):
+        data = self.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+    def close(self):
+        if not self.closed:
+            self._stop.set(); self._go.set()
+            while self._t.is_alive():                # unblock a thread stuck on a full queue
+                try: self._q.get_nowait()
+                except queue.Empty: pass
+                self._t.join(0.05)
+            self._fh.close()
+        super().close()
+
+
+def _read_header(lines):
+    """Header values from the first gcode lines; stops at HEADER_BLOCK_END (or line 61),
+    leaving the rest of `lines` unread."""
     out = {}
-    gh = _open(zf, "Metadata/plate_1.gcode")
-    if not gh: return out
-    sr = io.TextIOWrapper(gh, encoding="utf-8", errors="replace")
-    for i, line in enumerate(sr):
+    for i, line in enumerate(lines):
         if "HEADER_BLOCK_END" in line or i > 60: break
         m = re.search(r"max_z_height:\s*([0-9.]+)", line)
         if m: out["print_height_mm"] = float(m.group(1))
         m = re.search(r"total layer number:\s*([0-9]+)", line)
         if m: out["total_layers"] = int(m.group(1))
-    sr.detach()
     if out.get("print_height_mm") and out.get("total_layers"):
         out["effective_layer_height_mm"] = round(out["print_height_mm"] / out["total_layers"], 3)
     return out
 
 
-def variable_layer_height(zf):
+def _raw_lines(gh, raw):
+    """Lines of the raw gcode stream, inflated HEADER_CHUNK at a time; every byte read
+    is kept in `raw` so a bytes consumer can pick up the stream where this left off."""
+    buf = b""
+    while True:
+        chunk = gh.read(HEADER_CHUNK)
+        if not chunk: break
+        raw += chunk
+        lines = (buf + chunk).split(b"\n")
+        buf = lines.pop()
+        for ln in lines:
+            yield ln.decode("utf-8", "replace")
+    if buf:
+        yield buf.decode("utf-8", "replace")
+
+
+def _kept(lines, seen):
+    """Pass lines through, remembering them (the header lines the body pass still needs)."""
+    for line in lines:
+        seen.append(line)
+        yield line
+
+
+def gcode_stream(arc, want_body=True, engine="python", series=False, plate=1, estimate=None, objects=False):
+    """ONE streaming pass over plate_N.gcode. Yields ("header", {...}) as soon as the
+    header block has been read - without want_body it stops inflating right there -
+    then ("body", {...}) from the same stream (the header lines are fed to the body
+    pass too, so it sees exactly the whole file). series=True (numpy engine only)
+    adds ("series", {name: per-layer array}) at the end, objects=True (numpy engine
+    only) ("objects", {column: per-object array}). With want_body the member is
+    inflated on a reader thread (_Prefetch) and ("pipeline", {inflate_ms, wait_ms})
+    comes last. estimate=K: the body is estimated from K sampled layers (_body_estimate,
+    whatever the engine). With INDEX_BODY_PASS (--layer-index) a body pass also leaves
+    the plate's layer index in the cache."""
+    gh = arc.open("Metadata/plate_%d.gcode" % plate)
+    if not gh:
+        yield "header", {}
+        if want_body: yield "body", {"gcode_body_error": "no plate_%d.gcode" % plate}
+        return
+    if want_body and INDEX_BODY_PASS and LAYER_INDEX and getattr(arc, "path", None):
+        key = _layer_index_key(arc, plate)
+        if not os.path.isfile(os.path.join(CACHE_DIR, key)):     # the layer index, on the inflate side
+            gh = _Indexing(gh, lambda scan: cache_put(key, _layer_index_blob(scan)))
+    if want_body and PREFETCH_DEPTH > 0:
+        gh = _Prefetch(gh)
+    try:
+        yield from _gcode_stream(gh, want_body, engine, series, estimate, objects)
+        if isinstance(gh, _Prefetch):
+            yield "pipeline", {"inflate_ms": round(gh.inflate_s * 1e3, 2), "wait_ms": round(gh.wait_s * 1e3, 2)}
+    finally:
+        gh.close()
+
+
+def _gcode_stream(gh, want_body, engine, series, estimate=None, objects=False):
+    """gcode_stream() over an open member stream, per engine."""
+    if estimate and not (series or objects):
+        raw = bytearray()
+        hdr = _read_header(_raw_lines(gh, raw))
+        yield "header", hdr
+        if not want_body: return
+        chunks = itertools.chain((bytes(raw),), iter(lambda: gh.read(BYTES_CHUNK), b""))
+        n = hdr.get("total_layers")
+        if n and estimate < n:
+            yield "body", _body_estimate(chunks, n, estimate)
+        else:                                    # no more layers than K (or no count): parse them all
+            body = _body_chunks(chunks)
+            body["estimate"] = {"k": estimate, "layers": body["layers_gcode"],
+                                "sampled_layers": body["layers_gcode"], "parsed_pct": 100.0, "ci95": {}}
+            yield "body", body
+        return
+    if engine == "numpy":
+        raw = bytearray()
+        yield "header", _read_header(_raw_lines(gh, raw))
+        if not want_body: return
+        nb = _NumpyBody(series=series, objects=objects)
+        nb.feed(bytes(raw))
+        while True:
+            block = gh.read(NUMPY_BLOCK_BYTES)
+            if not block: break
+            nb.feed(block)
+        yield "body", nb.result()
+        if series: yield "series", nb.series_arrays()
+        if objects: yield "objects", nb.object_table()
+        return
+    if series or objects:
+        raise ValueError("the per-layer series / per-object table need the numpy engine")
+    if engine == "bytes":
+        raw = bytearray()
+        yield "header", _read_header(_raw_lines(gh, raw))
+        if want_body:
+            yield "body", _body_chunks(itertools.chain((bytes(raw),), iter(lambda: gh.read(BYTES_CHUNK), b"")))
+        return
+    sr = io.TextIOWrapper(gh, encoding="utf-8", errors="replace")
+    seen = []
+    yield "header", _read_header(_kept(sr, seen))
+    if want_body:
+        yield "body", _body_lines(itertools.chain(seen, sr))
+    sr.detach()
+
+
+def variable_layer_height(arc):
     out = {}
-    lhp = _read(zf, "Metadata/layer_heights_profile.txt")
+    lhp = arc.read("Metadata/layer_heights_profile.txt")
     if not lhp: return out
     nums = [float(x) for x in re.findall(r"[-+]?\d*\.?\d+(?:[eE][-+]?\d+)?", lhp.decode("utf-8", "replace"))]
     heights = [v for v in nums if 0.04 < v < 0.6]
@@ -356,11 +858,16 @@ def variable_layer_height(zf):
     return out
 
 
-def gcode_body(zf):
-    """Single streaming pass over plate_1.gcode for the motion/feature metrics."""
-    gh = _open(zf, "Metadata/plate_1.gcode")
-    if not gh: return {"gcode_body_error": "no plate_1.gcode"}
-    sr = io.TextIOWrapper(gh, encoding="utf-8", errors="replace")
+def gcode_body(arc, engine="python", plate=1):
+    """Single streaming pass over plate_N.gcode for the motion/feature metrics.
+    engine="numpy" runs the same pass vectorized (see _NumpyBody), engine="bytes"
+    over raw bytes chunks (see _body_chunks); same keys."""
+    for kind, out in gcode_stream(arc, True, engine, plate=plate):
+        if kind == "body": return out
+
+
+def _body_lines(lines):
+    """The python engine's line loop (see gcode_body)."""
     feature = "other"; feat_fil = {}
     extrude_dist = travel_dist = 0.0
     travel_moves = retractions = zhops = outer_loops = toolchanges = layers = 0
@@ -369,7 +876,7 @@ def gcode_body(zf):
     obj_fil = {}; cur_obj = None
     layer_R = []; last_R = None; in_cfg = False
 
-    for s in sr:
+    for s in lines:
         c = s[0] if s else ""
         if c == ";":
             if s.startswith("; FEATURE:"):
@@ -429,8 +936,13 @@ def gcode_body(zf):
                     if zup: zhops += 1
                 if de < -1e-9:
                     retractions += 1
-    sr.detach()
+    return _body_result(extrude_dist, travel_dist, travel_moves, retractions, zhops, layers,
+                        feat_fil, outer_loops, toolchanges, layer_R, obj_fil)
 
+
+def _body_result(extrude_dist, travel_dist, travel_moves, retractions, zhops, layers,
+                 feat_fil, outer_loops, toolchanges, layer_R, obj_fil):
+    """The gcode-body result dict - shared by every engine so the keys never drift."""
     total = sum(feat_fil.values()) or 1.0
     res = {
         "travel_distance_mm": round(travel_dist, 1),
@@ -439,6 +951,7 @@ def gcode_body(zf):
         "retractions": retractions,
         "z_hops": zhops,
         "layers_gcode": layers,
+        "_extrude_distance_mm": round(extrude_dist, 1),    # aggregate_plates' travel ratio only; not output
         # --- harvested but not shown in the readout (for later use) ---
         "total_extruded_filament_mm": round(sum(feat_fil.values()), 1),
         "feature_mix_pct": {k: round(v / total * 100, 1) for k, v in sorted(feat_fil.items(), key=lambda kv: -kv[1])},
@@ -463,25 +976,1378 @@ def gcode_body(zf):
         res["object_filament_mm_max"] = round(max(v), 1)
     return res
 
+# -----------------------------------------------------------------------------
+#  --util-source mesh : the object area from the model meshes (no pick image)
+# -----------------------------------------------------------------------------
+# The pick image is a 512 px render, so its area is only as good as that raster and
+# there is nothing without it. The mesh path reads 3D/3dmodel.model (and the
+# 3D/Objects/*.model parts it points at), places every printable instance with its
+# build-item / component transforms, and rasterizes the triangles' XY projection at
+# MESH_RES_MM - the union of the projections is the footprint. Modifier / negative /
+# support-blocker parts (model_settings.config) are no footprint; the exclusion,
+# calibration and prime-tower zones come off exactly as on the pick path.
+UTIL_SOURCE = "auto"                 # object area from: pick | mesh | auto (pick; the mesh when there is no pick)
+MESH_RES_MM = 0.25                   # footprint raster cell, mm (--mesh-res)
+MESH_BATCH_CELLS = 1 << 22           # candidate cells edge-tested per vectorized fill batch
+MESH_MODEL = "3D/3dmodel.model"
+_VERTEX_RE = re.compile(rb'<vertex\s+x="([^"]*)"\s+y="([^"]*)"\s+z="([^"]*)"\s*/>')
+_TRIANGLE_RE = re.compile(rb'<triangle\s+v1="(\d+)"\s+v2="(\d+)"\s+v3="(\d+)"[^>]*/>')
+_NOT_FOOTPRINT = ("modifier_part", "negative_part", "support_blocker", "support_enforcer")
+
+
+def _transform(np, text):
+    """A 3MF transform ("m00 m01 m02 m10 ... m32") as a 4x3 row-vector matrix:
+    p' = [x y z 1] @ M. Identity when absent."""
+    if not text:
+        return np.vstack([np.eye(3), np.zeros(3)])
+    return np.array(text.split(), dtype=np.float64).reshape(4, 3)
+
+
+def _then(np, a, b):
+    """Transform a, then b."""
+    return np.vstack([a[:3] @ b[:3], a[3] @ b[:3] + b[3]])
+
+
+def _closed(np, T):
+    """Is T a closed, consistently wound surface - every directed edge once, and its
+    reverse once too? The faces of one that project wound one way then already cover
+    its whole footprint (the other way is the far side of the same ground)."""
+    e = T[:, (0, 1, 1, 2, 2, 0)].reshape(-1, 2)
+    n = int(T.max()) + 1 if len(T) else 0
+    fwd, rev = np.sort(e[:, 0] * n + e[:, 1]), np.sort(e[:, 1] * n + e[:, 0])
+    return bool(len(e)) and bool((fwd[1:] != fwd[:-1]).all()) and np.array_equal(fwd, rev)
+
+
+def _model_part(arc, name):
+    """One .model member -> ({object id: (name, (V, T, closed) or None, [(member, object id, M)])},
+    [(object id, M, printable)] build items). Memoized per archive.
+    The document structure goes through an XMLPullParser, but each <mesh> body is cut out
+    and read with two regexes straight into NumPy arrays (V (n,3) float, T (m,3) int) -
+    expat alone needs ~2 us per <vertex> / <triangle>, so a per-element parse of a
+    100-object plate takes seconds. The parser sees an empty <mesh/> in its place. A mesh
+    written some other way (attribute order, prefixes) is left to the parser."""
+    def make():
+        import numpy as np
+        from xml.etree import ElementTree
+        with arc.open(name) as fh:
+            data = fh.read()
+        pieces, meshes, pos = [], [], 0
+        while True:
+            i = data.find(b"<mesh", pos)
+            j = data.find(b"</mesh>", i) if i >= 0 else -1
+            if j < 0: break
+            body = data[i:j]
+            v, t = _VERTEX_RE.findall(body), _TRIANGLE_RE.findall(body)
+            if len(v) == body.count(b"<vertex") and len(t) == body.count(b"<triangle") - body.count(b"<triangles"):
+                pieces += (data[pos:i], b"<mesh/>")
+                T = np.array(t, dtype=np.int64).reshape(-1, 3)
+                meshes.append((np.array(v, dtype=np.float64).reshape(-1, 3), T, _closed(np, T)))
+            else:                                                  # the parser reads this one
+                pieces.append(data[pos:j + len(b"</mesh>")])
+            pos = j + len(b"</mesh>")
+        pieces.append(data[pos:]); del data
+        fast = iter(meshes)
+        parser = ElementTree.XMLPullParser(("end",))
+        objects, items, vs, ts, comps, mesh = {}, [], [], [], [], None
+        for piece in pieces:
+            parser.feed(piece)
+            for _, el in parser.read_events():
+                tag, a = el.tag.rpartition("}")[2], el.attrib
+                if tag == "vertex": vs += (a["x"], a["y"], a["z"])
+                elif tag == "triangle": ts += (a["v1"], a["v2"], a["v3"])
+                elif tag in ("vertices", "triangles"): el.clear()
+                elif tag == "mesh":
+                    if len(el) == 0: mesh = next(fast)
+                    else:
+                        T = np.array(ts, dtype=np.int64).reshape(-1, 3)
+                        mesh = (np.array(vs, dtype=np.float64).reshape(-1, 3), T, _closed(np, T))
+                        vs, ts = [], []
+                    el.clear()
+                elif tag == "component":
+                    path = next((v for k, v in a.items() if k.rpartition("}")[2] == "path"), None)
+                    comps.append((path.lstrip("/") if path else name, a["objectid"], _transform(np, a.get("transform"))))
+                elif tag == "object":
+                    objects[a["id"]] = (a.get("name"), mesh, comps)
+                    comps, mesh = [], None
+                    el.clear()
+                elif tag == "item":
+                    items.append((a["objectid"], _transform(np, a.get("transform")), a.get("printable", "1") != "0"))
+        parser.close()
+        return objects, items
+    return arc._lazy(("model", name.lower()), make)
+
+
+def _model_settings(arc, plate):
+    """From Metadata/model_settings.config: ({object id: name}, {object id: part ids that
+    are no footprint}, the plate's {(object id, instance index)} or None when the file or
+    the plate isn't there - every printable build item then)."""
+    b = arc.read("Metadata/model_settings.config")
+    if not b:
+        return {}, {}, None
+    from xml.etree import ElementTree
+    root = ElementTree.fromstring(b)
+    meta = lambda el, key: next((m.get("value") for m in el.findall("metadata") if m.get("key") == key), None)
+    names, skip, instances = {}, {}, None
+    for o in root.findall("object"):
+        names[o.get("id")] = meta(o, "name")
+        skip[o.get("id")] = {pt.get("id") for pt in o.findall("part") if pt.get("subtype") in _NOT_FOOTPRINT}
+    for pl in root.findall("plate"):
+        if meta(pl, "plater_id") == str(plate):
+            instances = {(meta(mi, "object_id"), int(meta(mi, "instance_id") or 0)) for mi in pl.findall("model_instance")}
+    return names, skip, instances
+
+
+def _object_meshes(np, arc, member, oid, M, skip=(), depth=0):
+    """(V, T, closed, M) of every mesh under object oid of member, M the accumulated transform."""
+    objects, _ = _model_part(arc, member)
+    if oid not in objects or depth > 8:
+        return []
+    _, mesh, comps = objects[oid]
+    out = [mesh + (M,)] if mesh is not None and len(mesh[1]) else []
+    for path, cid, C in comps:
+        if cid not in skip:
+            out += _object_meshes(np, arc, path, cid, _then(np, C, M), (), depth + 1)
+    return out
+
+
+def _fill_triangles(np, grid, P, label, res):
+    """grid[j, i] = label for every cell whose centre ((i + .5) * res, (j + .5) * res) lies
+    in a triangle of P ((m, 3, 2) mm from the grid corner), later triangles winning. Each
+    triangle's bbox cells are laid out with np.repeat and tested against its three edge
+    functions at once, MESH_BATCH_CELLS cells per batch. Triangles seen edge-on have no
+    area and go, as do those too small to hold a cell centre."""
+    H, W = grid.shape
+    u = P / res - 0.5                                              # cell centres at whole u
+    a, b, c = u[:, 0], u[:, 1], u[:, 2]
+    d = (b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) - (b[:, 1] - a[:, 1]) * (c[:, 0] - a[:, 0])
+    lo = np.maximum(np.ceil(np.minimum(np.minimum(a, b), c)), 0).astype(np.int64)
+    hi = np.minimum(np.floor(np.maximum(np.maximum(a, b), c)), (W - 1, H - 1)).astype(np.int64)
+    w, h = hi[:, 0] - lo[:, 0] + 1, hi[:, 1] - lo[:, 1] + 1
+    keep = (d != 0) & (w > 0) & (h > 0)
+    u, d, lo, w, h, label = u[keep], d[keep], lo[keep], w[keep], h[keep], label[keep]
+    # edge p -> q as e(x, y) = A x + B y + C, >= 0 on the inner side once signed by d
+    p, q = u, u[:, (1, 2, 0)]
+    s = np.sign(d)[:, None]
+    A = (p[:, :, 1] - q[:, :, 1]) * s
+    B = (q[:, :, 0] - p[:, :, 0]) * s
+    C = -(A * p[:, :, 0] + B * p[:, :, 1])
+    n = w * h
+    ends = np.cumsum(n)
+    i = 0
+    while i < len(n):
+        j = max(i + 1, int(np.searchsorted(ends, (ends[i - 1] if i else 0) + MESH_BATCH_CELLS, "right")))
+        cnt = n[i:j]
+        k = np.repeat(np.arange(i, j), cnt)
+        off = np.arange(int(cnt.sum())) - np.repeat(np.cumsum(cnt) - cnt, cnt)
+        wk = w[k]
+        x = lo[k, 0] + off % wk; y = lo[k, 1] + off // wk
+        e = A[k] * x[:, None] + B[k] * y[:, None] + C[k]
+        inside = (e[:, 0] >= 0) & (e[:, 1] >= 0) & (e[:, 2] >= 0)
+        grid[y[inside], x[inside]] = label[k[inside]]
+        i = j
+
+
+def mesh_footprint(arc, plate=1, res=None):
+    """The plate's printable objects rasterized onto the bed: (label grid - rows along bed
+    y from the printable area's min corner, -1 empty, else an index into names -, names,
+    triangles, cell size mm). A multi-plate project keeps every plate in one build
+    volume, so the footprint is moved onto the bed by lining its bbox centre up with
+    that of plate_N.json's objects (brims grow both sides alike). Memoized per plate / res."""
+    res = float(res or MESH_RES_MM)
+    def make():
+        import numpy as np
+        names, skip, instances = _model_settings(arc, plate)
+        objects, items = _model_part(arc, MESH_MODEL)
+        seen, placed = {}, []
+        for oid, M, printable in items:
+            k = seen[oid] = seen.get(oid, -1) + 1                  # the k-th instance of oid
+            if not printable or (instances is not None and (oid, k) not in instances):
+                continue
+            meshes = _object_meshes(np, arc, MESH_MODEL, oid, M, skip.get(oid, ()))
+            if meshes:
+                placed.append((names.get(oid) or objects[oid][0] or "object %s" % oid, meshes))
+        (bx0, by0, bx1, by1) = _bbox(arc.poly("printable_area") or [(0, 0), (256, 0), (256, 256), (0, 256)])
+        grid = np.full((int(math.ceil((by1 - by0) / res)), int(math.ceil((bx1 - bx0) / res))), -1, dtype=np.int32)
+        tris, labels = [], []
+        for n, (_, meshes) in enumerate(placed):
+            for V, T, closed, M in meshes:
+                xy = V @ M[:3, :2] + M[3, :2]
+                P = xy[T]
+                if closed:                                         # one winding is enough (_closed())
+                    P = P[(P[:, 1, 0] - P[:, 0, 0]) * (P[:, 2, 1] - P[:, 0, 1])
+                          > (P[:, 1, 1] - P[:, 0, 1]) * (P[:, 2, 0] - P[:, 0, 0])]
+                tris.append(P); labels.append(np.full(len(P), n, dtype=np.int32))
+        if not tris:
+            return grid, [], 0, res
+        P = np.concatenate(tris); label = np.concatenate(labels)
+        ntri = sum(len(T) for _, meshes in placed for _, T, _, _ in meshes)
+        boxes = [o["bbox"] for o in (arc.plate_json(plate) or {}).get("bbox_objects", [])
+                 if not re.search("wipe|prime", str(o.get("name", "")), re.I)]
+        shift = np.array([bx0, by0])
+        if boxes:
+            want = np.array([min(b[0] for b in boxes) + max(b[2] for b in boxes),
+                             min(b[1] for b in boxes) + max(b[3] for b in boxes)]) / 2
+            shift -= want - (P.reshape(-1, 2).min(0) + P.reshape(-1, 2).max(0)) / 2
+        _fill_triangles(np, grid, P - shift, label, res)
+        return grid, [n for n, _ in placed], ntri, res
+    return arc._lazy(("footprint", plate, res), make)
+
+
+def mesh_utilization(arc, printer=None, plate=1, res=None):
+    """plate_utilization() with the object area from mesh_footprint() instead of the pick."""
+    if not (arc.config and arc.plate_json(plate) is not None and arc.info(MESH_MODEL)):
+        return {"utilization_error": "missing %s / plate_%d.json / config" % (MESH_MODEL, plate)}
+    try:
+        import numpy as np
+    except ImportError:
+        return {"utilization_error": "the mesh footprint needs NumPy (pip install numpy)"}
+    geom = plate_geometry(arc, printer, plate)
+    grid, names, ntri, res = mesh_footprint(arc, plate, res)
+    (bx0, by0, _, _), tower = geom[0], geom[4]
+    if tower:                                                      # cell centres in the tower rect
+        cx = bx0 + (np.arange(grid.shape[1]) + 0.5) * res
+        cy = by0 + (np.arange(grid.shape[0]) + 0.5) * res
+        cols = (tower[0] <= cx) & (cx <= tower[2]); rows = (tower[1] <= cy) & (cy <= tower[3])
+        grid = np.where(rows[:, None] & cols[None, :], -1, grid)
+    counts = np.bincount(grid[grid >= 0], minlength=len(names))
+    by_object = {}
+    for n in np.argsort(-counts, kind="stable"):
+        key = names[n] if names[n] not in by_object else "%s (%d)" % (names[n], n + 1)
+        by_object[key] = round(float(counts[n]) * res * res, 1)
+    out = _utilization_out(arc, printer, plate, geom, int(counts.sum()) * res * res)
+    out.update(utilization_source="mesh", mesh_resolution_mm=res, mesh_triangles=ntri,
+               object_area_by_object_mm2=by_object)
+    return out
+
+
+# -----------------------------------------------------------------------------
+#  --engine bytes : the same body pass over raw bytes chunks (no decode, no NumPy)
+# -----------------------------------------------------------------------------
+BYTES_CHUNK = 4 << 20                # decompressed bytes split into lines at a time
+_OBJ_RE = re.compile(rb"id:\s*(\S+)")
+_M73_R_RE = re.compile(rb"\bR([0-9.]+)")
+
+
+def _body_chunks(chunks, raw=False):
+    """The bytes engine: the python engine's loop over lines split out of raw gcode
+    chunks (a partial last line is carried into the next chunk), dispatching on the
+    first byte. Same results as _body_lines. raw=True returns the sums themselves
+    (_body_result's arguments, as a tuple) - the --estimate sampler adds them up."""
+    feature = "other"; feat_fil = {}
+    extrude_dist = travel_dist = 0.0
+    travel_moves = retractions = zhops = outer_loops = toolchanges = layers = 0
+    e_relative = True; lastE = 0.0
+    x = y = z = None
+    obj_fil = {}; cur_obj = None
+    layer_R = []; last_R = None; in_cfg = False
+    hypot = math.hypot
+    tail = b""
+
+    for chunk in itertools.chain(chunks, (b"\n",)):
+        lines = (tail + chunk if tail else chunk).split(b"\n")
+        tail = lines.pop()
+        for s in lines:
+            if not s: continue
+            c = s[0]
+            if c == 71:                                             # G - most lines, so first
+                if not s.startswith((b"G1 ", b"G0 ")): continue
+                nx = ny = nz = e = None
+                for tok in s.split():
+                    t0 = tok[0]
+                    try:
+                        if t0 == 88: nx = float(tok[1:])          # X
+                        elif t0 == 89: ny = float(tok[1:])        # Y
+                        elif t0 == 90: nz = float(tok[1:])        # Z
+                        elif t0 == 69: e = float(tok[1:])         # E
+                    except ValueError:
+                        pass
+                de = 0.0
+                if e is not None:
+                    if e_relative: de = e
+                    else: de = e - lastE; lastE = e
+                dxy = 0.0
+                if nx is not None or ny is not None:
+                    px_, py_ = (nx if nx is not None else x), (ny if ny is not None else y)
+                    if x is not None and y is not None:
+                        dxy = hypot(px_ - x, py_ - y)
+                    x, y = px_, py_
+                zup = (nz is not None and z is not None and nz > z + 1e-6)
+                if nz is not None: z = nz
+                if de > 1e-9:
+                    extrude_dist += dxy
+                    feat_fil[feature] = feat_fil.get(feature, 0.0) + de
+                    if cur_obj is not None:
+                        obj_fil[cur_obj] = obj_fil.get(cur_obj, 0.0) + de
+                else:
+                    if dxy > 1e-9:
+                        travel_dist += dxy; travel_moves += 1
+                        if zup: zhops += 1
+                    if de < -1e-9:
+                        retractions += 1
+            elif c == 59:                                           # ;
+                if s.startswith(b"; FEATURE:"):
+                    feature = _feature_bucket(s[10:].strip().decode("utf-8", "replace"))
+                    if feature == "outer_wall": outer_loops += 1
+                elif s.startswith(b"; CHANGE_LAYER"):
+                    layers += 1
+                    if last_R is not None: layer_R.append(last_R)
+                elif s.startswith(b"; start printing object"):
+                    m = _OBJ_RE.search(s); cur_obj = m.group(1).decode("utf-8", "replace") if m else None
+                elif s.startswith(b"; stop printing object"):
+                    cur_obj = None
+                elif s.startswith(b"; CONFIG_BLOCK_START"): in_cfg = True
+                elif s.startswith(b"; CONFIG_BLOCK_END"): in_cfg = False
+            elif c == 77:                                           # M
+                if s.startswith(b"M83"): e_relative = True
+                elif s.startswith(b"M82"): e_relative = False
+                elif s.startswith(b"M73 P"):
+                    m = _M73_R_RE.search(s)
+                    if m: last_R = float(m.group(1))
+            elif c == 84:                                           # T
+                if s[1:2].isdigit() and not in_cfg: toolchanges += 1
+    sums = (extrude_dist, travel_dist, travel_moves, retractions, zhops, layers,
+            feat_fil, outer_loops, toolchanges, layer_R, obj_fil)
+    return sums if raw else _body_result(*sums)
+
+
+# -----------------------------------------------------------------------------
+#  --estimate K : the body metrics from a stratified sample of K layers
+# -----------------------------------------------------------------------------
+# The layers ("; CHANGE_LAYER" to the next) are split into K/2 runs of consecutive
+# layers (strata) and ~2 layers drawn from each; only those are parsed. Every layer's
+# G0/G1 count is still taken (a bytes count, ~10x cheaper than parsing) and each
+# stratum's total is its sampled layers' ratio to that count times the stratum's
+# count (a separate ratio estimator), with a finite-population variance -> 95% CIs.
+# The gcode before the first layer (start gcode, config) is parsed in full.
+# The deflate stream is still inflated end to end - what is skipped is the parsing.
+ESTIMATE_MIN_K = 2
+ESTIMATE_STATE_WINDOW = 64 << 10     # bytes looked back through for a sampled layer's start state
+_LAYER_MARK = b"; CHANGE_LAYER"
+_Z95 = 1.96
+
+
+def _last_z(buf):
+    """The Z of buf's last G0/G1 that sets one (as its b"Z..." token), else None."""
+    i = len(buf)
+    while True:
+        i = buf.rfind(b" Z", 0, i)
+        if i < 0: return None
+        start = buf.rfind(b"\n", 0, i) + 1
+        if buf.startswith((b"G1 ", b"G0 "), start):
+            end = buf.find(b"\n", i)
+            tok = buf[i + 1:end if end >= 0 else len(buf)].split(None, 1)[0]
+            try:
+                float(tok[1:]); return tok
+            except ValueError:
+                pass
+
+
+def _last_line(buf, mark):
+    """buf's last line starting with mark (without the newline), else None."""
+    i = buf.rfind(b"\n" + mark)
+    if i < 0:
+        if not buf.startswith(mark): return None
+        i = -1
+    j = buf.find(b"\n", i + 1)
+    return buf[i + 1:j if j >= 0 else len(buf)]
+
+
+def _line_find(buf, mark, start=0):
+    """Index of the first line at or after start that begins with mark (buf starts a line), else -1."""
+    m = buf.find(mark, start)
+    while m > 0 and buf[m - 1] != 10:
+        m = buf.find(mark, m + 1)
+    return m
+
+
+def _start_state(buf, relative, z, feature=None, m73=None):
+    """Lines that put a fresh body pass into the state the gcode is in at the end of buf:
+    E mode, the current feature / last M73 progress line (as given) and last X / Y
+    (from buf) and Z (z - layers change it rarely, so it is tracked over the whole
+    file): a G0 with no E that has no previous position to travel from, so it adds nothing."""
+    lines = [b"M83" if relative else b"M82"] + [ln for ln in (feature, m73) if ln]
+    pos, end = {b"Z": z} if z else {}, len(buf)
+    while len(pos) < 3 and end > 0:
+        start = buf.rfind(b"\n", 0, end) + 1
+        s = buf[start:end]
+        if s.startswith((b"G1 ", b"G0 ")):
+            for tok in s.split()[1:]:
+                k = tok[:1]
+                if k in (b"X", b"Y", b"Z") and k not in pos:
+                    try:
+                        float(tok[1:]); pos[k] = tok
+                    except ValueError:
+                        pass
+        end = start - 1
+    if pos:
+        lines.append(b"G0 " + b" ".join(pos[k] for k in (b"X", b"Y", b"Z") if k in pos))
+    return b"\n".join(lines) + b"\n"
+
+
+class _LayerScan:
+    """One walk over raw gcode blocks finding every "; CHANGE_LAYER" (and with
+    objects=True every "; start printing object") line, and the state a body pass is
+    in where each layer starts (_start_state; for the layers in `states`, None = all).
+    feed() returns the block's complete lines as [(layer, bytes)] pieces - layer 0 is
+    the gcode before the first layer - and fills in offsets (each layer's marker, in
+    decompressed bytes), moves (G0/G1 lines per layer, with moves=True), states and
+    objects ([(offset, id)]). feed(b"", final=True) flushes the last line."""
+
+    def __init__(self, states=None, moves=False, objects=False):
+        self.want, self.count_moves, self.find_objects = states, moves, objects
+        self.offsets, self.moves, self.states, self.objects = [], [0], {}, []
+        self.layer = self.pos = 0
+        self.relative, self.z, self.feature, self.m73 = True, None, None, None
+        self._carry = self._tail = b""
+
+    def _track(self, seg):
+        if self.count_moves: self.moves[self.layer] += seg.count(b"\nG1 ") + seg.count(b"\nG0 ")
+        a, b = seg.rfind(b"\nM83"), seg.rfind(b"\nM82")
+        if a != b: self.relative = a > b
+        self.z = _last_z(seg) or self.z
+        self.feature = _last_line(seg, b"; FEATURE:") or self.feature
+        self.m73 = _last_line(seg, b"M73 P") or self.m73
+
+    def feed(self, block, final=False):
+        data = self._carry + block if self._carry else block
+        cut = len(data) if final else data.rfind(b"\n") + 1
+        work, self._carry = data[:cut], data[cut:]
+        base = self.pos; self.pos += len(work)
+        if self.find_objects:
+            m = _line_find(work, b"; start printing object")
+            while m >= 0:
+                j = work.find(b"\n", m)
+                hit = _OBJ_RE.search(work, m, j if j >= 0 else len(work))
+                self.objects.append((base + m, hit.group(1).decode("utf-8", "replace") if hit else None))
+                m = _line_find(work, b"; start printing object", m + 1)
+        out, p, q = [], 0, 0
+        while True:
+            m = _line_find(work, _LAYER_MARK, q)
+            seg = work[p:m if m >= 0 else len(work)]
+            self._track(seg)
+            out.append((self.layer, seg))
+            if m < 0: break
+            self.layer += 1; self.moves.append(0); self.offsets.append(base + m)
+            if self.want is None or self.layer in self.want:
+                before = work[:m] if m >= ESTIMATE_STATE_WINDOW else self._tail + work[:m]
+                self.states[self.layer] = _start_state(before[-ESTIMATE_STATE_WINDOW:], self.relative, self.z,
+                                                       self.feature, self.m73)
+            p, q = m, m + 1
+        self._tail = work[-ESTIMATE_STATE_WINDOW:] if len(work) >= ESTIMATE_STATE_WINDOW \
+            else (self._tail + work)[-ESTIMATE_STATE_WINDOW:]
+        return out
+
+
+def _sample_layers(n_layers, k):
+    """(strata as [first, last] layer numbers, the sampled layer numbers) - 1-based,
+    the same every run for the same layer count."""
+    h = max(1, min(k, n_layers) // 2)
+    strata = [[i * n_layers // h + 1, (i + 1) * n_layers // h] for i in range(h)]
+    rnd = random.Random(n_layers)
+    picked = set()
+    for i, (a, b) in enumerate(strata):
+        n = min(b - a + 1, k // h + (1 if i < k % h else 0))
+        picked.update(rnd.sample(range(a, b + 1), n))
+    return strata, picked
+
+
+def _body_estimate(chunks, n_layers, k):
+    """The bytes engine over a stratified sample of k of the header's n_layers layers
+    (see above). Same keys as _body_result for the totals and mixes it can estimate,
+    plus "estimate": {k, layers, sampled_layers, parsed_pct, ci95: {key: +-half-width}}."""
+    strata, picked = _sample_layers(n_layers, k)
+    scan = _LayerScan(picked, moves=True)
+    parsed = {}                                  # layer -> _body_chunks(raw=True) sums
+    cur = []; li = parsed_bytes = 0
+
+    def finish():
+        nonlocal parsed_bytes
+        if cur:
+            parsed_bytes += sum(len(c) for c in cur)
+            parsed[li] = _body_chunks(cur, raw=True)
+
+    for block in itertools.chain(chunks, (None,)):
+        for layer, seg in scan.feed(block or b"", final=block is None):
+            if layer != li:
+                finish()
+                li, cur = layer, ([scan.states[layer]] if layer in picked else [])
+            if li == 0 or li in picked: cur.append(seg)
+    finish()
+
+    layers, moves, nbytes = li, scan.moves, scan.pos
+    strata[-1][1] = max(strata[-1][1], layers)   # more layers than the header said go in the last stratum
+    groups = []                                  # per stratum: (N, [(moves, sums) sampled], its moves)
+    for a, b in strata:
+        b = min(b, layers)
+        if a > b: continue
+        groups.append((b - a + 1, [(moves[i], parsed[i]) for i in range(a, b + 1) if i in parsed],
+                       sum(moves[a:b + 1])))
+    pre = parsed.get(0)
+
+    def total(f):
+        """(estimated total of f(sums), its variance)."""
+        t = f(pre) if pre else 0.0
+        var = 0.0
+        for N, smp, B in groups:
+            n = len(smp)
+            if n == 0: continue
+            ys = [f(r) for _, r in smp]; xs = [x for x, _ in smp]
+            sx = sum(xs)
+            R = sum(ys) / sx if sx else 0.0
+            t += R * B if sx else sum(ys) * N / n
+            if n > 1 and n < N:
+                d = [y - R * x for y, x in zip(ys, xs)] if sx else [y - sum(ys) / n for y in ys]
+                md = sum(d) / n
+                var += N * N * (1 - n / N) * sum((v - md) ** 2 for v in d) / (n - 1) / n
+        return t, var
+
+    def ratio(fy, fx):
+        """(fy/fx of the totals, its variance) - delta method."""
+        ty, _ = total(fy); tx, _ = total(fx)
+        if not tx: return 0.0, 0.0
+        r = ty / tx
+        _, vz = total(lambda s: fy(s) - r * fx(s))
+        return r, vz / (tx * tx)
+
+    ci = lambda var: _Z95 * math.sqrt(var)
+    feats = sorted({f for r in parsed.values() for f in r[6]})
+    fil = lambda s: sum(s[6].values())
+    E, _ = total(lambda s: s[0]); T, vT = total(lambda s: s[1])
+    mv, vmv = total(lambda s: s[2]); rt, vrt = total(lambda s: s[3]); zh, vzh = total(lambda s: s[4])
+    F, vF = total(fil)
+    tr, vtr = ratio(lambda s: s[1], lambda s: s[0] + s[1])
+    ff = {f: total(lambda s, f=f: s[6].get(f, 0.0)) for f in feats}
+    mix = {f: ratio(lambda s, f=f: s[6].get(f, 0.0), fil) for f in feats}
+    order = sorted(feats, key=lambda f: -ff[f][0])
+    return {
+        "travel_distance_mm": round(T, 1),
+        "travel_moves": int(round(mv)),
+        "travel_ratio_pct": round(tr * 100, 1),
+        "retractions": int(round(rt)),
+        "z_hops": int(round(zh)),
+        "layers_gcode": layers,
+        "_extrude_distance_mm": round(E, 1),
+        "total_extruded_filament_mm": round(F, 1),
+        "feature_mix_pct": {f: round(mix[f][0] * 100, 1) for f in order},
+        "feature_filament_mm": {f: round(ff[f][0], 1) for f in feats},
+        "prime_tower_filament_mm": round(ff.get("prime_tower", (0.0,))[0], 1),
+        "support_filament_mm": round(ff.get("support", (0.0,))[0], 1),
+        "estimate": {
+            "k": k, "layers": layers, "sampled_layers": len(parsed) - (1 if pre else 0),
+            "parsed_pct": round(100.0 * parsed_bytes / nbytes, 1) if nbytes else 0.0,
+            "ci95": {
+                "travel_distance_mm": round(ci(vT), 1),
+                "travel_moves": round(ci(vmv), 1),
+                "travel_ratio_pct": round(ci(vtr) * 100, 1),
+                "retractions": round(ci(vrt), 1),
+                "z_hops": round(ci(vzh), 1),
+                "total_extruded_filament_mm": round(ci(vF), 1),
+                "feature_mix_pct": {f: round(ci(mix[f][1]) * 100, 1) for f in order},
+            },
+        },
+    }
+
+
+# -----------------------------------------------------------------------------
+#  layer index + --layers A:B : per-layer questions without a whole-file pass
+# -----------------------------------------------------------------------------
+# The index records where each "; CHANGE_LAYER" and "; start printing object" line
+# sits in the decompressed gcode and the state each layer starts in; it is kept as a
+# 'layers' entry of the result cache (keyed by the gcode's CRC like the rest). The
+# first --layers query on a plate builds it with a scan-only pass; --layer-index has
+# every body pass record it on the inflate side (_Indexing) instead, for 10-20%
+# more time per pass. --layers A:B then inflates only up to layer B and parses
+# just A..B. Resume points: Python's zlib can't restart a
+# deflate stream from a saved bit offset (no inflatePrime), so they are copies of the
+# decompressor kept on the open archive - a --serve session seeks to the nearest one.
+LAYER_INDEX = True                   # cache the index (--no-cache: built per run, not kept)
+INDEX_BODY_PASS = False              # --layer-index: also record it during every body pass
+RESUME_EVERY = 4 << 20               # an open archive keeps a resume point this many inflated bytes apart
+RANGE_BLOCK = 256 << 10              # compressed bytes inflated at a time for a layer range
+_resume_lock = threading.Lock()
+
+
+class _Indexing(io.RawIOBase):
+    """Pass-through over a gcode member stream that feeds every byte read to a
+    _LayerScan(objects=True); at the end of the stream .complete is set and
+    done(scan) called (a body pass's consumer may stop reading right after that)."""
+
+    def __init__(self, fh, done=None):
+        super().__init__()
+        self._fh = fh
+        self._done = done
+        self.scan = _LayerScan(objects=True)
+        self.complete = False
+
+    def readable(self):
+        return True
+
+    def read(self, n=-1):
+        data = self._fh.read(n)
+        if data:
+            self.scan.feed(data)
+        elif n != 0 and not self.complete:
+            self.scan.feed(b"", final=True); self.complete = True
+            if self._done: self._done(self.scan)
+        return data
+
+    def readinto(self, b):
+        data = self.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+    def close(self):
+        if not self.closed: self._fh.close()
+        super().close()
+
+
+def _layer_index_key(arc, plate):
+    return cache_key("layers", arc.path, extra=[plate], arc=arc)
+
+
+def _layer_index_blob(scan):
+    """A finished _LayerScan as the cached index: offsets delta-coded, zlib'd JSON."""
+    delta = lambda xs: [x - y for x, y in zip(xs, [0] + xs[:-1])]
+    ids = {}
+    of = [ids.setdefault(oid, len(ids)) for _, oid in scan.objects]
+    d = {"size": scan.pos, "layers": delta(scan.offsets),
+         "states": [scan.states[i].decode("utf-8", "replace") for i in range(1, len(scan.offsets) + 1)],
+         "objects": {"ids": list(ids), "at": delta([off for off, _ in scan.objects]), "of": of}}
+    return zlib.compress(json.dumps(d, separators=(",", ":")).encode("utf-8"))
+
+
+def _layer_index_load(blob):
+    d = json.loads(zlib.decompress(blob).decode("utf-8"))
+    ids = d["objects"]["ids"]
+    return {"size": d["size"], "layers": list(itertools.accumulate(d["layers"])),
+            "states": [st.encode("utf-8") for st in d["states"]],
+            "objects": list(zip(itertools.accumulate(d["objects"]["at"]), (ids[i] for i in d["objects"]["of"])))}
+
+
+def layer_index(arc, plate=1):
+    """The plate's layer index: {size, layers: [offset of each layer's marker line],
+    states: [the lines that start a body pass in its state], objects: [(offset, id)]},
+    offsets in decompressed bytes. From the cache when a body pass has left one, else
+    from a scan-only pass (inflate + find, no parsing) - cached in turn. Kept on arc."""
+    def make():
+        key = _layer_index_key(arc, plate)
+        blob = cache_get(key) if LAYER_INDEX else None
+        if blob:
+            try:
+                return _layer_index_load(blob)
+            except (ValueError, KeyError, zlib.error):
+                pass
+        gh = arc.open("Metadata/plate_%d.gcode" % plate)
+        if not gh:
+            raise ValueError("no plate_%d.gcode" % plate)
+        with _Indexing(gh) as ix:
+            while ix.read(BYTES_CHUNK): pass
+        blob = _layer_index_blob(ix.scan)
+        if LAYER_INDEX: cache_put(key, blob)
+        return _layer_index_load(blob)
+    return arc._lazy(("layer_index", plate), make)
+
+
+def _member_range(arc, name, start, end):
+    """Bytes [start, end) of a member's decompressed data -> (bytes, the offset inflating
+    began at). A deflated member is inflated from the nearest resume point at or before
+    start (its beginning the first time), leaving resume points RESUME_EVERY apart on
+    arc along the way; a stored one is just read."""
+    zi = arc.info(name)
+    if not zi:
+        raise ValueError("no %s" % name)
+    with open(arc.path, "rb") as fh:
+        fh.seek(zi.header_offset)
+        h = fh.read(30)                                            # local header, then name + extra
+        data0 = zi.header_offset + 30 + int.from_bytes(h[26:28], "little") + int.from_bytes(h[28:30], "little")
+        if zi.compress_type == zipfile.ZIP_STORED:
+            fh.seek(data0 + start)
+            return fh.read(end - start), start
+        if zi.compress_type != zipfile.ZIP_DEFLATED:
+            raise ValueError("%s: unsupported compression %d" % (name, zi.compress_type))
+        points = arc._lazy(("resume", zi.filename), list)         # [(out offset, in offset, decompressor)]
+        with _resume_lock:
+            best = [pt for pt in points if pt[0] <= start][-1:]
+            out_off, in_off, d = (best[0][0], best[0][1], best[0][2].copy()) if best else (0, 0, zlib.decompressobj(-15))
+        began, parts = out_off, []
+        fh.seek(data0 + in_off)
+        while out_off < end and in_off < zi.compress_size:
+            chunk = fh.read(min(RANGE_BLOCK, zi.compress_size - in_off))
+            if not chunk: break
+            in_off += len(chunk)
+            buf = d.decompress(chunk)
+            lo, hi = max(start - out_off, 0), min(end - out_off, len(buf))
+            if hi > lo: parts.append(buf[lo:hi])
+            out_off += len(buf)
+            with _resume_lock:
+                if out_off >= (points[-1][0] if points else 0) + RESUME_EVERY:
+                    points.append((out_off, in_off, d.copy()))
+    return b"".join(parts), began
+
+
+def layer_range(arc, plate=1, first=None, last=None):
+    """Body metrics of layers first..last (1-based, inclusive; None = open end) of one
+    plate from its layer index: the gcode is inflated up to `last` only and just that
+    range is parsed, starting from the state recorded for `first` (its M73 progress
+    included, so the layer times cover the range as the whole pass would). Same keys as the
+    body pass, plus "layer_range": {plate, first, last, layers, bytes, inflated_from, objects}."""
+    idx = layer_index(arc, plate)
+    n = len(idx["layers"])
+    a, b = max(1, first or 1), min(n, last or n)
+    if a > b:
+        raise ValueError("layers %s:%s - plate %d has %d" % (first or "", last or "", plate, n))
+    start, end = idx["layers"][a - 1], (idx["layers"][b] if b < n else idx["size"])
+    data, began = _member_range(arc, "Metadata/plate_%d.gcode" % plate, start, end)
+    if b < n:                                                      # as the pass meets layer b+1's marker:
+        sums = list(_body_chunks((idx["states"][a - 1], data, b"\n" + _LAYER_MARK + b"\n"), raw=True))
+        sums[5] -= 1                                               # it closes layer b's time, no more
+    else:
+        sums = _body_chunks((idx["states"][a - 1], data), raw=True)
+    res = _body_result(*sums)
+    del res["_extrude_distance_mm"]
+    res["layer_range"] = {"plate": plate, "first": a, "last": b, "layers": n, "bytes": [start, end],
+                          "inflated_from": began,
+                          "objects": len({oid for off, oid in idx["objects"] if start <= off < end})}
+    return res
+
+
+def parse_layer_range(text):
+    """"A:B" / "A:" / ":B" / "A" -> (first, last), None for an open end."""
+    a, sep, b = text.partition(":")
+    try:
+        first = int(a) if a.strip() else None
+        last = (int(b) if b.strip() else None) if sep else first
+    except ValueError:
+        raise ValueError("layer range %r - expected A:B" % text)
+    if (first is not None and first < 1) or (first and last and last < first):
+        raise ValueError("layer range %r - expected 1 <= A <= B" % text)
+    return first, last
+
+
+def print_layer_range(design, res):
+    r = res["layer_range"]
+    print("%s  plate %d  layers %d-%d of %d   (%d objects; inflated %.1f MB from offset %.1f MB, parsed %.1f MB)"
+          % (design, r["plate"], r["first"], r["last"], r["layers"], r["objects"],
+             (r["bytes"][1] - r["inflated_from"]) / 1048576.0, r["inflated_from"] / 1048576.0,
+             (r["bytes"][1] - r["bytes"][0]) / 1048576.0))
+    print("  Travel: %s mm / %s moves (%s%% of motion)   Retractions: %s   Z-hops: %s"
+          % (res["travel_distance_mm"], res["travel_moves"], res["travel_ratio_pct"], res["retractions"], res["z_hops"]))
+    print("  Layer time: mean %s min (max %s)   Extruded: %s mm   Tool changes: %s"
+          % (res.get("layer_time_min_mean", "-"), res.get("layer_time_min_max", "-"),
+             res["total_extruded_filament_mm"], res["tool_changes_gcode"]))
+    print("  Feature mix: %s" % ", ".join("%s %s%%" % kv for kv in res["feature_mix_pct"].items()))
+
+
+# -----------------------------------------------------------------------------
+#  --engine numpy : the same body pass, vectorized per block of lines
+# -----------------------------------------------------------------------------
+NUMPY_BLOCK_BYTES = 8 << 20          # decompressed bytes per vectorized block
+_WS = (32, 9, 10, 11, 12, 13)        # bytes str.split() treats as whitespace here
+NUMPY_WORD_BYTES = 24                # longer words are left to float() one by one
+
+
+def _np_numbers(np, buf, a, st, en):
+    """Parse the words buf[st:en] in bulk -> (values, ok). The words are gathered into
+    one fixed-width bytes array and cast to float64 - NumPy's cast goes through
+    float()'s own parser, so the values are float()'s. Empty or over-long words, and
+    the ones float() rejects, come back ok=False."""
+    L = en - st
+    val, ok = np.zeros(st.size), (L >= 1) & (L <= NUMPY_WORD_BYTES)
+    if not ok.any():
+        return val, ok
+    k = np.flatnonzero(ok)
+    w = int(L[k].max())
+    cols = np.arange(w)
+    idx = np.minimum(st[k, None] + cols, a.size - 1)
+    words = np.where(cols < L[k, None], a[idx], 0).astype(np.uint8).view("S%d" % w).ravel()
+    try:
+        val[k] = words.astype(np.float64)
+    except ValueError:                                          # a word float() rejects: one by one
+        for i, wd in zip(k.tolist(), words.tolist()):
+            try: val[i] = float(wd)
+            except ValueError: ok[i] = False
+    return val, ok
+
+
+def _np_move_words(np, buf, a, nl, is_move, seps, letters=b"XYZE"):
+    """-> {letter: (line index, value)} - the LAST valid X/Y/Z/E (+ F if in letters)
+    word on each move line, as gcode_body's `for tok in s.split()` loop would leave it. A word is an
+    axis letter right after a separator; it runs to the next word or the line end.
+    Words the bulk parser declines are settled by float() on the real token."""
+    n = a.size
+    sp = np.flatnonzero(a[:-1] == 32) if seps is None else np.flatnonzero(np.isin(a[:-1], seps))
+    let = a[sp + 1]
+    k = (let == 88) | (let == 89) | (let == 90) | (let == 69) | (let == 70)   # F only bounds the others
+    pos = sp[k] + 1; let = let[k]
+    li = np.searchsorted(nl, pos)
+    k = is_move[li]
+    pos, li, let = pos[k], li[k], let[k]
+    if not pos.size:
+        return {c: (li, np.empty(0)) for c in letters}
+    en = np.empty_like(pos)
+    en[:-1] = pos[1:] - 1
+    last = np.ones(pos.size, bool); last[:-1] = li[1:] != li[:-1]
+    en[last] = nl[li[last]]
+    if seps is not None:
+        en -= np.isin(a[en - 1], seps)                           # \r / tab before the next word
+    st = pos + 1
+    val, ok = _np_numbers(np, buf, a, st, en)
+    for k in np.flatnonzero(~ok).tolist():                      # the rare word only float() can judge
+        p = int(st[k]); e = p
+        while e < n and a[e] not in _WS: e += 1
+        try:
+            val[k] = float(buf[p:e].decode("utf-8", "replace")); ok[k] = True
+        except ValueError:
+            pass
+    out = {}
+    for c in letters:
+        sel = ok & (let == c)
+        cl, cv = li[sel], val[sel]
+        keep = np.ones(cl.size, bool); keep[:-1] = cl[1:] != cl[:-1]
+        out[c] = (cl[keep], cv[keep])
+    return out
+
+
+def _np_ffill(np, v, init):
+    """Forward-fill NaNs in v, seeding with init (the value carried in from the last block)."""
+    idx = np.where(np.isnan(v), -1, np.arange(v.size))
+    np.maximum.accumulate(idx, out=idx)
+    return np.where(idx >= 0, v[np.maximum(idx, 0)], init)
+
+
+class _NumpyBody:
+    """Vectorized twin of gcode_body's line loop. feed() takes raw decompressed
+    blocks; each run of complete lines is scanned on its own (_scan: lines
+    classified by their first bytes, G0/G1 X/Y/Z/E words parsed into columns)
+    and then applied in order (_apply), carrying position, E mode, feature and
+    object state across blocks. Block size never changes the answer. series=True
+    also keeps per-layer arrays (series_arrays()), objects=True a per-object table
+    (object_table())."""
+
+    _BUCKETS = ("outer_wall", "inner_wall", "overhang", "bridge", "prime_tower", "support", "infill", "other")
+
+    OBJECT_COLUMNS = ("filament_mm", "extrude_mm", "travel_in_mm", "travel_mm", "travel_out_mm",
+                      "retractions", "time_s", "first_layer", "last_layer", "visits")
+
+    def __init__(self, series=False, objects=False):
+        import numpy as np
+        self.np = np
+        self.tail = b""
+        self.x = self.y = self.z = np.nan; self.lastE = 0.0
+        self.e_relative = True; self.feature = self._BUCKETS.index("other")
+        self.cur_obj = -1; self.in_cfg = False; self.last_R = None
+        self.extrude_dist = self.travel_dist = 0.0
+        self.travel_moves = self.retractions = self.zhops = 0
+        self.outer_loops = self.toolchanges = self.layers = 0
+        self.layer_R = []
+        self.feat_fil = {}                       # bucket -> mm, in first-extrusion order
+        self.obj_ids = {}; self.obj_names = []
+        self.obj_fil = np.zeros(0); self.obj_seen = np.zeros(0, bool)
+        self._line_cache = {}
+        self.series = {} if series else None     # per-layer accumulators, grown as layers appear
+        self.objects = objects
+        self.visit = 0; self.f = np.nan          # label interval counter, modal feed rate
+        self.otab = {}                           # OBJECT_COLUMNS -> array by object, grown with obj_names
+        self._open = None                        # the visit moves were last seen in: [visit, object, extruded, tail travel]
+
+    def feed(self, block):
+        data = self.tail + block if self.tail else block
+        cut = data.rfind(b"\n") + 1
+        self.tail = data[cut:]
+        if cut:
+            self._apply(self._scan(data[:cut] if cut < len(data) else data))
+
+    def result(self):
+        if self.tail:
+            self._apply(self._scan(self.tail + b"\n")); self.tail = b""
+        if self.objects: self._close_visit()
+        obj_fil = {self.obj_names[i]: v for i, v in enumerate(self.obj_fil.tolist()) if self.obj_seen[i]}
+        return _body_result(self.extrude_dist, self.travel_dist, self.travel_moves, self.retractions,
+                            self.zhops, self.layers, self.feat_fil, self.outer_loops, self.toolchanges,
+                            self.layer_R, obj_fil)
+
+    def _classify(self, s):
+        """A state line -> (kind, value); cached per distinct line, most repeat."""
+        if s.startswith(b"; FEATURE:"):
+            return ("feat", self._BUCKETS.index(_feature_bucket(s[10:].decode("utf-8", "replace").strip())))
+        if s.startswith(b"; CHANGE_LAYER"):        return ("layer", None)
+        if s.startswith(b"; Z_HEIGHT:"):
+            try: return ("zh", float(s[11:]))
+            except ValueError: return (None, None)
+        if s.startswith(b"; start printing object"):
+            m = re.search(rb"id:\s*(\S+)", s)
+            return ("obj", m.group(1).decode("utf-8", "replace") if m else None)
+        if s.startswith(b"; stop printing object"): return ("obj", None)
+        if s.startswith(b"; CONFIG_BLOCK_START"):  return ("cfg", True)
+        if s.startswith(b"; CONFIG_BLOCK_END"):    return ("cfg", False)
+        if s.startswith(b"M83"):                   return ("erel", 1)
+        if s.startswith(b"M82"):                   return ("erel", 0)
+        if s.startswith(b"M73 P"):
+            m = re.search(rb"\bR([0-9.]+)", s)
+            return ("R", float(m.group(1))) if m else (None, None)
+        if s[:1] == b"T":                          return ("T", None)
+        return (None, None)
+
+    def _scan(self, buf):
+        """One run of complete lines -> (state events in order, move starts, X, Y, Z, E).
+        Touches no running state; _apply folds it in."""
+        np = self.np
+        a = np.frombuffer(buf, np.uint8)
+        n = a.size
+        nl = np.flatnonzero(a == 10)
+        starts = np.empty(nl.size, np.int64); starts[0] = 0; starts[1:] = nl[:-1] + 1
+        ln = nl - starts
+        b0 = a[starts]; b1 = a[np.minimum(starts + 1, n - 1)]; b2 = a[np.minimum(starts + 2, n - 1)]
+        is_move = (b0 == 71) & ((b1 == 48) | (b1 == 49)) & (b2 == 32) & (ln >= 3)
+        cand = (((b0 == 59) & (b1 == 32) & ((b2 == 70) | (b2 == 67) | (b2 == 115) | (b2 == 90)))  # "; F" "; C" "; s" "; Z"
+                | ((b0 == 77) & (((b1 == 56) & ((b2 == 50) | (b2 == 51))) | ((b1 == 55) & (b2 == 51))))
+                | ((b0 == 84) & (b1 >= 48) & (b1 <= 57) & (ln >= 2)))
+        events = []
+        cache = self._line_cache
+        ci = np.flatnonzero(cand)
+        for st, en in zip(starts[ci].tolist(), nl[ci].tolist()):
+            s = buf[st:en]
+            kv = cache.get(s)
+            if kv is None:
+                kv = self._classify(s)
+                if kv[0] != "R": cache[s] = kv
+            if kv[0]:
+                events.append((st, kv[0], kv[1]))
+        mi = np.flatnonzero(is_move)
+        if not mi.size:
+            return events, None
+        seps = None
+        if any(ch in buf for ch in (b"\t", b"\r", b"\x0b", b"\x0c")):
+            seps = np.array(_WS[:2] + _WS[3:], np.uint8)              # every separator but \n
+        move_of_line = np.cumsum(is_move) - 1
+        cols = []
+        for letter, (li, val) in _np_move_words(np, buf, a, nl, is_move, seps,
+                                                b"XYZEF" if self.objects else b"XYZE").items():
+            v = np.full(mi.size, np.nan)
+            v[move_of_line[li]] = val
+            cols.append(v)
+        return events, (starts[mi],) + tuple(cols)
+
+    def _apply(self, scanned):
+        events, moves = scanned
+        ev = {"feat": ([], []), "obj": ([], []), "erel": ([], []), "layer": ([], []), "visit": ([], [])}
+        self._layer0 = self.layers
+        S = self.series
+        for st, kind, v in events:
+            if kind == "feat":
+                if v == 0: self.outer_loops += 1
+                ev["feat"][0].append(st); ev["feat"][1].append(v)
+            elif kind == "obj":
+                o = -1
+                if v is not None:
+                    o = self.obj_ids.get(v)
+                    if o is None:
+                        o = self.obj_ids[v] = len(self.obj_names); self.obj_names.append(v)
+                ev["obj"][0].append(st); ev["obj"][1].append(o)
+                ev["visit"][0].append(st); ev["visit"][1].append(self.visit + len(ev["visit"][0]))
+                if self.objects and o >= 0:
+                    self._otab_grow(); self.otab["visits"][o] += 1
+            elif kind == "layer":
+                self.layers += 1
+                if self.last_R is not None: self.layer_R.append(self.last_R)
+                ev["layer"][0].append(st); ev["layer"][1].append(self.layers)
+                if S is not None:
+                    self._series_grow(self.layers + 1)
+                    if self.last_R is not None: S["m73_remaining_min"][self.layers] = self.last_R
+            elif kind == "R": self.last_R = v
+            elif kind == "erel":
+                ev["erel"][0].append(st); ev["erel"][1].append(v)
+            elif kind == "cfg": self.in_cfg = v
+            elif kind == "T" and not self.in_cfg:
+                self.toolchanges += 1
+                if S is not None:
+                    self._series_grow(self.layers + 1); S["tool_changes"][self.layers] += 1
+            elif kind == "zh" and S is not None:
+                self._series_grow(self.layers + 1); S["z_mm"][self.layers] = v
+        if moves is not None:
+            self._moves(*moves[:5], ev, F=moves[5] if len(moves) > 5 else None)
+        if ev["feat"][1]: self.feature = ev["feat"][1][-1]
+        if ev["obj"][1]: self.cur_obj = ev["obj"][1][-1]
+        if ev["visit"][1]: self.visit = ev["visit"][1][-1]
+        if ev["erel"][1]: self.e_relative = bool(ev["erel"][1][-1])
+
+    def _moves(self, ms, X, Y, Z, E, ev, F=None):
+        np = self.np
+        nm = ms.size
+
+        def state(key, init):
+            p, v = ev[key]
+            if not p: return np.full(nm, init, np.int64)
+            k = np.searchsorted(np.asarray(p, np.int64), ms, "right") - 1
+            return np.where(k >= 0, np.asarray(v, np.int64)[np.maximum(k, 0)], init)
+
+        # E: relative -> the word itself; absolute -> delta from the last absolute E
+        hasE = ~np.isnan(E)
+        rel = state("erel", int(self.e_relative)).astype(bool)
+        de = np.where(hasE & rel, E, 0.0)
+        ab = np.flatnonzero(hasE & ~rel)
+        if ab.size:
+            ea = E[ab]
+            de[ab] = ea - np.concatenate(([self.lastE], ea[:-1]))
+            self.lastE = float(ea[-1])
+
+        # XY: positions forward-fill; a distance only once both were known before
+        has_xy = ~np.isnan(X) | ~np.isnan(Y)
+        xf = _np_ffill(np, X, self.x); yf = _np_ffill(np, Y, self.y)
+        xp = np.concatenate(([self.x], xf[:-1])); yp = np.concatenate(([self.y], yf[:-1]))
+        dxy = np.hypot(xf - xp, yf - yp)
+        dxy[~has_xy | np.isnan(dxy)] = 0.0
+        zf = _np_ffill(np, Z, self.z)
+        zp = np.concatenate(([self.z], zf[:-1]))
+        with np.errstate(invalid="ignore"):
+            zup = Z > zp + 1e-6                                    # NaN on either side -> False
+
+        extr = de > 1e-9
+        self.extrude_dist += float(dxy[extr].sum())
+        trav = ~extr & (dxy > 1e-9)
+        self.travel_dist += float(dxy[trav].sum())
+        self.travel_moves += int(np.count_nonzero(trav))
+        self.zhops += int(np.count_nonzero(trav & zup))
+        self.retractions += int(np.count_nonzero(~extr & (de < -1e-9)))
+
+        ei = np.flatnonzero(extr)
+        if ei.size:
+            fe = state("feat", self.feature)[ei]; de_e = de[ei]
+            nb = len(self._BUCKETS)
+            sums = np.bincount(fe, weights=de_e, minlength=nb)
+            present = np.flatnonzero(np.bincount(fe, minlength=nb)).tolist()
+            new = [b for b in present if self._BUCKETS[b] not in self.feat_fil]
+            if new:                                        # keep first-extrusion order (dict order)
+                first = {b: int(np.argmax(fe == b)) for b in new}
+                for b in sorted(new, key=first.get):
+                    self.feat_fil[self._BUCKETS[b]] = 0.0
+            for b in present:
+                self.feat_fil[self._BUCKETS[b]] += float(sums[b])
+            oe = state("obj", self.cur_obj)[ei]
+            on = oe >= 0
+            if on.any():
+                no = len(self.obj_names)
+                if self.obj_fil.size < no:
+                    grow = no - self.obj_fil.size
+                    self.obj_fil = np.concatenate((self.obj_fil, np.zeros(grow)))
+                    self.obj_seen = np.concatenate((self.obj_seen, np.zeros(grow, bool)))
+                self.obj_fil += np.bincount(oe[on], weights=de_e[on], minlength=no)
+                self.obj_seen[oe[on]] = True
+
+        if self.objects:
+            with np.errstate(invalid="ignore"):
+                dz = np.where(np.isnan(zf - zp), 0.0, zf - zp)
+            self._object_moves(dxy, dz, de, extr, trav, state("obj", self.cur_obj), state("visit", self.visit),
+                               state("layer", self._layer0), F)
+
+        S = self.series
+        if S is not None:                                  # the same masks, binned by layer
+            lay = state("layer", self._layer0)
+            nl = self.layers + 1
+            self._series_grow(nl)
+            binc = lambda sel, w=None: np.bincount(lay[sel], weights=None if w is None else w[sel], minlength=nl)
+            S["extrude_path_mm"][:nl] += binc(extr, dxy)
+            S["travel_mm"][:nl] += binc(trav, dxy)
+            S["travel_moves"][:nl] += binc(trav)
+            S["z_hops"][:nl] += binc(trav & zup)
+            S["retractions"][:nl] += binc(~extr & (de < -1e-9))
+            if ei.size:
+                nb = len(self._BUCKETS)
+                S["extrude_mm"][:nl] += np.bincount(lay[ei] * nb + fe, weights=de_e,
+                                                    minlength=nl * nb).reshape(nl, nb)
+                np.fmax.at(S["_z_extrude"], lay[ei], zf[ei])
+
+        self.x, self.y, self.z = float(xf[-1]), float(yf[-1]), float(zf[-1])
+
+    def _otab_grow(self):
+        np, T, no = self.np, self.otab, len(self.obj_names)
+        have = T["visits"].size if T else 0
+        if have >= no: return
+        grow = max(no - have, have)                         # amortized doubling
+        for k in self.OBJECT_COLUMNS:
+            init = -1 if k.endswith("_layer") else 0
+            dt = np.int64 if k in ("retractions", "first_layer", "last_layer", "visits") else np.float64
+            T[k] = np.concatenate((T.get(k, np.empty(0, dt)), np.full(grow, init, dt)))
+
+    def _object_moves(self, dxy, dz, de, extr, trav, oe, vis, lay, F):
+        """The block's moves into the per-object table. Travel inside a label interval
+        (a visit) is split by where it falls: before the visit's first extrusion
+        (travel_in_mm - getting there), after its last (travel_out_mm - wipe / leaving)
+        or between (travel_mm). A visit can span blocks, so its trailing travel stays
+        open in self._open until an extrusion or the visit's end settles it."""
+        np, T = self.np, self.otab
+        self._otab_grow()
+        no = len(self.obj_names)
+        ff = _np_ffill(np, F, self.f) if F is not None else np.full(dxy.size, np.nan)
+        if ff.size: self.f = float(ff[-1])
+        with np.errstate(invalid="ignore", divide="ignore"):
+            length = np.where(dxy + dz > 0, np.hypot(dxy, dz), np.abs(de))
+            t = np.where(ff > 0, length / ff * 60.0, 0.0)          # F is mm/min
+        t[np.isnan(t)] = 0.0
+        on = oe >= 0
+        if on.any():
+            o = oe[on]
+            binc = lambda w: np.bincount(o, weights=w[on], minlength=no)[:no]
+            T["extrude_mm"][:no] += binc(np.where(extr, dxy, 0.0))
+            T["retractions"][:no] += binc((~extr & (de < -1e-9)).astype(np.float64)).astype(np.int64)
+            T["time_s"][:no] += binc(t)
+            ext = extr & on
+            if ext.any():
+                fl, ll = T["first_layer"], T["last_layer"]
+                first = np.where(fl < 0, np.iinfo(np.int64).max, fl)
+                np.minimum.at(first, oe[ext], lay[ext])
+                T["first_layer"] = np.where(first == np.iinfo(np.int64).max, -1, first)
+                np.maximum.at(ll, oe[ext], lay[ext])
+        td = np.where(trav, dxy, 0.0)
+        n = vis.size
+        st = np.concatenate(([0], np.flatnonzero(vis[1:] != vis[:-1]) + 1))
+        en = np.concatenate((st[1:], [n]))
+        cum = np.concatenate(([0.0], np.cumsum(td)))
+        idx = np.arange(n)
+        fe = np.minimum.reduceat(np.where(extr, idx, n), st)
+        le = np.maximum.reduceat(np.where(extr, idx, -1), st)
+        has = le >= 0
+        tot = cum[en] - cum[st]
+        before = np.where(has, cum[np.minimum(fe, n)] - cum[st], tot)
+        after = np.where(has, cum[en] - cum[le + 1], 0.0)
+        for v, ob, h, tb, ta, tt in zip(vis[st].tolist(), oe[st].tolist(), has.tolist(), before.tolist(),
+                                        after.tolist(), tot.tolist()):
+            op = self._open
+            if op is None or op[0] != v:
+                self._close_visit()
+                op = self._open = [v, ob, False, 0.0]
+            if ob < 0: continue
+            if not h:
+                if op[2]: op[3] += tt
+                else: T["travel_in_mm"][ob] += tt
+                continue
+            if op[2]: T["travel_mm"][ob] += op[3] + tb
+            else: T["travel_in_mm"][ob] += tb
+            T["travel_mm"][ob] += tt - tb - ta
+            op[2], op[3] = True, ta
+
+    def _close_visit(self):
+        op, self._open = self._open, None
+        if op and op[1] >= 0 and op[2]:
+            self.otab["travel_out_mm"][op[1]] += op[3]
+
+    def object_table(self):
+        """The per-object table (objects=True): {"object": [label ids], column: array}
+        in first-label order. filament / extrusion / travel in mm; time_s = each move's
+        length over its F (no acceleration, so a floor); first/last_layer = the layers
+        it extruded on (-1: never); visits = its label intervals."""
+        self._otab_grow()
+        no = len(self.obj_names)
+        out = {"object": list(self.obj_names)}
+        out.update((k, v[:no]) for k, v in self.otab.items())
+        fil = self.obj_fil[:no]
+        out["filament_mm"] = fil if fil.size == no else self.np.concatenate((fil, self.np.zeros(no - fil.size)))
+        return out
+
+    _SERIES = (("extrude_path_mm", 0.0), ("travel_mm", 0.0), ("travel_moves", 0), ("retractions", 0),
+               ("z_hops", 0), ("tool_changes", 0), ("z_mm", float("nan")), ("m73_remaining_min", float("nan")),
+               ("_z_extrude", float("nan")))
+
+    def _series_grow(self, n):
+        S, np = self.series, self.np
+        have = S["travel_mm"].shape[0] if S else 0
+        if have >= n: return
+        grow = max(n - have, have)                          # amortized doubling
+        for k, init in self._SERIES:
+            S[k] = np.concatenate((S.get(k, np.empty(0, type(init))), np.full(grow, init, type(init))))
+        S["extrude_mm"] = np.concatenate((S.get("extrude_mm", np.empty((0, len(self._BUCKETS)))),
+                                          np.zeros((grow, len(self._BUCKETS)))))
+
+    def series_arrays(self):
+        """Per-layer arrays, index 0 = everything before the first CHANGE_LAYER (start gcode,
+        purge line), then one row per layer. z_mm is the slicer's Z_HEIGHT (else the highest
+        extruding Z); time_min is the drop in M73 remaining time over the layer."""
+        np, L = self.np, self.layers + 1
+        self._series_grow(L)
+        S = {k: v[:L] for k, v in self.series.items()}
+        r = S.pop("m73_remaining_min")
+        r_next = np.concatenate((r[1:], [self.last_R if self.last_R is not None else np.nan]))
+        z, z_ex = S.pop("z_mm"), S.pop("_z_extrude")
+        out = {"layer": np.arange(L), "z_mm": np.where(np.isnan(z), z_ex, z),
+               "m73_remaining_min": r, "time_min": r - r_next,
+               "feature_buckets": np.array(self._BUCKETS)}
+        out.update(S)
+        return out
+
 
 # =============================================================================
-def extract_design(folder, want_body=True):
-    """Run PART A + PART B for one design folder and return the result dict."""
+PLATE_THREADS = min(4, os.cpu_count() or 1)   # plates of one project parsed concurrently
+# how aggregate_plates() folds a key over the plates (anything else: recomputed below,
+# or the first plate's value)
+_PLATE_SUM = ("object_area_mm2", "available_area_mm2", "bed_area_mm2", "exclusion_area_mm2",
+              "calibration_area_mm2", "prime_tower_area_mm2", "objects_on_plate", "total_layers",
+              "travel_distance_mm", "travel_moves", "_extrude_distance_mm", "retractions", "z_hops",
+              "layers_gcode", "total_extruded_filament_mm", "prime_tower_filament_mm",
+              "support_filament_mm", "outer_wall_loops", "tool_changes_gcode", "object_count_gcode",
+              "mesh_triangles")
+_PLATE_MAX = ("print_height_mm", "layer_time_min_max", "object_filament_mm_max")
+
+
+def extract_plate(arc, plate=1, printer=None, want_body=True, engine="python", series_path=None,
+                  design=None, timings=None, estimate=None, objects_path=None):
+    """PART B of one plate: utilization, gcode header and (want_body) the gcode body -
+    estimated from `estimate` sampled layers when that is set."""
+    T = timings or _NO_TIMINGS
+    out = {}
+    if timings:                                                    # inflate + decode apart from the maths
+        names = ("Metadata/plate_%d.json" % plate, "Metadata/pick_%d.png" % plate)
+        with T.stage("metadata", sum(arc.info(n).file_size for n in names if arc.info(n))):
+            arc.plate_json(plate), have_pillow() and arc.pick(plate)
+    with T.stage("plate_utilization"):
+        out.update(plate_utilization(arc, printer, plate))
+    gs = gcode_stream(arc, want_body, engine, bool(series_path), plate, estimate,   # header now, body later
+                      bool(objects_path))
+    with T.stage("gcode_header"):
+        out.update(next(gs)[1])
+    gi = arc.info("Metadata/plate_%d.gcode" % plate)
+    pipe = None
+    with T.stage("gcode_body", gi.file_size if gi else None) if want_body else contextlib.nullcontext():
+        for kind, o in gs:
+            if kind == "series": write_series(series_path, design, o)
+            elif kind == "objects": write_objects(objects_path, design, plate, o)
+            elif kind == "pipeline": pipe = o
+            else: out.update(o)
+    if pipe: T.add("gcode_body", **pipe)
+    return out
+
+
+def aggregate_plates(plates):
+    """The whole project's PART B from its per-plate dicts (each with "plate"): counts,
+    areas and distances add up, ratios are recomputed from the sums, means weighted,
+    extremes kept. A plate without a value (no pick image, say) is left out of it."""
+    out = {}
+    for p in plates:                                               # key order of the plates
+        for k, v in p.items():
+            if k != "plate": out.setdefault(k, v)
+    vals = lambda k: [p[k] for p in plates if p.get(k) is not None]
+    def wmean(k, w, nd):
+        pw = [(p[k], p.get(w) or 0) for p in plates if p.get(k) is not None]
+        tw = sum(x for _, x in pw)
+        return round(sum(v * x for v, x in pw) / tw, nd) if tw else None
+    def merged(k):
+        acc = {}
+        for d in vals(k):
+            for kk, v in d.items(): acc[kk] = acc.get(kk, 0.0) + v
+        return {kk: round(v, 1) for kk, v in sorted(acc.items(), key=lambda kv: -kv[1])}
+    for k in out:
+        v = vals(k)
+        if k in _PLATE_SUM:
+            out[k] = round(sum(v), 1) if any(isinstance(x, float) for x in v) else sum(v)
+        elif k in _PLATE_MAX:
+            out[k] = max(v)
+        elif k.endswith("_error"):
+            out[k] = "; ".join("plate %s: %s" % (p["plate"], p[k]) for p in plates if k in p)
+    if "plate_utilization_pct" in out:
+        av = out["available_area_mm2"]
+        out["plate_utilization_pct"] = round(out["object_area_mm2"] / av * 100, 1) if av > 0 else 0.0
+        out["calibration_estimated"] = any(vals("calibration_estimated"))
+        out["prime_tower_bbox"] = None                             # per plate only
+        for k in ("object_area_by_color_mm2", "object_area_by_object_mm2"):
+            if k in out: out[k] = merged(k)
+        if len(set(vals("utilization_source"))) > 1: out["utilization_source"] = "pick+mesh"
+    hl = [(p["print_height_mm"], p["total_layers"]) for p in plates if p.get("print_height_mm") and p.get("total_layers")]
+    if hl:
+        out["effective_layer_height_mm"] = round(sum(h for h, _ in hl) / sum(n for _, n in hl), 3)
+    if "feature_filament_mm" in out:
+        t, e = out["travel_distance_mm"], out["_extrude_distance_mm"]
+        out["travel_ratio_pct"] = round(t / (t + e) * 100, 1) if (t + e) else 0.0
+        ff = merged("feature_filament_mm")
+        total = sum(ff.values()) or 1.0
+        out["feature_mix_pct"] = {k: round(v / total * 100, 1) for k, v in ff.items()}
+        out["feature_filament_mm"] = ff
+        if out.get("layers_gcode") and "outer_wall_loops" in out:     # (not estimated)
+            out["outer_loops_per_layer"] = round(out["outer_wall_loops"] / out["layers_gcode"], 1)
+    if "layer_time_min_mean" in out:
+        out["layer_time_min_mean"] = wmean("layer_time_min_mean", "layers_gcode", 2)
+    if "object_filament_mm_mean" in out:
+        out["object_filament_mm_mean"] = wmean("object_filament_mm_mean", "object_count_gcode", 1)
+        out["object_filament_mm_min"] = min(vals("object_filament_mm_min"))
+    if "estimate" in out:                                          # independent plates: variances add
+        ests = [(p, p["estimate"]) for p in plates if p.get("estimate")]
+        ci = {}
+        for _, e in ests:
+            for kk, v in e["ci95"].items():
+                if not isinstance(v, dict): ci[kk] = ci.get(kk, 0.0) + v * v
+        # a share's variance: the plates' weighted by their part of its denominator
+        motion = lambda p: p["travel_distance_mm"] + p["_extrude_distance_mm"]
+        tm, tf = sum(motion(p) for p, _ in ests), sum(p["total_extruded_filament_mm"] for p, _ in ests)
+        ci["travel_ratio_pct"] = sum((motion(p) / tm * e["ci95"].get("travel_ratio_pct", 0.0)) ** 2
+                                     for p, e in ests) if tm else 0.0
+        ci = {kk: round(math.sqrt(v), 1) for kk, v in ci.items()}
+        ci["feature_mix_pct"] = {f: round(math.sqrt(sum((p["total_extruded_filament_mm"] / tf *
+                                                        e["ci95"].get("feature_mix_pct", {}).get(f, 0.0)) ** 2
+                                                       for p, e in ests)), 1) if tf else 0.0
+                                 for f in out.get("feature_mix_pct", {})}
+        ests = [e for _, e in ests]
+        n = sum(e["layers"] for e in ests)
+        out["estimate"] = {"k": ests[0]["k"], "layers": n, "sampled_layers": sum(e["sampled_layers"] for e in ests),
+                           "parsed_pct": round(sum(e["parsed_pct"] * e["layers"] for e in ests) / n, 1) if n else 0.0,
+                           "ci95": ci}
+    return out
+
+
+def extract_design(folder, want_body=True, engine="python", arc=None, series_path=None, timings=None,
+                   estimate=None, objects_path=None):
+    """Run PART A + PART B for one design folder and return the result dict.
+    A multi-plate project is measured plate by plate (PLATE_THREADS at a time - zlib
+    inflates outside the GIL): part_b is then the aggregate over all plates and
+    result["plates"] has each plate's own PART B.
+    arc: an already-open DesignArchive of the folder's 3mf (the --serve warm ones).
+    series_path: also write the per-layer arrays there (.npz, same pass, numpy engine;
+    <name>_plateN.npz per plate for a multi-plate project).
+    objects_path: also write the per-object table there (.csv / .ndjson, same pass,
+    numpy engine; <name>_plateN.<ext> per plate likewise).
+    timings: a StageTimings to record each stage in (--profile; plates then run one
+    after another and a stage's times add up over them).
+    estimate: K -> the body metrics from K sampled layers per plate, with 95% CIs
+    (part_b["estimate"]; see _body_estimate)."""
+    T = timings or _NO_TIMINGS
     _, tsv_path, g3_path = find_design_files(folder)
     result = {"design": os.path.basename(folder.rstrip("\\/")), "folder": folder}
-    part_a = parse_data_tsv(tsv_path)
+    with T.stage("data_tsv", os.path.getsize(tsv_path) if timings and tsv_path else None):
+        part_a = parse_data_tsv(tsv_path)
     result["part_a_source"] = os.path.basename(tsv_path) if tsv_path else None
     result["part_a"] = part_a if part_a else {"error": "no usable _Data.tsv row found"}
     printer = (part_a or {}).get("printer") or os.path.basename(folder.rstrip("\\/")).split("_")[0]
     result["part_b_source"] = os.path.basename(g3_path) if g3_path else None
     part_b = {}
     if g3_path:
-        zf = zipfile.ZipFile(g3_path)
-        part_b.update(plate_utilization(zf, printer))
-        part_b.update(gcode_header(zf))
-        part_b.update(variable_layer_height(zf))
-        if want_body:
-            part_b.update(gcode_body(zf))
+        with T.stage("open"):                                      # the zip central directory
+            opened = contextlib.nullcontext(arc) if arc else DesignArchive(g3_path, timings.io if timings else None)
+        with opened as arc:                                        # closes only an archive opened here
+            if timings:
+                ci = arc.info("Metadata/project_settings.config")
+                with T.stage("metadata", ci.file_size if ci else None):
+                    arc.config
+            plates = arc.plates()
+            def per_plate(path, n):
+                if not path or len(plates) == 1: return path
+                return "%s_plate%d%s" % (os.path.splitext(path)[0], n, os.path.splitext(path)[1])
+            def one(n):
+                return extract_plate(arc, n, printer, want_body, engine, per_plate(series_path, n), result["design"],
+                                     timings, estimate, per_plate(objects_path, n))
+            if len(plates) == 1 or timings or PLATE_THREADS <= 1:
+                per = [one(n) for n in plates]
+            else:
+                from concurrent.futures import ThreadPoolExecutor
+                with ThreadPoolExecutor(max_workers=min(PLATE_THREADS, len(plates))) as pool:
+                    per = list(pool.map(one, plates))
+            if len(plates) > 1:
+                result["plates"] = [dict(plate=n, **p) for n, p in zip(plates, per)]
+                part_b = aggregate_plates(result["plates"])
+                part_b.pop("_extrude_distance_mm", None)
+            else:
+                part_b = per[0]
+            for p in result.get("plates", per):
+                p.pop("_extrude_distance_mm", None)
+            with T.stage("layer_profile"):
+                part_b.update(variable_layer_height(arc))
+            part_b["plate_count"] = len(plates)
     else:
         part_b = {"error": "no *Full.gcode.3mf found"}
     if part_a and part_a.get("color_changes") is not None and part_b.get("total_layers"):
@@ -490,6 +2356,651 @@ def extract_design(folder, want_body=True):
     return result
 
 
+# =============================================================================
+#  --profile : wall time, bytes and disk-read share per extract_design() stage
+# =============================================================================
+class StageTimings:
+    """Stage timings of one extract_design(). Each stage records ms (wall), bytes
+    (uncompressed input it processed, where that means something) and read_ms /
+    read_bytes (time + bytes spent reading the 3mf from disk / the NAS; the rest of
+    ms is inflate + parse). A stage run once per plate adds up."""
+
+    def __init__(self):
+        self.stages = {}
+        self.io = [0.0, 0]                       # filled by DesignArchive's _TimedFile
+        self._t0 = time.perf_counter()
+
+    @contextlib.contextmanager
+    def stage(self, name, nbytes=None):
+        t, io_s, io_b = time.perf_counter(), self.io[0], self.io[1]
+        try:
+            yield
+        finally:
+            st = self.stages.setdefault(name, {"ms": 0.0})
+            st["ms"] = round(st["ms"] + (time.perf_counter() - t) * 1e3, 2)
+            if nbytes is not None: st["bytes"] = st.get("bytes", 0) + nbytes
+            st["read_ms"] = round(st.get("read_ms", 0.0) + (self.io[0] - io_s) * 1e3, 2)
+            st["read_bytes"] = st.get("read_bytes", 0) + self.io[1] - io_b
+
+    def add(self, name, **ms):
+        """Add extra millisecond figures to a finished stage (the gcode reader thread's)."""
+        st = self.stages[name]
+        for k, v in ms.items(): st[k] = round(st.get(k, 0.0) + v, 2)
+
+    def as_dict(self):
+        return {"total_ms": round((time.perf_counter() - self._t0) * 1e3, 2), "stages": self.stages}
+
+
+class _NoTimings:
+    def stage(self, name, nbytes=None):
+        return contextlib.nullcontext()
+
+    def add(self, name, **ms):
+        pass
+
+
+_NO_TIMINGS = _NoTimings()
+
+
+def extract_profiled(folder, want_body=True, engine="python", series_path=None, dump_dir=None, objects_path=None):
+    """extract_design() with its stage timings in result["_timings"]; dump_dir also gets a
+    cProfile dump per design (<design>.prof - python -m pstats; the numpy engine's
+    scan threads are not in it)."""
+    T = StageTimings()
+    prof = None
+    if dump_dir:
+        import cProfile
+        prof = cProfile.Profile(); prof.enable()
+    try:
+        result = extract_design(folder, want_body, engine, series_path=series_path, timings=T,
+                                objects_path=objects_path)
+    finally:
+        if prof:
+            prof.disable()
+            os.makedirs(dump_dir, exist_ok=True)
+            prof.dump_stats(os.path.join(dump_dir, os.path.basename(folder.rstrip("\\/")) + ".prof"))
+    result["_timings"] = T.as_dict()
+    return result
+
+
+def _pct(vals, q):
+    """Nearest-rank percentile of a sorted list."""
+    return vals[min(len(vals) - 1, max(0, int(math.ceil(q / 100.0 * len(vals))) - 1))] if vals else 0.0
+
+
+def print_profile(items, top=5, out=None):
+    """Aggregate --profile table over [(design, _timings)]: per stage total / share /
+    p50 / p95 / MB/s / disk-read share, then the slowest designs (to out, else sys.stderr)."""
+    if not items: return
+    out = out or sys.stderr
+    total = sum(t["total_ms"] for _, t in items)
+    order = []
+    for _, t in items:
+        for k in t["stages"]:
+            if k not in order: order.append(k)
+    w = out.write
+    w("\nProfile: %d design(s), %.1f s total\n\n" % (len(items), total / 1e3))
+    w("  %-18s %9s %6s %9s %9s %8s %8s\n" % ("stage", "total s", "share", "p50 ms", "p95 ms", "MB/s", "read%"))
+    w("  " + "-" * 73 + "\n")
+    for k in order:
+        st = [t["stages"][k] for _, t in items if k in t["stages"]]
+        ms = sorted(x["ms"] for x in st)
+        tot = sum(ms)
+        nb = sum(x.get("bytes") or 0 for x in st)
+        rd = sum(x.get("read_ms", 0.0) for x in st)
+        w("  %-18s %9.2f %5.0f%% %9.1f %9.1f %8s %7.0f%%\n"
+          % (k, tot / 1e3, 100.0 * tot / total if total else 0, _pct(ms, 50), _pct(ms, 95),
+             ("%.1f" % (nb / 1048576.0 / (tot / 1e3))) if nb and tot else "-", 100.0 * rd / tot if tot else 0))
+    body = [t["stages"]["gcode_body"] for _, t in items if "inflate_ms" in t["stages"].get("gcode_body", {})]
+    inf = sum(st["inflate_ms"] for st in body); wt = sum(st["wait_ms"] for st in body)
+    if inf >= 1.0:
+        w("\n  gcode inflate on the reader thread %.2f s, parser waited %.2f s of it -> %.2f s (%.0f%%) "
+          "overlapped with parsing\n" % (inf / 1e3, wt / 1e3, max(0.0, inf - wt) / 1e3,
+                                          100.0 * max(0.0, inf - wt) / inf if inf else 0))
+    w("\n  slowest:\n")
+    for name, t in sorted(items, key=lambda it: -it[1]["total_ms"])[:top]:
+        k, st = max(t["stages"].items(), key=lambda kv: kv[1]["ms"])
+        w("  %9.1f ms  %-40s (%s %.0f ms)\n" % (t["total_ms"], name[:40], k, st["ms"]))
+
+
+# =============================================================================
+#  persistent result cache  (data/metrics_cache - survives editor restarts)
+# =============================================================================
+CACHE_DIR = os.path.join(DATA_DIR, "metrics_cache")
+CACHE_MAX_BYTES = 64 << 20           # LRU-evicted (oldest use first) past this many bytes of entries
+CACHE_VERSION = 4                    # bump when a cached result's keys / values change meaning
+CACHE_KINDS = ("nobody", "full", "estimate", "util", "layers")
+
+
+def _stat_key(path):
+    if not path: return None
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [os.path.normcase(os.path.abspath(path)), st.st_size, st.st_mtime_ns]
+
+
+def _gcode_crc(g3_path, arc=None):
+    """CRC-32 of the sliced gcode from the zip central directory - nothing is inflated.
+    plate_1.gcode's own CRC; for a multi-plate project a CRC-32 over every plate's."""
+    if arc is not None:
+        infos = [arc.info("Metadata/plate_%d.gcode" % n) for n in arc.plates()]
+    else:
+        found = {}
+        with zipfile.ZipFile(g3_path) as zf:
+            for zi in zf.infolist():
+                m = _PLATE_RE.match(zi.filename.replace("\\", "/").lower())
+                if m: found.setdefault(int(m.group(1)), zi)
+        infos = [found[n] for n in sorted(found)]
+    crcs = [zi.CRC for zi in infos if zi]
+    if len(crcs) <= 1:
+        return crcs[0] if crcs else None
+    return zlib.crc32(b"".join(c.to_bytes(4, "little") for c in crcs))
+
+
+def cache_key(kind, g3_path, tsv_path=None, extra=(), arc=None):
+    """Entry name for one (kind, design) result. The 3mf is keyed by path + size +
+    mtime + the gcode's CRC, the TSV (PART A) by path + size + mtime, so a
+    re-slice or a TSV edit is a miss. extra = anything else the output depends on."""
+    ident = [CACHE_VERSION, kind, _stat_key(g3_path), _gcode_crc(g3_path, arc), _stat_key(tsv_path), list(extra)]
+    return "%s-%s" % (kind, hashlib.sha1(json.dumps(ident).encode("utf-8")).hexdigest())
+
+
+_cache_counts = {}                   # kind -> [hits, misses] not yet in _stats.json
+_cache_counts_lock = threading.Lock()
+
+
+def _cache_count(kind, hit):
+    """Count a hit / miss in memory - cache_flush_stats() writes the counts out once, at exit."""
+    with _cache_counts_lock:
+        _cache_counts.setdefault(kind, [0, 0])[0 if hit else 1] += 1
+
+
+def _cache_take_counts():
+    """-> the counts since the last take / flush, and reset them (how a --jobs pool
+    process hands its counts back to the main process)."""
+    with _cache_counts_lock:
+        out = dict(_cache_counts)
+        _cache_counts.clear()
+    return out
+
+
+def _cache_add_counts(counts):
+    with _cache_counts_lock:
+        for kind, (hits, misses) in counts.items():
+            c = _cache_counts.setdefault(kind, [0, 0])
+            c[0] += hits; c[1] += misses
+
+
+def cache_flush_stats():
+    """Add this run's hit/miss counts to _stats.json - one read-modify-write per run, from
+    the main process only (best effort - a lost update only skews the report)."""
+    counts = _cache_take_counts()
+    if not counts:
+        return
+    path = os.path.join(CACHE_DIR, "_stats.json")
+    try:
+        with open(path, encoding="utf-8") as fh:
+            st = json.load(fh)
+    except Exception:
+        st = {}
+    for kind, (hits, misses) in counts.items():
+        c = st.setdefault(kind, {"hits": 0, "misses": 0})
+        c["hits"] += hits; c["misses"] += misses
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp = "%s.%d.tmp" % (path, os.getpid())
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(st, fh)
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+def cache_get(key):
+    """Cached bytes for key, or None. A hit refreshes the entry's mtime (its LRU stamp)."""
+    path = os.path.join(CACHE_DIR, key)
+    try:
+        with open(path, "rb") as fh:
+            data = fh.read()
+        os.utime(path)
+    except OSError:
+        data = None
+    _cache_count(key.split("-", 1)[0], data is not None)
+    return data
+
+
+def cache_put(key, data):
+    """Store an entry atomically, then evict least-recently-used entries past CACHE_MAX_BYTES."""
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        path = os.path.join(CACHE_DIR, key)
+        tmp = "%s.%d.%d.tmp" % (path, os.getpid(), threading.get_ident())
+        with open(tmp, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp, path)
+        _cache_evict()
+    except OSError as e:
+        sys.stderr.write("cache write failed: %s\n" % e)
+
+
+def _cache_entries():
+    """[(mtime, size, name)] for every entry, oldest use first."""
+    out = []
+    try:
+        with os.scandir(CACHE_DIR) as it:
+            for de in it:
+                if de.is_file() and de.name.split("-", 1)[0] in CACHE_KINDS and not de.name.endswith(".tmp"):
+                    st = de.stat()
+                    out.append((st.st_mtime, st.st_size, de.name))
+    except OSError:
+        pass
+    return sorted(out)
+
+
+def _cache_evict(max_bytes=None):
+    max_bytes = CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    entries = _cache_entries()
+    total = sum(e[1] for e in entries)
+    for _, size, name in entries:
+        if total <= max_bytes: break
+        try:
+            os.remove(os.path.join(CACHE_DIR, name)); total -= size
+        except OSError:
+            pass
+
+
+def cache_stats():
+    """{kind: {entries, bytes, hits, misses}} plus the totals, for --cache-stats."""
+    try:
+        with open(os.path.join(CACHE_DIR, "_stats.json"), encoding="utf-8") as fh:
+            counts = json.load(fh)
+    except Exception:
+        counts = {}
+    with _cache_counts_lock:             # this process's, not flushed yet
+        for kind, (hits, misses) in _cache_counts.items():
+            c = counts.setdefault(kind, {"hits": 0, "misses": 0})
+            c["hits"] = c.get("hits", 0) + hits; c["misses"] = c.get("misses", 0) + misses
+    out = {"cache_dir": CACHE_DIR, "max_bytes": CACHE_MAX_BYTES, "entries": 0, "bytes": 0, "kinds": {}}
+    for k in CACHE_KINDS:
+        out["kinds"][k] = {"entries": 0, "bytes": 0, "hits": counts.get(k, {}).get("hits", 0),
+                           "misses": counts.get(k, {}).get("misses", 0)}
+    for _, size, name in _cache_entries():
+        d = out["kinds"][name.split("-", 1)[0]]
+        d["entries"] += 1; d["bytes"] += size
+        out["entries"] += 1; out["bytes"] += size
+    return out
+
+
+def print_cache_stats(st):
+    print("Metrics cache: %s" % st["cache_dir"])
+    print("  %d entries, %.1f / %.0f MB\n" % (st["entries"], st["bytes"] / 1048576.0, st["max_bytes"] / 1048576.0))
+    print("  %-8s %8s %10s %8s %8s %8s" % ("kind", "entries", "KB", "hits", "misses", "hit%"))
+    print("  " + "-" * 56)
+    for k, d in st["kinds"].items():
+        n = d["hits"] + d["misses"]
+        print("  %-8s %8d %10.1f %8d %8d %8s" % (k, d["entries"], d["bytes"] / 1024.0, d["hits"], d["misses"],
+                                                  ("%.0f" % (100.0 * d["hits"] / n)) if n else "-"))
+
+
+def extract_design_cached(folder, want_body=True, engine="python", arc=None, estimate=None):
+    """extract_design() through the on-disk cache ('full' / 'nobody' / 'estimate' entries,
+    keyed by the utilization source too, the last by K as well). A hit only stats the
+    files and reads the 3mf's central directory."""
+    _, tsv_path, g3_path = find_design_files(folder)
+    if not g3_path:
+        return extract_design(folder, want_body, engine, arc, estimate=estimate)
+    util = [UTIL_SOURCE, MESH_RES_MM]
+    if want_body and estimate:
+        key = cache_key("estimate", g3_path, tsv_path, [estimate] + util, arc)
+    else:
+        key = cache_key("full" if want_body else "nobody", g3_path, tsv_path, util, arc)
+    data = cache_get(key)
+    if data is not None:
+        try:
+            result = json.loads(data.decode("utf-8"))
+            result["folder"] = folder
+            return result
+        except ValueError:
+            pass
+    result = extract_design(folder, want_body, engine, arc, estimate=estimate)
+    cache_put(key, json.dumps(result).encode("utf-8"))
+    return result
+
+
+_file_sha1_memo = {}                 # (path, size, mtime) -> sha1 of the contents
+
+
+def _file_sha1(path):
+    sk = _stat_key(path)
+    if sk is None: return None
+    k = tuple(sk)
+    if k not in _file_sha1_memo:
+        with open(path, "rb") as fh:
+            _file_sha1_memo[k] = hashlib.sha1(fh.read()).hexdigest()
+    return _file_sha1_memo[k]
+
+
+def util_cache_key(g3_path, printer, pick_base=None, scale=2, plate=1, fmt="png", level=None, arc=None):
+    """Content address of an overlay: the gcode CRC, the pick base's content hash and the
+    scale (+ plate, printer, format, level) - no paths or mtimes, so a copied / touched
+    3mf or the same pick saved to a new temp file is still a hit."""
+    crc = _gcode_crc(g3_path, arc)
+    ident = [CACHE_VERSION, "util", crc if crc is not None else _stat_key(g3_path),
+             _file_sha1(pick_base) if pick_base and os.path.exists(pick_base) else None,
+             scale, plate, (printer or "").upper(), fmt, UTIL_IMAGE_LEVEL if level is None else level]
+    return "util-" + hashlib.sha1(json.dumps(ident).encode("utf-8")).hexdigest()
+
+
+def render_util_image_cached(g3_path, printer, out_path, pick_base=None, arc=None, plate=1, scale=2,
+                             fmt=None, level=None):
+    """render_util_image() through the on-disk cache ('util' entries, content-addressed -
+    see util_cache_key). A hit just writes the cached image bytes. -> (ok, cache hit?)"""
+    fmt = (fmt or os.path.splitext(out_path)[1].lstrip(".") or "png").lower()
+    key = util_cache_key(g3_path, printer, pick_base, scale, plate, fmt, level, arc)
+    data = cache_get(key)
+    if data is not None:
+        with open(out_path, "wb") as fh:
+            fh.write(data)
+        return True, True
+    buf = io.BytesIO()
+    with contextlib.nullcontext(arc) if arc else DesignArchive(g3_path) as a:
+        ok = render_util_image(a, printer, buf, scale, pick_base, plate, fmt, level)
+    if ok:
+        data = buf.getvalue()
+        with open(out_path, "wb") as fh:
+            fh.write(data)
+        cache_put(key, data)
+    return ok, False
+
+
+def render_util_batch(folders, out_dir, plate=1, scale=2, fmt="png", level=None, use_cache=True, jobs=None):
+    """--util-images: every design's overlay into out_dir as <design>.<fmt> (<design>_plateN
+    for plate > 1), rendered on `jobs` threads (PIL decodes / encodes outside the GIL).
+    One compact JSON line per design on stdout as each finishes: {"path", "out", "cached"}
+    or {"path", "error"}. -> True when all rendered."""
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+    os.makedirs(out_dir, exist_ok=True)
+    def one(folder):
+        _, tsv_path, g3_path = find_design_files(folder)
+        if not g3_path:
+            raise ValueError("no *Full.gcode.3mf")
+        printer = (parse_data_tsv(tsv_path) or {}).get("printer") or os.path.basename(folder.rstrip("\\/")).split("_")[0]
+        name = os.path.basename(folder.rstrip("\\/")) + ("_plate%d" % plate if plate != 1 else "")
+        out = os.path.join(out_dir, "%s.%s" % (name, fmt))
+        with DesignArchive(g3_path) as arc:
+            if use_cache:
+                ok, hit = render_util_image_cached(g3_path, printer, out, arc=arc, plate=plate, scale=scale,
+                                                   fmt=fmt, level=level)
+            else:
+                ok, hit = render_util_image(arc, printer, out, scale, None, plate, fmt, level), False
+        if not ok:
+            raise ValueError("utilization image could not be rendered (no pick / plate JSON?)")
+        return {"out": out, "cached": hit}
+    ok_all = True
+    with ThreadPoolExecutor(max_workers=jobs or min(4, os.cpu_count() or 1)) as pool:
+        futs = {pool.submit(one, f): f for f in folders}
+        for fut in as_completed(futs):
+            try:
+                out = dict(path=futs[fut], **fut.result())
+            except Exception as e:
+                out = {"path": futs[fut], "error": "%s: %s" % (type(e).__name__, e)}
+                ok_all = False
+            write_ndjson(out)
+    return ok_all
+
+
+# =============================================================================
+#  --serve : resident JSON-lines server (one interpreter for the whole editor session)
+# =============================================================================
+#  request : {"id": 7, "op": "extract" | "no-body" | "layers" | "util-image" | "ping",
+#             "path": "<design folder or 3mf>", "engine": "numpy",          (optional)
+#             "estimate": 40,                                 (extract: K sampled layers; optional)
+#             "layers": "120:140",                             (op "layers"; "plate" optional)
+#             "out": "<png for util-image>", "pick_base": "<png>", "plate": 2,   (util-image;
+#             "scale": 2, "format": "png" | "webp", "level": 0-9}                 all optional)
+#  reply   : {"id": 7, "ok": true, "result": {...}}  |  {"id": 7, "ok": false, "error": "..."}
+#  Replies come back as each request finishes (not in request order) - match on id.
+#  {"op": "shutdown"} ends the session (stdin) / the connection (--port).
+SERVE_MAX_OPEN = 32                  # warm archives kept open (least recently used dropped)
+
+
+_warm = {}                           # abs path -> (size, mtime_ns, DesignArchive), insertion = LRU order
+_warm_users = {}                     # id(DesignArchive) -> requests using it right now
+_warm_lock = threading.Lock()
+
+
+def _warm_drop(arc):
+    """An archive left the LRU: close it now, or its last user will (_warm_lock held)."""
+    if not _warm_users.get(id(arc)):
+        arc.close()
+
+
+@contextlib.contextmanager
+def _warm_archive(g3_path):
+    """The open DesignArchive for g3_path (config, plate JSON, pick already decoded after
+    the first request), reopened when the file changed on disk. One that leaves the LRU
+    is closed as soon as no request is using it."""
+    st = os.stat(g3_path)
+    k = os.path.normcase(os.path.abspath(g3_path))
+    with _warm_lock:
+        hit = _warm.pop(k, None)
+        if hit and hit[0] == st.st_size and hit[1] == st.st_mtime_ns:
+            arc = hit[2]
+        else:
+            if hit: _warm_drop(hit[2])
+            arc = DesignArchive(g3_path)
+        _warm[k] = (st.st_size, st.st_mtime_ns, arc)
+        _warm_users[id(arc)] = _warm_users.get(id(arc), 0) + 1
+        while len(_warm) > SERVE_MAX_OPEN:
+            _warm_drop(_warm.pop(next(iter(_warm)))[2])
+    try:
+        yield arc
+    finally:
+        with _warm_lock:
+            _warm_users[id(arc)] -= 1
+            if not _warm_users[id(arc)]:
+                del _warm_users[id(arc)]
+                if _warm.get(k, (0, 0, None))[2] is not arc:     # dropped while in use
+                    arc.close()
+
+
+def _warm_clear():
+    """End of a --serve session: close every warm archive (one still in use on its way out)."""
+    with _warm_lock:
+        while _warm:
+            _warm_drop(_warm.popitem()[1][2])
+
+
+def serve_request(req, engine="python", use_cache=True):
+    """Run one --serve request and return its result (raises on failure)."""
+    op = req.get("op", "extract")
+    if op == "ping":
+        return {"pong": True, "pid": os.getpid(), "open_archives": len(_warm)}
+    path = req.get("path")
+    if not path:
+        raise ValueError("request has no 'path'")
+    folders = find_design_folders([path])
+    if not folders:
+        raise ValueError("no design folder (need a *Full.gcode.3mf): %s" % path)
+    folder = folders[0]
+    _, tsv_path, g3_path = find_design_files(folder)
+    with _warm_archive(g3_path) if g3_path else contextlib.nullcontext() as arc:
+        if op in ("extract", "no-body"):
+            extract = extract_design_cached if use_cache else extract_design
+            return extract(folder, op == "extract", req.get("engine") or engine, arc, estimate=req.get("estimate"))
+        if op == "layers":
+            if not g3_path:
+                raise ValueError("no *Full.gcode.3mf for a layer range")
+            first, last = parse_layer_range(str(req.get("layers") or ":"))
+            return layer_range(arc, int(req.get("plate") or 1), first, last)
+        if op == "util-image":
+            if not g3_path:
+                raise ValueError("no *Full.gcode.3mf for the utilization image")
+            out = req.get("out")
+            if not out:
+                raise ValueError("util-image request has no 'out'")
+            printer = (parse_data_tsv(tsv_path) or {}).get("printer") or os.path.basename(folder.rstrip("\\/")).split("_")[0]
+            plate = int(req.get("plate") or 1)
+            scale, fmt, level = int(req.get("scale") or 2), req.get("format"), req.get("level")
+            if use_cache:
+                ok, _ = render_util_image_cached(g3_path, printer, out, req.get("pick_base"), arc, plate, scale, fmt, level)
+            else:
+                ok = render_util_image(arc, printer, out, scale, req.get("pick_base"), plate, fmt, level)
+            if not ok:
+                raise ValueError("utilization image could not be rendered")
+            return {"out": out}
+        raise ValueError("unknown op %r" % op)
+
+
+def _serve_lines(lines, write, pool, engine, use_cache):
+    """Feed request lines to the pool; write() each reply line (thread-safe) as it completes."""
+    lock = threading.Lock()
+    def reply(obj):
+        line = json.dumps(obj) + "\n"
+        with lock:
+            write(line)
+    def run(req):
+        try:
+            reply({"id": req.get("id"), "ok": True, "result": serve_request(req, engine, use_cache)})
+        except Exception as e:
+            reply({"id": req.get("id"), "ok": False, "error": "%s: %s" % (type(e).__name__, e)})
+    pending = []
+    for line in lines:
+        line = line.strip()
+        if not line: continue
+        try:
+            req = json.loads(line)
+            if not isinstance(req, dict): raise ValueError("request must be a JSON object")
+        except ValueError as e:
+            reply({"id": None, "ok": False, "error": "bad request: %s" % e}); continue
+        if req.get("op") == "shutdown":
+            break
+        pending.append(pool.submit(run, req))
+    for f in pending:
+        f.result()
+
+
+def serve(port=None, jobs=None, engine="python", use_cache=True):
+    """--serve: JSON-lines on stdin/stdout, or on 127.0.0.1:port (one thread per connection,
+    one shared worker pool). jobs = worker threads (PIL, zlib and NumPy release the GIL)."""
+    from concurrent.futures import ThreadPoolExecutor
+    pool = ThreadPoolExecutor(max_workers=jobs or min(4, os.cpu_count() or 1))
+    if port is None:
+        def write(t):
+            sys.stdout.write(t); sys.stdout.flush()
+        sys.stderr.write("design_metrics_worker serving JSON-lines on stdin/stdout (pid %d)\n" % os.getpid())
+        try:
+            _serve_lines(sys.stdin, write, pool, engine, use_cache)
+        finally:
+            pool.shutdown(wait=True); _warm_clear()
+        return
+    import socket
+    srv = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    srv.bind(("127.0.0.1", port)); srv.listen(8)
+    sys.stderr.write("design_metrics_worker serving JSON-lines on 127.0.0.1:%d (pid %d)\n"
+                     % (srv.getsockname()[1], os.getpid()))
+    sys.stderr.flush()
+    def client(conn):
+        with conn, conn.makefile("r", encoding="utf-8", errors="replace") as rf:
+            try:
+                _serve_lines(rf, lambda t: conn.sendall(t.encode("utf-8")), pool, engine, use_cache)
+            except OSError:
+                pass                 # client went away mid-reply
+    try:
+        while True:
+            conn, _ = srv.accept()
+            threading.Thread(target=client, args=(conn,), daemon=True).start()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv.close(); pool.shutdown(wait=False); _warm_clear()
+
+
+def read_path_list(src):
+    """--paths-from: one path per line from a file ("-" = stdin); blank lines skipped."""
+    fh = sys.stdin if src == "-" else open(src, encoding="utf-8-sig")
+    try:
+        return [ln.strip().strip('"') for ln in fh if ln.strip()]
+    finally:
+        if fh is not sys.stdin: fh.close()
+
+
+def stream_batch(paths, want_body=False, engine="python", use_cache=True, jobs=None, estimate=None):
+    """--stream: extract every path (design folder or its 3mf) on `jobs` threads and write
+    one compact JSON line per design to stdout the moment it finishes - completion order,
+    so each line carries "path" (as given); a failure is {"path", "error"}.
+    -> True when every path succeeded."""
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+    extract = extract_design_cached if use_cache else extract_design
+    def one(path):
+        folders = find_design_folders([path])
+        if not folders:
+            raise ValueError("no design folder (need a *Full.gcode.3mf)")
+        return extract(folders[0], want_body, engine, estimate=estimate)
+    ok = True
+    with ThreadPoolExecutor(max_workers=jobs or min(4, os.cpu_count() or 1)) as pool:
+        futs = {pool.submit(one, p): p for p in paths}
+        for fut in as_completed(futs):
+            try:
+                out = dict(fut.result(), path=futs[fut])
+            except Exception as e:
+                out = {"path": futs[fut], "error": "%s: %s" % (type(e).__name__, e)}
+                ok = False
+            write_ndjson(out)
+    return ok
+
+
+def write_series(path, design, arrays):
+    """Per-layer arrays -> compressed .npz (np.load(path)["travel_mm"] ...; no pickles)."""
+    import numpy as np
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as fh:
+        np.savez_compressed(fh, design=np.array(design), **arrays)
+    os.replace(tmp, path)
+
+
+def write_objects(path, design, plate, table):
+    """The per-object table -> .ndjson / .jsonl (one object per line) or CSV (anything
+    else), one row per labelled object with its design and plate."""
+    cols = list(_NumpyBody.OBJECT_COLUMNS)
+    vals = {k: table[k].tolist() for k in cols}
+    rows = []
+    for i, oid in enumerate(table["object"]):
+        row = {"design": design, "plate": plate, "object": oid}
+        for k in cols:
+            v = vals[k][i]
+            row[k] = round(v, 1) if isinstance(v, float) else v
+        rows.append(row)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    if path.lower().endswith((".ndjson", ".jsonl")):
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8", newline="\n") as fh:
+            for row in rows:
+                fh.write(json.dumps(row, separators=(",", ":")) + "\n")
+        os.replace(tmp, path)
+    else:
+        write_csv(rows, path)
+
+
+def objects_path_for(opt, folder, many):
+    """Where --objects OPT puts this design's table: OPT itself for a single design given
+    as *.csv / *.ndjson / *.jsonl, else OPT/<design>.csv."""
+    if not many and opt.lower().endswith((".csv", ".ndjson", ".jsonl")):
+        return opt
+    return os.path.join(opt, os.path.basename(folder.rstrip("\\/")) + ".csv")
+
+
+def series_path_for(opt, folder, many):
+    """Where --series OPT puts this design's arrays: OPT itself for a single design
+    given as *.npz, else OPT/<design>.npz."""
+    if not many and opt.lower().endswith(".npz"):
+        return opt
+    return os.path.join(opt, os.path.basename(folder.rstrip("\\/")) + ".npz")
+
+
 def print_readout(result, no_body):
     a, b = result["part_a"], result["part_b"]
     def gv(d, k, dflt="-"): return d.get(k, dflt)
@@ -506,44 +3017,79 @@ def print_readout(result, no_body):
               % (gv(a, "total_material_g"), gv(a, "model_material_g"), gv(a, "filament_per_unit_g"), gv(a, "time_per_gram_min")))
         print("  Color changes: %s    Waste/unit: %s g"
               % (gv(a, "color_changes"), gv(a, "waste_per_unit_g")))
-    print("[ PART B  -  from %s ]" % (result["part_b_source"] or "(no 3mf)"))
+    plates = result.get("plates") or []
+    print("[ PART B  -  from %s ]%s" % (result["part_b_source"] or "(no 3mf)",
+                                       ("   %d plates - totals over all" % len(plates)) if plates else ""))
     if "error" in b:
         print("  %s" % b["error"])
     else:
-        print("  Plate utilization: %s%%   (object %s / available %s mm2)"
-              % (gv(b, "plate_utilization_pct"), gv(b, "object_area_mm2"), gv(b, "available_area_mm2")))
+        print("  Plate utilization: %s%%   (object %s / available %s mm2)%s"
+              % (gv(b, "plate_utilization_pct"), gv(b, "object_area_mm2"), gv(b, "available_area_mm2"),
+                 "   [mesh footprint, %s mm cells]" % b["mesh_resolution_mm"] if "mesh_resolution_mm" in b else ""))
         print("  Print height: %s mm    Layers: %s    Effective layer height: %s mm"
               % (gv(b, "print_height_mm"), gv(b, "total_layers"), gv(b, "effective_layer_height_mm")))
         print("  Color changes per layer: %s   (%s changes / %s layers)"
               % (gv(b, "color_changes_per_layer"), gv(a, "color_changes"), gv(b, "total_layers")))
         print("  Variable layer height: %s" % gv(b, "variable_layer_height"))
-        if not no_body:
+        est = b.get("estimate")
+        if est:
+            ci = est["ci95"]
+            pm = lambda k: (" +-%s" % ci[k]) if ci.get(k) else ""
+            print("  ESTIMATE from %d of %d layers (%s%% of the gcode parsed), 95%% intervals:"
+                  % (est["sampled_layers"], est["layers"], est["parsed_pct"]))
+            print("  Travel: %s%s mm (%s%s%% of motion)   Retractions: %s%s   Z-hops: %s%s"
+                  % (gv(b, "travel_distance_mm"), pm("travel_distance_mm"), gv(b, "travel_ratio_pct"),
+                     pm("travel_ratio_pct"), gv(b, "retractions"), pm("retractions"), gv(b, "z_hops"), pm("z_hops")))
+            mix = ci.get("feature_mix_pct") or {}
+            print("  Feature mix: %s" % ", ".join("%s %s%%%s" % (f, v, (" +-%s" % mix[f]) if mix.get(f) else "")
+                                                  for f, v in b.get("feature_mix_pct", {}).items()))
+        elif not no_body:
             print("  Travel: %s mm / %s moves (%s%% of motion)   Retractions: %s   Z-hops: %s"
                   % (gv(b, "travel_distance_mm"), gv(b, "travel_moves"), gv(b, "travel_ratio_pct"),
                      gv(b, "retractions"), gv(b, "z_hops")))
             print("  Per-layer time: mean %s min (max %s)   Per-object filament: mean %s mm (%s-%s)"
                   % (gv(b, "layer_time_min_mean"), gv(b, "layer_time_min_max"),
                      gv(b, "object_filament_mm_mean"), gv(b, "object_filament_mm_min"), gv(b, "object_filament_mm_max")))
+        for p in plates:
+            print("  Plate %s: utilization %s%%   height %s mm / %s layers%s"
+                  % (p["plate"], gv(p, "plate_utilization_pct"), gv(p, "print_height_mm"), gv(p, "total_layers"),
+                     "" if no_body else "   travel %s mm   retractions %s" % (gv(p, "travel_distance_mm"), gv(p, "retractions"))))
         if b.get("calibration_estimated"):
             sys.stderr.write("\nNOTE: calibration line is an ESTIMATE for this printer (not verified yet); "
                              "utilization may shift slightly once tuned.\n")
 
 
 def print_compact(results):
-    print("Found %d design(s):\n" % len(results))
+    print_compact_header(len(results))
+    for r in results:
+        print_compact_row(r)
+
+
+def print_compact_header(n):
+    print("Found %d design(s):\n" % n)
     print("  %-34s %-4s %-10s %7s %9s %7s %9s" % ("design", "prn", "type", "util%", "wig/day", "t/g", "chg/lyr"))
     print("  " + "-" * 86)
-    for r in results:
-        a = r.get("part_a", {}); b = r.get("part_b", {})
-        pr = b.get("printer") or a.get("printer") or "?"
-        print("  %-34s %-4s %-10s %7s %9s %7s %9s"
-              % (r["design"][:34], pr, str(a.get("file_type", "?"))[:10],
-                 b.get("plate_utilization_pct", "-"), a.get("throughput_wig_day", "-"),
-                 a.get("time_per_gram_min", "-"), b.get("color_changes_per_layer", "-")))
+
+
+def print_compact_row(r):
+    """One design's print_compact line, flushed - the table fills in as designs finish."""
+    a = r.get("part_a", {}); b = r.get("part_b", {})
+    pr = b.get("printer") or a.get("printer") or "?"
+    print("  %-34s %-4s %-10s %7s %9s %7s %9s"
+          % (r["design"][:34], pr, str(a.get("file_type", "?"))[:10],
+             b.get("plate_utilization_pct", "-"), a.get("throughput_wig_day", "-"),
+             a.get("time_per_gram_min", "-"), b.get("color_changes_per_layer", "-")), flush=True)
+
+
+def write_ndjson(obj):
+    """One compact JSON line on stdout, flushed - whoever reads the pipe has it at once."""
+    sys.stdout.write(json.dumps(obj, separators=(",", ":")) + "\n")
+    sys.stdout.flush()
 
 
 def flatten_result(r):
-    row = {"design": r.get("design"), "folder": os.path.normpath(r.get("folder", "")),
+    """The design's CSV row (plate "all": PART A + the whole project's PART B)."""
+    row = {"design": r.get("design"), "folder": os.path.normpath(r.get("folder", "")), "plate": "all",
            "part_a_source": r.get("part_a_source"), "part_b_source": r.get("part_b_source")}
     for sec in ("part_a", "part_b"):
         d = r.get(sec, {})
@@ -553,6 +3099,18 @@ def flatten_result(r):
     return row
 
 
+def flatten_rows(r):
+    """The design row, then one row per plate (just its PART B) for a multi-plate project."""
+    rows = [flatten_result(r)]
+    for p in r.get("plates") or []:
+        row = {k: rows[0][k] for k in ("design", "folder", "part_a_source", "part_b_source")}
+        row["plate"] = p["plate"]
+        for k, v in p.items():
+            if k != "plate": row[k] = json.dumps(v) if isinstance(v, (dict, list)) else v
+        rows.append(row)
+    return rows
+
+
 def load_existing_csv(path):
     if not os.path.isfile(path):
         return []
@@ -561,17 +3119,320 @@ def load_existing_csv(path):
         return list(csv.DictReader(fh))
 
 
+def load_harvest_journal(path):
+    """[design rows] a --csv harvest finished before it was cut short: its .partial journal,
+    one JSON line per design (a torn last line is dropped), or []."""
+    out = []
+    try:
+        with open(path, encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    out.append(json.loads(line))
+                except ValueError:
+                    break
+    except OSError:
+        pass
+    return out
+
+
+def merge_rows(kept, designs):
+    """kept with each design in `designs` (a list of its rows) replacing that design's old
+    rows in place (at its first one); designs new to kept go last, in order."""
+    new = {}
+    for design_rows in designs:
+        new[os.path.normpath(design_rows[0].get("folder", ""))] = design_rows
+    rows = []
+    for r in kept:
+        f = os.path.normpath(r.get("folder", ""))
+        if f not in new: rows.append(r)
+        elif new[f] is not None: rows.extend(new[f]); new[f] = None
+    for design_rows in new.values():
+        if design_rows is not None: rows.extend(design_rows)
+    return rows
+
+
 def write_csv(flat_rows, path):
+    """(Re)write the whole CSV atomically - a crash mid-write leaves the previous file."""
     import csv
     keys = []
     for row in flat_rows:
         for k in row:
             if k not in keys: keys.append(k)
-    with open(path, "w", newline="", encoding="utf-8") as fh:
+    tmp = path + ".tmp"
+    with open(tmp, "w", newline="", encoding="utf-8") as fh:
         w = csv.DictWriter(fh, fieldnames=keys, extrasaction="ignore")
         w.writeheader()
         for row in flat_rows:
             w.writerow(row)
+    os.replace(tmp, path)
+
+
+# =============================================================================
+#  --db : the harvest rows in SQLite - one design upserted at a time, no rewrite
+# =============================================================================
+DB_INDEXED = ("printer", "file_type", "theme")
+DB_JSON = ("per_color_g", "feature_mix_pct", "feature_filament_mm", "prime_tower_bbox", "object_area_by_color_mm2",
+           "object_area_by_object_mm2")
+
+
+def _q(name):
+    return '"%s"' % name.replace('"', '""')
+
+
+class MetricsStore:
+    """The --csv rows in SQLite, table `metrics`, one column per CSV column. A design's
+    rows (design row + plate rows) are replaced together, keyed by folder, keeping the
+    design's place; the caller commits in batches. Columns have no declared type, so a
+    value comes back exactly as stored (the strings of imported CSV rows, the numbers of
+    fresh ones); printer / file_type / theme are indexed; the JSON columns are TEXT
+    checked with json_valid(), for json_extract() / json_each(). Each row keeps its key
+    order (table `schemas`), so export_csv() writes byte for byte what write_csv()
+    would for the same rows."""
+
+    def __init__(self, path):
+        import sqlite3
+        self.path = path
+        self.fresh = not os.path.isfile(path)
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        with self.db:
+            self.db.execute("CREATE TABLE IF NOT EXISTS metrics (_key TEXT NOT NULL, _seq INTEGER NOT NULL, "
+                            "_ord INTEGER NOT NULL, _schema INTEGER NOT NULL, PRIMARY KEY (_key, _seq))")
+            self.db.execute("CREATE INDEX IF NOT EXISTS metrics_ord ON metrics (_ord, _seq)")
+            self.db.execute("CREATE TABLE IF NOT EXISTS schemas (id INTEGER PRIMARY KEY, keys TEXT UNIQUE NOT NULL)")
+        self.cols = {r[1] for r in self.db.execute("PRAGMA table_info(metrics)")}
+        self.schemas = {keys: i for i, keys in self.db.execute("SELECT id, keys FROM schemas")}
+
+    def close(self):
+        self.db.close()
+
+    def commit(self):
+        self.db.commit()
+
+    def _column(self, name):
+        if name in self.cols: return
+        decl = " TEXT CHECK (%s IS NULL OR %s = '' OR json_valid(%s))" % ((_q(name),) * 3) if name in DB_JSON else ""
+        self.db.execute("ALTER TABLE metrics ADD COLUMN %s%s" % (_q(name), decl))
+        if name in DB_INDEXED:
+            self.db.execute("CREATE INDEX IF NOT EXISTS %s ON metrics (%s)" % (_q("metrics_" + name), _q(name)))
+        self.cols.add(name)
+
+    def _schema(self, keys):
+        k = json.dumps(keys)
+        if k not in self.schemas:
+            self.schemas[k] = self.db.execute("INSERT INTO schemas (keys) VALUES (?)", (k,)).lastrowid
+        return self.schemas[k]
+
+    @staticmethod
+    def _value(v):
+        # what csv.DictWriter would write, where SQLite would store it differently
+        if isinstance(v, bool) or (isinstance(v, float) and not math.isfinite(v)): return str(v)
+        if isinstance(v, (dict, list)): return json.dumps(v)
+        return v
+
+    def next_ord(self):
+        return self.db.execute("SELECT COALESCE(MAX(_ord), -1) + 1 FROM metrics").fetchone()[0]
+
+    def upsert(self, rows, ord_=None):
+        """Replace one design's rows (its folder = the key). A design already stored keeps
+        its place; a new one goes at ord_ (default: the end)."""
+        key = os.path.normpath(rows[0].get("folder", ""))
+        old = self.db.execute("SELECT _ord FROM metrics WHERE _key = ? LIMIT 1", (key,)).fetchone()
+        o = old[0] if old else (self.next_ord() if ord_ is None else ord_)
+        self.db.execute("DELETE FROM metrics WHERE _key = ?", (key,))
+        for seq, row in enumerate(rows):
+            keys = list(row)
+            for k in keys: self._column(k)
+            self.db.execute("INSERT INTO metrics (_key, _seq, _ord, _schema, %s) VALUES (?, ?, ?, ?%s)"
+                            % (", ".join(_q(k) for k in keys), ", ?" * len(keys)),
+                            [key, seq, o, self._schema(keys)] + [self._value(row[k]) for k in keys])
+
+    def delete(self, keys):
+        self.db.executemany("DELETE FROM metrics WHERE _key = ?", [(k,) for k in keys])
+
+    def clear(self):
+        with self.db:
+            self.db.execute("DELETE FROM metrics")
+
+    def import_csv(self, path):
+        """Load a --csv file's rows (in order, one transaction). -> rows imported"""
+        rows = load_existing_csv(path)
+        with self.db:
+            group, o = [], self.next_ord()
+            for r in rows + [None]:
+                if group and (r is None or os.path.normpath(r.get("folder", "")) !=
+                              os.path.normpath(group[0].get("folder", ""))):
+                    self.upsert(group, o); o += 1; group = []
+                if r is not None: group.append(r)
+        return len(rows)
+
+    def rows(self, columns=None):
+        """The rows as dicts in CSV order (only `columns`, when given)."""
+        schemas = {i: json.loads(k) for k, i in self.schemas.items()}
+        cols = [c for c in (columns or sorted(self.cols)) if c in self.cols and not c.startswith("_")]
+        if not cols: return
+        for rec in self.db.execute("SELECT _schema, %s FROM metrics ORDER BY _ord, _seq" % ", ".join(map(_q, cols))):
+            vals = dict(zip(cols, rec[1:]))
+            yield {k: vals[k] for k in schemas[rec[0]] if k in vals}
+
+    def design_count(self):
+        return self.db.execute("SELECT COUNT(*) FROM metrics WHERE plate IS NULL OR plate IN ('', 'all')"
+                               if "plate" in self.cols else "SELECT COUNT(DISTINCT _key) FROM metrics").fetchone()[0]
+
+    def export_csv(self, path):
+        """Write the rows as the --csv file (atomically). -> rows written"""
+        import csv
+        schemas = {i: json.loads(k) for k, i in self.schemas.items()}
+        keys, seen = [], set()
+        for (sid,) in self.db.execute("SELECT _schema FROM metrics ORDER BY _ord, _seq"):
+            if sid in seen: continue
+            seen.add(sid)
+            for k in schemas[sid]:
+                if k not in keys: keys.append(k)
+        n = 0
+        tmp = path + ".tmp"
+        with open(tmp, "w", newline="", encoding="utf-8") as fh:
+            w = csv.DictWriter(fh, fieldnames=keys, extrasaction="ignore")
+            w.writeheader()
+            for row in self.rows(keys):
+                w.writerow(row); n += 1
+        os.replace(tmp, path)
+        return n
+
+
+def export_store(store, csv_path):
+    """--export-csv: the store as the --csv file."""
+    if csv_path:
+        sys.stderr.write("Exported %d row(s) -> %s\n" % (store.export_csv(csv_path), csv_path))
+
+
+def update_baselines(rows, csv_path):
+    """--baselines: fold the harvest's new / changed / dropped designs into the Stats-tab
+    baselines (corpus_stats.py keeps the running aggregates; untouched designs cost nothing)."""
+    import corpus_stats
+    try:
+        _, msg = corpus_stats.update_baselines(rows, csv_path)
+    except (OSError, ValueError) as e:
+        msg = "Baselines not updated: %s" % e
+    sys.stderr.write(msg + "\n")
+
+
+# =============================================================================
+#  --csv harvest, optionally fanned out over processes (--jobs N)
+# =============================================================================
+HARVEST_FLUSH_EVERY = 10             # finished designs per --db commit / per append to the CSV's .partial journal
+FINGERPRINT_KEYS = ("src_tsv_size", "src_tsv_mtime", "src_3mf_size", "src_3mf_mtime", "src_gcode_crc")
+
+
+def source_fingerprint(folder):
+    """A harvest row's staleness stamp: TSV + 3mf size / mtime and the gcode CRC (zip
+    central directory only). All strings, so they compare equal to what the CSV reads back."""
+    _, tsv_path, g3_path = find_design_files(folder)
+    t = _stat_key(tsv_path) or [None, "", ""]
+    g = _stat_key(g3_path) or [None, "", ""]
+    try:
+        crc = _gcode_crc(g3_path) if g3_path else None
+    except (OSError, zipfile.BadZipFile):
+        crc = None
+    return dict(zip(FINGERPRINT_KEYS, (str(t[1]), str(t[2]), str(g[1]), str(g[2]),
+                                       "" if crc is None else "%08x" % crc)))
+
+
+def plan_harvest(existing, folders, found, roots):
+    """Split a harvest against the rows already in the CSV.
+      existing - CSV rows;  folders - the designs to harvest (after --select)
+      found    - every design folder discovered under the dropped paths
+      roots    - the dropped paths
+    A row is dropped when its design is gone: it sits under a root we just searched
+    but wasn't found there, or its folder is missing while its parent still exists
+    (a missing parent may just be an unplugged drive - kept).
+    -> (kept rows, {folder: index of its first row in kept}, todo folders, stale count, dropped count)"""
+    norm = lambda f: os.path.normcase(os.path.abspath(f))
+    found = {norm(f) for f in found}
+    roots = [norm(r if os.path.isdir(r) else os.path.dirname(r)) for r in roots]
+    def gone(r):
+        f = r.get("folder") or ""
+        nf = norm(f)
+        if nf in found: return False
+        if any(nf == rt or nf.startswith(rt.rstrip(os.sep) + os.sep) for rt in roots): return True
+        return not os.path.isdir(f) and os.path.isdir(os.path.dirname(os.path.normpath(f)))
+    kept = [r for r in existing if not gone(r)]
+    index = {}
+    for i, r in enumerate(kept):
+        index.setdefault(os.path.normpath(r.get("folder", "")), i)
+    todo, stale = [], 0
+    for f in folders:
+        i = index.get(os.path.normpath(f))
+        if i is None:
+            todo.append(f)
+        elif any(kept[i].get(k) != v for k, v in source_fingerprint(f).items()):
+            todo.append(f); stale += 1
+    return kept, index, todo, stale, len(existing) - len(kept)
+
+
+def _harvest_init(util_source=None, mesh_res=None, index_body_pass=False):
+    # N processes already fill the cores - keep each one's plates single-threaded
+    global PLATE_THREADS, UTIL_SOURCE, MESH_RES_MM, INDEX_BODY_PASS
+    PLATE_THREADS = 1
+    UTIL_SOURCE, MESH_RES_MM = util_source or UTIL_SOURCE, mesh_res or MESH_RES_MM   # (main's, as set by the CLI)
+    INDEX_BODY_PASS = index_body_pass
+    _cache_counts.clear()                # a forked process starts with main's unflushed counts
+
+
+def _harvest_one(folder, want_body, engine, use_cache, series_dir=None, profile=None, names=None, objects_dir=None):
+    """One design's harvest rows (runs in a pool process). -> (rows, None) or (None, error text).
+    The fingerprint is taken BEFORE parsing, so a re-slice mid-parse reads as stale next time.
+    profile: None, or {"dump": dir or None} - the first row then carries "_timings" (popped by the caller).
+    names: the folder's design files as discovery listed them (no listing again in the pool process)."""
+    global LAYER_INDEX
+    if names is not None: _remember_design_files(os.path.normpath(folder), names)
+    LAYER_INDEX = use_cache              # (a fresh pool process never saw main's --no-cache)
+    try:
+        fp = source_fingerprint(folder)
+        sp = series_path_for(series_dir, folder, True) if series_dir else None
+        op = objects_path_for(objects_dir, folder, True) if objects_dir else None
+        if profile is not None:          # timing a cache hit would say nothing
+            r = extract_profiled(folder, want_body, engine, sp, profile.get("dump"), op)
+        elif sp or op:                   # the arrays come out of the parse itself - no cache
+            r = extract_design(folder, want_body, engine, series_path=sp, objects_path=op)
+        else:
+            r = (extract_design_cached if use_cache else extract_design)(folder, want_body=want_body, engine=engine)
+        rows = flatten_rows(r)
+        for row in rows: row.update(fp)
+        if "_timings" in r: rows[0]["_timings"] = r["_timings"]
+        return rows, None
+    except Exception as e:
+        return None, "%s: %s" % (type(e).__name__, e)
+
+
+def _harvest_pooled(*args):
+    """_harvest_one in a pool process, plus the cache counts it ran up (flushed by the main process)."""
+    return _harvest_one(*args) + (_cache_take_counts(),)
+
+
+def harvest(todo, jobs=1, want_body=True, engine="python", use_cache=True, series_dir=None, profile=None,
+            objects_dir=None):
+    """Yield (index into todo, row, error) as each design finishes - in input order when
+    jobs == 1, in completion order otherwise (the caller re-sorts by index)."""
+    if jobs <= 1:
+        for i, folder in enumerate(todo):
+            yield (i,) + _harvest_one(folder, want_body, engine, use_cache, series_dir, profile, None, objects_dir)
+        return
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_harvest_init,
+                             initargs=(UTIL_SOURCE, MESH_RES_MM, INDEX_BODY_PASS)) as pool:
+        futs = {pool.submit(_harvest_pooled, f, want_body, engine, use_cache, series_dir, profile,
+                            _DESIGN_FILES.get(os.path.normpath(f)), objects_dir): i
+                for i, f in enumerate(todo)}
+        for fut in as_completed(futs):
+            try:
+                rows, err, counts = fut.result()
+            except Exception as e:           # the pool process itself died (e.g. out of memory)
+                yield futs[fut], None, "%s: %s" % (type(e).__name__, e)
+                continue
+            _cache_add_counts(counts)
+            yield futs[fut], rows, err
 
 
 def prompt_select(label, items):
@@ -606,8 +3467,64 @@ def interactive_filter(folders):
     sel_tp = prompt_select("Types", tp_items)
     return [f for f, p, t in classified if p in sel_pr and t in sel_tp]
 
+# =============================================================================
+#  --make-pyz : the worker as a zipapp, precompiled
+# =============================================================================
+# Run as a script, this file is compiled from source on every start (a script never
+# gets a __pycache__ entry) - for the editor's one-design calls that is a good share
+# of the run. The zipapp carries the module as an unchecked-hash .pyc, so zipimport
+# loads the bytecode as is. Its __main__ first checks the .py next to the archive: a
+# .pyz older than an edited script would run stale code, so then it runs the .py.
+PYZ_NAME = "design_metrics_worker.pyz"
+_PYZ_MAIN = """\
+import hashlib, os, sys
+BUILT_FROM = %r                  # sha1 of the design_metrics_worker.py this was built from
+if __name__ == "__main__":
+    src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "design_metrics_worker.py")
+    try:
+        with open(src, "rb") as fh:
+            stale = hashlib.sha1(fh.read()).hexdigest() != BUILT_FROM
+    except OSError:
+        stale = False            # shipped on its own
+    if stale:
+        import runpy
+        sys.stderr.write("%%s is older than %%s - running the script (rebuild with --make-pyz)\\n"
+                         %% (os.path.basename(os.path.dirname(__file__)), src))
+        sys.argv[0] = src
+        runpy.run_path(src, run_name="__main__")
+    else:
+        import design_metrics_worker
+        design_metrics_worker.run()
+"""
+
+
+def build_pyz(out=None):
+    """Write the zipapp (default: design_metrics_worker.pyz next to this script) -> its path.
+    Run it as  python design_metrics_worker.pyz <the usual arguments>."""
+    import importlib.util
+    import marshal
+    import tempfile
+    src = os.path.join(_HERE, "design_metrics_worker.py")
+    out = out or os.path.join(_HERE, PYZ_NAME)
+    with open(src, "rb") as fh:
+        source = fh.read()
+    code = compile(source, "design_metrics_worker.py", "exec", dont_inherit=True)
+    pyc = importlib.util.MAGIC_NUMBER + (0b01).to_bytes(4, "little")          # hash-based, unchecked
+    pyc += importlib.util.source_hash(source) + marshal.dumps(code)
+    fd, tmp = tempfile.mkstemp(suffix=".pyz", dir=os.path.dirname(os.path.abspath(out)))
+    with os.fdopen(fd, "wb") as fh:
+        fh.write(b"#!/usr/bin/env python3\n")
+        with zipfile.ZipFile(fh, "w", zipfile.ZIP_STORED) as zf:   # stored: nothing to inflate at start
+            zf.writestr("__main__.py", _PYZ_MAIN % hashlib.sha1(source).hexdigest())
+            zf.writestr("design_metrics_worker.py", source)
+            zf.writestr("design_metrics_worker.pyc", pyc)
+    os.chmod(tmp, 0o755)                                           # (mkstemp's is 0600)
+    os.replace(tmp, out)
+    return out
+
 
 def main():
+    global USE_DIR_INDEX, LAYER_INDEX, INDEX_BODY_PASS, UTIL_SOURCE, MESH_RES_MM
     # The Windows cmd console is cp1252; force utf-8 so a non-cp1252 character in
     # any design name / color / value can never crash a print or progress write.
     for stream in (sys.stdout, sys.stderr):
@@ -619,25 +3536,169 @@ def main():
     ap = argparse.ArgumentParser(description="Per-design metrics: PART A (data file) + PART B (3mf files). "
                                              "Accepts design folders, parent folders (searched recursively), "
                                              "or *.3mf files - one or more.")
-    ap.add_argument("paths", nargs="+", help="Design/parent folders (searched recursively) or *Full.gcode.3mf files.")
+    ap.add_argument("paths", nargs="*", help="Design/parent folders (searched recursively) or *Full.gcode.3mf files.")
     ap.add_argument("--json", action="store_true")
+    ap.add_argument("--ndjson", action="store_true",
+                    help="Like --json, but one compact JSON line per design, written (and flushed) as soon as "
+                         "that design is done - nothing is held back for the end, so memory stays flat.")
     ap.add_argument("--no-body", action="store_true", help="Skip the heavy gcode-body pass.")
+    ap.add_argument("--engine", choices=("python", "bytes", "numpy"), default="python",
+                    help="gcode-body parser: 'python' (line loop), 'bytes' (the same loop over raw "
+                         "chunks, no decode, no dependencies - about 1.2x as fast) or 'numpy' (vectorized, "
+                         "same results, about 1.5x as fast on big plates; needs NumPy). Speed-ups as "
+                         "measured by design_metrics_bench.py suite.")
+    ap.add_argument("--estimate", type=int, metavar="K",
+                    help="Middle ground between --no-body and the full body pass: parse only a stratified "
+                         "sample of K layers (per plate) and extrapolate travel, retractions, z-hops and the "
+                         "feature mix, with 95%% confidence intervals (part_b.estimate). Not for --full / "
+                         "--csv / --db / --series.")
+    ap.add_argument("--layers", metavar="A:B",
+                    help="Body metrics of just layers A..B (1-based, inclusive; A: / :B open-ended) of --plate, "
+                         "from the plate's layer index - inflates up to layer B and parses only the range. "
+                         "The first query on a plate builds the index with a quick scan and caches it.")
+    ap.add_argument("--layer-index", action="store_true",
+                    help="Also record the layer index during every body pass (harvests included), so later "
+                         "--layers queries skip the scan. Costs 10-20%% more time per body pass.")
     ap.add_argument("--full", action="store_true",
                     help="Harvest mode: force the full gcode-body parse and emit the complete superset (implies --json).")
     ap.add_argument("--csv", metavar="NAME.csv",
                     help="Accumulate all designs' full metrics into BambuScripts/data/NAME.csv "
-                         "(appends new designs, skips ones already harvested).")
+                         "(appends new designs, re-parses re-sliced / edited ones, drops removed ones). "
+                         "The CSV is written once, at the end; finished designs go to NAME.csv.partial "
+                         "meanwhile, so an interrupted harvest picks up where it stopped.")
+    ap.add_argument("--db", metavar="NAME.db",
+                    help="Like --csv, but into the SQLite store BambuScripts/data/NAME.db: only new / "
+                         "re-sliced designs are written (upserted by folder, committed in batches), "
+                         "nothing is rewritten. Starts from NAME.csv if there is one.")
+    ap.add_argument("--export-csv", metavar="NAME.csv",
+                    help="With --db: write the store out as BambuScripts/data/NAME.csv (the --csv format, "
+                         "byte for byte). Without paths: just export.")
     ap.add_argument("--overwrite", action="store_true",
-                    help="With --csv: start the file fresh instead of appending.")
+                    help="With --csv / --db: start the file fresh instead of appending.")
+    ap.add_argument("--baselines", action="store_true",
+                    help="With --csv / --db: also update the Stats-tab baselines (data/eff_datasets.json) from "
+                         "the designs that changed - see corpus_stats.py.")
     ap.add_argument("--select", action="store_true",
                     help="Interactively pick which printers / types to harvest before parsing.")
     ap.add_argument("--util-image", metavar="OUT.png",
                     help="Render the plate-utilization overlay (pick.png + zones) for the single "
                          "given design to OUT.png and exit. Cheap (no gcode-body pass).")
+    ap.add_argument("--util-images", metavar="DIR",
+                    help="Batch: render every given design's utilization overlay into DIR (<design>.png / "
+                         ".webp) on --jobs threads, one JSON line per design. Content-addressed in the "
+                         "result cache, so an unchanged design is never rendered twice.")
+    ap.add_argument("--image-format", choices=("png", "webp"),
+                    help="Overlay format (default: --util-image's extension, png for --util-images). "
+                         "WebP is lossless.")
+    ap.add_argument("--compress-level", type=int, metavar="0-9",
+                    help="Overlay compression, 0-9 (default %d = fast PNG; 9 = smallest)." % UTIL_IMAGE_LEVEL)
+    ap.add_argument("--scale", type=int, default=2, metavar="N",
+                    help="Overlay upscale factor over the pick image (default 2, nearest-neighbour).")
     ap.add_argument("--pick-base", metavar="PNG",
                     help="With --util-image: use this image (e.g. the randomized pick) as the "
                          "object colour/alpha base instead of the raw pick_1.png.")
+    ap.add_argument("--plate", type=int, default=1, metavar="N",
+                    help="With --util-image(s) / --layers: which plate of a multi-plate project (default 1).")
+    ap.add_argument("--util-source", choices=("pick", "mesh", "auto"), default=UTIL_SOURCE,
+                    help="Object area for plate utilization: 'pick' (pick_N.png coverage), 'mesh' (the XY "
+                         "footprint of 3D/3dmodel.model's meshes, rasterized at --mesh-res; needs NumPy) or "
+                         "'auto' (default: the pick, the mesh on a 3mf without one).")
+    ap.add_argument("--mesh-res", type=float, default=MESH_RES_MM, metavar="MM",
+                    help="Mesh footprint raster cell, mm (default %s)." % MESH_RES_MM)
+    ap.add_argument("--series", metavar="OUT.npz",
+                    help="Also write per-layer arrays (Z, M73 layer time, extrusion per feature, travel, "
+                         "retractions, z-hops, tool changes) from the same body pass: to OUT.npz for one "
+                         "design, else into the folder OUT as <design>.npz. Uses the numpy engine.")
+    ap.add_argument("--objects", metavar="OUT.csv",
+                    help="Also write the per-object table (filament, extrusion, travel into / within / out of "
+                         "the object, retractions, feed-rate time, layer span, visits - one row per labelled "
+                         "object) from the same body pass: to OUT.csv / OUT.ndjson for one design, else into the "
+                         "folder OUT as <design>.csv. Uses the numpy engine.")
+    ap.add_argument("--profile", action="store_true",
+                    help="Time every extract stage (wall ms, bytes, disk-read share): a _timings block per "
+                         "design in the JSON, and a p50/p95 table on stderr. Bypasses the result cache.")
+    ap.add_argument("--profile-dump", metavar="DIR",
+                    help="With --profile (implied): also write a cProfile dump per design to DIR/<design>.prof.")
+    ap.add_argument("--no-cache", action="store_true",
+                    help="Bypass the on-disk result cache (data/metrics_cache) - always re-parse - and "
+                         "the directory index (data/dir_index.json) - list every folder again.")
+    ap.add_argument("--cache-stats", action="store_true",
+                    help="Report the on-disk result cache (entries, size, hit rate per kind) and exit.")
+    ap.add_argument("--make-pyz", nargs="?", const="", metavar="OUT.pyz",
+                    help="Build the precompiled zipapp (default: %s next to this script) and exit. It "
+                         "starts faster than the script - run it with the same arguments." % PYZ_NAME)
+    ap.add_argument("--serve", action="store_true",
+                    help="Stay resident and answer JSON-lines requests (extract / no-body / util-image) "
+                         "on stdin/stdout, keeping archives open between requests.")
+    ap.add_argument("--paths-from", metavar="FILE",
+                    help="Read more paths, one per line, from FILE ('-' = stdin).")
+    ap.add_argument("--stream", action="store_true",
+                    help="Batch mode: extract all paths on --jobs threads and print one compact JSON line "
+                         "per design as each finishes (with \"path\" as given). Meant for --no-body, "
+                         "e.g. the editor filling every Stats card from one run.")
+    ap.add_argument("--port", type=int, metavar="N",
+                    help="With --serve: listen on 127.0.0.1:N instead of stdin/stdout (0 = any free port).")
+    ap.add_argument("--jobs", type=int, metavar="N",
+                    help="With --csv: parse designs on N processes (0 = one per core; default 1). "
+                         "With --serve / --stream / --util-images: worker threads (default: up to 4).")
     args = ap.parse_args()
+    USE_DIR_INDEX = LAYER_INDEX = not args.no_cache
+    INDEX_BODY_PASS = args.layer_index
+    if not args.mesh_res > 0:
+        ap.error("--mesh-res needs a cell size > 0 mm")
+    UTIL_SOURCE, MESH_RES_MM = args.util_source, args.mesh_res
+    if args.make_pyz is not None:
+        print(build_pyz(args.make_pyz or None))
+        return
+    if args.cache_stats:
+        st = cache_stats()
+        if args.json: print(json.dumps(st, indent=2))
+        else: print_cache_stats(st)
+        return
+    if args.estimate is not None:
+        if args.estimate < ESTIMATE_MIN_K:
+            ap.error("--estimate needs K >= %d" % ESTIMATE_MIN_K)
+        if args.no_body or args.full or args.csv or args.db or args.series or args.objects or args.profile \
+                or args.profile_dump:
+            ap.error("--estimate is a readout / --json / --stream / --serve mode - no --no-body / --full / "
+                     "--csv / --db / --series / --objects / --profile")
+    if args.series or args.objects:
+        if args.no_body:
+            ap.error("--series / --objects need the gcode body pass (drop --no-body)")
+        args.engine = "numpy"
+    if args.engine == "numpy" or args.util_source == "mesh":
+        try:
+            import numpy  # noqa: F401
+        except ImportError:
+            sys.stderr.write("NumPy is required for --engine numpy / --series / --objects / --util-source mesh:"
+                             "  pip install numpy\n")
+            sys.exit(2)
+    if args.serve:
+        serve(args.port, args.jobs, args.engine, not args.no_cache)
+        return
+    if args.paths_from:
+        args.paths = list(args.paths) + read_path_list(args.paths_from)
+    if args.export_csv and not args.db:
+        ap.error("--export-csv needs --db")
+    if args.db and args.csv:
+        ap.error("--db and --csv are alternatives - pick one")
+    data_dir = DATA_DIR
+    if args.db and not args.paths:
+        db_path = os.path.join(data_dir, os.path.basename(args.db))
+        if not os.path.isfile(db_path):
+            sys.stderr.write("No such store: %s\n" % db_path); sys.exit(1)
+        store = MetricsStore(db_path)
+        export_store(store, os.path.join(data_dir, os.path.basename(args.export_csv)) if args.export_csv else None)
+        if args.baselines: update_baselines(store.rows(), db_path)
+        store.close()
+        return
+    if args.stream:
+        if args.series or args.objects or args.csv or args.db or args.util_image:
+            ap.error("--stream is its own output - no --series / --objects / --csv / --db / --util-image")
+        sys.exit(0 if stream_batch(args.paths, not args.no_body, args.engine, not args.no_cache, args.jobs,
+                                   args.estimate) else 1)
+    if not args.paths:
+        ap.error("the following arguments are required: paths")
     if args.full:
         args.json = True
         args.no_body = False
@@ -647,6 +3708,42 @@ def main():
         sys.stderr.write("No design folders found (need a *Full.gcode.3mf). Nothing to do.\n")
         sys.exit(1)
 
+    # --- one layer range per design ---
+    if args.layers:
+        if args.estimate or args.full or args.csv or args.db or args.series or args.objects or args.util_image \
+                or args.util_images:
+            ap.error("--layers is its own output - no --estimate / --full / --csv / --db / --series / --objects / "
+                     "--util-image(s)")
+        try:
+            first, last = parse_layer_range(args.layers)
+        except ValueError as e:
+            ap.error(str(e))
+        results, ok = [], True
+        for folder in folders:
+            g3_path = find_design_files(folder)[2]
+            try:
+                if not g3_path: raise ValueError("no *Full.gcode.3mf")
+                with DesignArchive(g3_path) as arc:
+                    res = layer_range(arc, args.plate, first, last)
+            except Exception as e:
+                sys.stderr.write("  ERROR on %s: %s\n" % (folder, e)); ok = False
+                continue
+            design = os.path.basename(folder.rstrip("\\/"))
+            if args.ndjson: write_ndjson(dict(design=design, folder=folder, **res))
+            elif args.json: results.append(dict(design=design, folder=folder, **res))
+            else: print_layer_range(design, res)
+        if args.json and not args.ndjson:
+            print(json.dumps(results[0] if len(results) == 1 else results, indent=2))
+        sys.exit(0 if ok else 1)
+
+    # --- plate-utilization overlays, batch ---
+    if (args.util_image or args.util_images) and not have_pillow():
+        sys.stderr.write("Pillow is required for --util-image / --util-images:  pip install Pillow\n")
+        sys.exit(2)
+    if args.util_images:
+        sys.exit(0 if render_util_batch(folders, args.util_images, args.plate, args.scale, args.image_format or "png",
+                                        args.compress_level, not args.no_cache, args.jobs) else 1)
+
     # --- plate-utilization overlay image (single design) ---
     if args.util_image:
         folder = folders[0]
@@ -656,11 +3753,21 @@ def main():
         part_a = parse_data_tsv(tsv_path) or {}
         printer = part_a.get("printer") or os.path.basename(folder.rstrip("\\/")).split("_")[0]
         try:
-            ok = render_util_image(zipfile.ZipFile(g3_path), printer, args.util_image, pick_base=args.pick_base)
+            if args.no_cache:
+                with DesignArchive(g3_path) as arc:
+                    ok = render_util_image(arc, printer, args.util_image, args.scale, args.pick_base,
+                                           args.plate, args.image_format, args.compress_level)
+            else:
+                ok, _ = render_util_image_cached(g3_path, printer, args.util_image, args.pick_base, None, args.plate,
+                                                 args.scale, args.image_format, args.compress_level)
         except Exception as e:
             sys.stderr.write("util-image error: %s\n" % e); sys.exit(1)
         sys.exit(0 if ok else 1)
 
+    extract = extract_design if args.no_cache else extract_design_cached
+    profile = {"dump": args.profile_dump} if (args.profile or args.profile_dump) else None
+
+    found = folders
     if args.select:
         print("Scanning %d design(s)..." % len(folders))
         folders = interactive_filter(folders)
@@ -669,53 +3776,150 @@ def main():
             sys.stderr.write("Nothing selected. Done.\n")
             sys.exit(0)
 
-    # --- CSV harvest mode: accumulate, skip already-harvested (parse once) ---
+    # --- SQLite harvest (--db): upsert only the new / changed designs ---
+    if args.db:
+        os.makedirs(data_dir, exist_ok=True)
+        store = MetricsStore(os.path.join(data_dir, os.path.basename(args.db)))
+        legacy = os.path.splitext(store.path)[0] + ".csv"
+        if args.overwrite:
+            store.clear()
+        elif store.fresh and os.path.isfile(legacy):
+            sys.stderr.write("Starting the store from %s (%d rows).\n" % (legacy, store.import_csv(legacy)))
+        existing = list(store.rows(("folder",) + FINGERPRINT_KEYS))
+        kept, _, todo, stale, dropped = plan_harvest(existing, folders, found, args.paths)
+        keep = {os.path.normpath(r.get("folder", "")) for r in kept}
+        with store.db:
+            store.delete({os.path.normpath(r.get("folder", "")) for r in existing} - keep)
+        if existing:
+            sys.stderr.write("%d up to date; %d new, %d changed to parse; %d row(s) of removed designs dropped.\n"
+                             % (len(folders) - len(todo), len(todo) - stale, stale, dropped))
+        jobs = 1 if args.jobs is None else (args.jobs or os.cpu_count() or 1)
+        jobs = max(1, min(jobs, len(todo))) if todo else 1
+        if jobs > 1:
+            sys.stderr.write("Parsing on %d processes.\n" % jobs)
+        base, done, errors, timings = store.next_ord(), 0, 0, []
+        for n, (i, design_rows, err) in enumerate(harvest(todo, jobs, not args.no_body, args.engine, not args.no_cache,
+                                                          args.series, profile, args.objects), 1):
+            sys.stderr.write("[%d/%d] %s\n" % (n, len(todo), os.path.basename(todo[i])))
+            if err:
+                errors += 1
+                sys.stderr.write("  ERROR on %s: %s\n" % (todo[i], err))
+                continue
+            t = design_rows[0].pop("_timings", None)
+            if t: timings.append((os.path.basename(todo[i]), t))
+            store.upsert(design_rows, base + i)          # new designs land in input order, like --csv
+            done += 1
+            if done % HARVEST_FLUSH_EVERY == 0:
+                store.commit()
+        store.commit()
+        if todo or dropped:
+            sys.stderr.write("\nHarvested %d%s; %d total -> %s\n"
+                             % (done, (" (%d failed)" % errors) if errors else "", store.design_count(), store.path))
+        else:
+            sys.stderr.write("Nothing changed in %s.\n" % store.path)
+        export_store(store, os.path.join(data_dir, os.path.basename(args.export_csv)) if args.export_csv else None)
+        if args.baselines: update_baselines(store.rows(), store.path)
+        store.close()
+        print_profile(timings)
+        return
+
+    # --- CSV harvest mode: accumulate; re-parse only new / changed designs ---
     if args.csv:
-        data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
         os.makedirs(data_dir, exist_ok=True)
         out_path = os.path.join(data_dir, os.path.basename(args.csv))
+        journal = out_path + ".partial"     # designs finished since the last CSV write, appended as they come
+        if args.overwrite and os.path.isfile(journal):
+            os.remove(journal)
         existing = [] if args.overwrite else load_existing_csv(out_path)
-        done = {os.path.normpath(r.get("folder", "")) for r in existing}
-        todo = [f for f in folders if os.path.normpath(f) not in done]
-        if len(todo) < len(folders):
-            sys.stderr.write("Skipping %d already-harvested; %d new to parse.\n" % (len(folders) - len(todo), len(todo)))
-        new_rows = []
-        for i, folder in enumerate(todo, 1):
-            sys.stderr.write("[%d/%d] %s\n" % (i, len(todo), os.path.basename(folder)))
-            try:
-                new_rows.append(flatten_result(extract_design(folder, want_body=not args.no_body)))
-            except Exception as e:
-                sys.stderr.write("  ERROR on %s: %s\n" % (folder, e))
-        write_csv(existing + new_rows, out_path)
-        sys.stderr.write("\nHarvested %d new; %d total -> %s\n" % (len(new_rows), len(existing) + len(new_rows), out_path))
+        recovered = load_harvest_journal(journal)
+        if recovered:
+            sys.stderr.write("Picking up %d design(s) an interrupted harvest finished (%s).\n"
+                             % (len(recovered), journal))
+            existing = merge_rows(existing, recovered)
+        kept, index, todo, stale, dropped = plan_harvest(existing, folders, found, args.paths)
+        if existing:
+            sys.stderr.write("%d up to date; %d new, %d changed to parse; %d row(s) of removed designs dropped.\n"
+                             % (len(folders) - len(todo), len(todo) - stale, stale, dropped))
+        if not todo and not dropped and not recovered:
+            sys.stderr.write("Nothing changed - %s left as is.\n" % out_path)
+            if args.baselines: update_baselines(kept, out_path)
+            return
+        jobs = 1 if args.jobs is None else (args.jobs or os.cpu_count() or 1)   # 0 = one per core
+        jobs = max(1, min(jobs, len(todo)))
+        if jobs > 1:
+            sys.stderr.write("Parsing on %d processes.\n" % jobs)
+        done_rows, errors = {}, 0           # todo index -> the design's rows; written in input order
+        timings, batch = [], []
+        with open(journal, "a", encoding="utf-8") as jf:
+            for n, (i, design_rows, err) in enumerate(harvest(todo, jobs, not args.no_body, args.engine,
+                                                              not args.no_cache, args.series, profile, args.objects), 1):
+                sys.stderr.write("[%d/%d] %s\n" % (n, len(todo), os.path.basename(todo[i])))
+                if err:
+                    errors += 1
+                    sys.stderr.write("  ERROR on %s: %s\n" % (todo[i], err))
+                    continue
+                t = design_rows[0].pop("_timings", None)
+                if t: timings.append((os.path.basename(todo[i]), t))
+                done_rows[i] = design_rows
+                batch.append(json.dumps(design_rows) + "\n")
+                if len(batch) >= HARVEST_FLUSH_EVERY:
+                    jf.write("".join(batch)); jf.flush(); batch = []
+        rows = merge_rows(kept, [done_rows[k] for k in sorted(done_rows)])
+        write_csv(rows, out_path)                                  # the one CSV write, atomic
+        os.remove(journal)
+        sys.stderr.write("\nHarvested %d%s; %d total -> %s\n"
+                         % (len(done_rows), (" (%d failed)" % errors) if errors else "",
+                            sum(1 for r in rows if r.get("plate") in (None, "", "all")), out_path))
+        if args.baselines: update_baselines(rows, out_path)
+        print_profile(timings)
         return
 
     # --- readout / json mode ---
-    results = []
+    # --ndjson and the compact table go out design by design; only --json (one document)
+    # and the single-design readout hold on to the results.
+    results, timings = [], []
+    compact = not (args.json or args.ndjson) and len(folders) > 1
+    if compact: print_compact_header(len(folders))
     for i, folder in enumerate(folders, 1):
         if len(folders) > 1:
             sys.stderr.write("[%d/%d] %s\n" % (i, len(folders), os.path.basename(folder)))
         try:
-            results.append(extract_design(folder, want_body=not args.no_body))
+            sp = series_path_for(args.series, folder, len(folders) > 1) if args.series else None
+            op = objects_path_for(args.objects, folder, len(folders) > 1) if args.objects else None
+            if profile is not None:
+                r = extract_profiled(folder, not args.no_body, args.engine, sp, profile["dump"], op)
+                timings.append((r["design"], r["_timings"]))
+            elif sp or op:
+                r = extract_design(folder, True, args.engine, series_path=sp, objects_path=op)
+            else:
+                r = extract(folder, want_body=not args.no_body, engine=args.engine, estimate=args.estimate)
         except Exception as e:
             sys.stderr.write("  ERROR on %s: %s\n" % (folder, e))
+            continue
+        if args.ndjson: write_ndjson(r)
+        elif compact: print_compact_row(r)
+        else: results.append(r)
 
+    if profile is not None:
+        print_profile(timings)
+    if args.ndjson or compact:
+        return
     if args.json:
         print(json.dumps(results[0] if len(results) == 1 else results, indent=2))
     elif len(results) == 1:
         print_readout(results[0], args.no_body)
-    else:
-        print_compact(results)
 
 
-if __name__ == "__main__":
+def run():
+    """main(), with a crash's traceback written to data/last_error.log; the cache hit/miss
+    counts go to _stats.json once, on the way out."""
     try:
         main()
     except SystemExit:
         raise
     except Exception:
         import traceback
-        log = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "last_error.log")
+        log = os.path.join(DATA_DIR, "last_error.log")
         try:
             os.makedirs(os.path.dirname(log), exist_ok=True)
             with open(log, "w", encoding="utf-8") as fh:
@@ -724,3 +3928,9 @@ if __name__ == "__main__":
         except Exception:
             traceback.print_exc()
         sys.exit(1)
+    finally:
+        cache_flush_stats()
+
+
+if __name__ == "__main__":
+    run()
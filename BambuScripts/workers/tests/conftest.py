@@ -0,0 +1,74 @@
+"""Shared fixtures for the design_metrics_worker.py tests: synthetic plates from
+design_metrics_bench.make_design, and the worker's data dir moved to a temp dir so a
+run never touches BambuScripts/data."""
+import os
+import sys
+import zipfile
+
+import pytest
+
+WORKERS = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, WORKERS)
+import design_metrics_bench as bench                    # noqa: E402
+import design_metrics_worker as dmw                     # noqa: E402
+
+
+def engines():
+    """The body engines to compare: numpy only when it is installed."""
+    try:
+        import numpy  # noqa: F401
+        return ("python", "bytes", "numpy")
+    except ImportError:
+        return ("python", "bytes")
+
+
+def g3_of(folder):
+    return dmw.find_design_files(folder)[2]
+
+
+def body_of(g3, engine):
+    """gcode_body over g3 (the archive closed afterwards)."""
+    with dmw.DesignArchive(g3) as arc:
+        return dmw.gcode_body(arc, engine)
+
+
+def rewrite_gcode(g3, fn):
+    """Replace plate_1.gcode in g3 with fn(its bytes)."""
+    with zipfile.ZipFile(g3) as z:
+        members = [(zi, z.read(zi)) for zi in z.infolist()]
+    with zipfile.ZipFile(g3, "w", zipfile.ZIP_DEFLATED) as z:
+        for zi, b in members:
+            z.writestr(zi, fn(b) if zi.filename == "Metadata/plate_1.gcode" else b)
+
+
+@pytest.fixture(scope="session")
+def corpus(tmp_path_factory):
+    """(root, [design folders]) - two small plates with colour changes."""
+    root = str(tmp_path_factory.mktemp("corpus"))
+    return root, bench.make_corpus(root, 2, layers=30, objects=6, colors=3, toolchange_every=4, pick_px=128)
+
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path, monkeypatch):
+    """Point the worker's data dir (CSV / DB / cache / layer and dir indexes) at a temp dir,
+    with no cache counts or discovery state carried over."""
+    d = str(tmp_path / "data")
+    monkeypatch.setattr(dmw, "DATA_DIR", d)
+    monkeypatch.setattr(dmw, "CACHE_DIR", os.path.join(d, "metrics_cache"))
+    monkeypatch.setattr(dmw, "DIR_INDEX_PATH", os.path.join(d, "dir_index.json"))
+    monkeypatch.setattr(dmw, "_cache_counts", {})
+    monkeypatch.setattr(dmw, "_DESIGN_FILES", {})
+    monkeypatch.setattr(dmw, "_dir_index", None)
+    return d
+
+
+@pytest.fixture
+def run_main(monkeypatch):
+    """run_main(*argv): the worker's CLI, in process (the module globals its flags set
+    are put back afterwards)."""
+    def run(*argv):
+        for name in ("USE_DIR_INDEX", "LAYER_INDEX", "INDEX_BODY_PASS", "UTIL_SOURCE", "MESH_RES_MM"):
+            monkeypatch.setattr(dmw, name, getattr(dmw, name))
+        monkeypatch.setattr(sys, "argv", ["design_metrics_worker.py"] + list(argv))
+        dmw.main()
+    return run
@@ -0,0 +1,65 @@
+"""DesignArchive handles: closed by close() / the with block, by extract_design when it
+opened the archive itself, and by --serve once one leaves its LRU of warm archives."""
+import pytest
+
+import design_metrics_worker as dmw
+from conftest import g3_of
+
+
+def _closed(arc):
+    return arc.zf.fp is None
+
+
+def test_close_keeps_an_open_stream(corpus):
+    with dmw.DesignArchive(g3_of(corpus[1][0])) as arc:
+        head = arc.read("Metadata/plate_1.json")
+        fh = arc.open("Metadata/plate_1.gcode")
+    assert _closed(arc)
+    assert fh.read(64) and head == arc.read("Metadata/plate_1.json")   # parsed before: still there
+    fh.close()
+    with pytest.raises(ValueError):
+        arc.read("Metadata/pick_1.png")
+
+
+def test_profiled_archive_closes_its_file(corpus):
+    io = [0.0, 0]
+    arc = dmw.DesignArchive(g3_of(corpus[1][0]), io)
+    arc.read("Metadata/plate_1.json")
+    arc.close()
+    assert arc._fh.closed and io[1] > 0
+
+
+def test_extract_design_closes_only_its_own(corpus, monkeypatch):
+    opened = []
+    real = dmw.DesignArchive
+    monkeypatch.setattr(dmw, "DesignArchive", lambda *a: opened.append(real(*a)) or opened[-1])
+    dmw.extract_design(corpus[1][0], False)
+    assert len(opened) == 1 and _closed(opened[0])
+    with real(g3_of(corpus[1][0])) as arc:
+        dmw.extract_design(corpus[1][0], False, arc=arc)
+        assert not _closed(arc)
+
+
+@pytest.fixture
+def warm(monkeypatch):
+    monkeypatch.setattr(dmw, "_warm", {})
+    monkeypatch.setattr(dmw, "_warm_users", {})
+    monkeypatch.setattr(dmw, "SERVE_MAX_OPEN", 1)
+
+
+def test_serve_closes_what_leaves_the_lru(corpus, warm):
+    a, b = corpus[1]
+    dmw.serve_request({"op": "no-body", "path": a}, use_cache=False)
+    first = next(iter(dmw._warm.values()))[2]
+    assert not _closed(first)
+    dmw.serve_request({"op": "no-body", "path": b}, use_cache=False)
+    assert _closed(first) and len(dmw._warm) == 1
+    dmw._warm_clear()
+    assert dmw._warm == {}
+
+
+def test_serve_defers_closing_one_in_use(corpus, warm):
+    with dmw._warm_archive(g3_of(corpus[1][0])) as arc:
+        dmw.serve_request({"op": "no-body", "path": corpus[1][1]}, use_cache=False)
+        assert not _closed(arc)                           # dropped from the LRU, still being read
+    assert _closed(arc) and dmw._warm_users == {}
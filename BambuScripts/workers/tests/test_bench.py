@@ -0,0 +1,59 @@
+"""design_metrics_bench.py: the synthetic plates read back with the layers / objects /
+colours they were made with, and the suite times every stage and flags a regression
+against a baseline."""
+import json
+import sys
+
+import pytest
+
+import design_metrics_bench as bench
+import design_metrics_worker as dmw
+
+
+@pytest.mark.parametrize("layers,objects,colors,every", [(12, 3, 1, 5), (12, 5, 4, 3), (20, 11, 2, 1)])
+def test_make_design_scales(tmp_path, layers, objects, colors, every):
+    folder = bench.make_design(str(tmp_path), layers=layers, objects=objects, colors=colors,
+                               toolchange_every=every, pick_px=64)
+    r = dmw.extract_design(folder)
+    a, b = r["part_a"], r["part_b"]
+    assert b["total_layers"] == b["layers_gcode"] == layers and b["print_height_mm"] == pytest.approx(layers * 0.2)
+    assert b["object_count_gcode"] == objects and a["objects_pre_merge"] == objects
+    assert b["tool_changes_gcode"] == 1 + (-(-layers // every) if colors > 1 else 0)   # + the purge line's T0
+    assert a["colors_used"] == colors
+    if dmw.have_pillow():
+        assert b["objects_on_plate"] == objects and 0 < b["plate_utilization_pct"] < 100
+
+
+def test_make_corpus_seeds_differ(tmp_path):
+    folders = bench.make_corpus(str(tmp_path), 2, layers=5, objects=2, pick_px=32)
+    bodies = [dmw.extract_design(f)["part_b"] for f in folders]
+    assert bodies[0]["layers_gcode"] == bodies[1]["layers_gcode"] == 5
+    assert bodies[0]["travel_distance_mm"] != bodies[1]["travel_distance_mm"]
+
+
+def test_suite_times_every_stage(tmp_path, monkeypatch, capsys):
+    base = str(tmp_path / "baseline.json")
+    monkeypatch.setattr(sys, "argv", ["design_metrics_bench.py", "suite", "--designs", "1", "--layers", "6",
+                                      "--objects", "2", "--pick-px", "32", "--repeat", "1", "--save", base])
+    with pytest.raises(SystemExit) as e:
+        bench.main()
+    assert e.value.code == 0 and "Baseline saved" in capsys.readouterr().out
+    with open(base, encoding="utf-8") as fh:
+        res = json.load(fh)
+    engines = bench._engines()
+    want = {"parse_data_tsv", "plate_utilization", "gcode_header"}
+    want |= {"%s[%s]" % (s, e) for s in ("gcode_body", "harvest") for e in engines}
+    assert set(res["stages"]) == want and res["params"]["layers"] == 6
+    for r in res["stages"].values():
+        assert r["seconds"] > 0 and r["designs_per_s"] > 0
+    assert res["stages"]["gcode_header"]["mb_per_s"] is None and res["stages"]["gcode_body[python]"]["mb_per_s"] > 0
+
+
+def test_print_suite_flags_regressions(capsys):
+    res = {"stages": {"slow": {"seconds": 1.0, "designs_per_s": 1.0, "mb_per_s": 1.0},
+                      "noise": {"seconds": 0.004, "designs_per_s": 250.0, "mb_per_s": None},
+                      "fast": {"seconds": 0.5, "designs_per_s": 2.0, "mb_per_s": 2.0}}}
+    base = {"stages": {"slow": {"seconds": 0.5}, "noise": {"seconds": 0.001}, "fast": {"seconds": 0.5}}}
+    assert bench.print_suite(res, base, 0.15) == ["slow"]          # 2x slower; "noise" is under NOISE_S
+    assert "REGRESSION" in capsys.readouterr().out
+    assert bench.print_suite(res) == []
@@ -0,0 +1,53 @@
+"""The persistent result cache: keys follow the sources, a hit returns what the miss
+stored, and the hit/miss counts reach _stats.json once per run - from the --jobs pool
+processes too."""
+import json
+import os
+import shutil
+
+import design_metrics_worker as dmw
+from conftest import rewrite_gcode
+
+
+def test_cache_key(corpus, tmp_path):
+    folder = shutil.copytree(corpus[1][0], str(tmp_path / "d"))
+    _, tsv, g3 = dmw.find_design_files(folder)
+    key = dmw.cache_key("full", g3, tsv, ["bytes"])
+    assert key == dmw.cache_key("full", g3, tsv, ["bytes"])
+    assert key != dmw.cache_key("full", g3, tsv, ["numpy"])
+    assert key != dmw.cache_key("nobody", g3, tsv, ["bytes"])
+    rewrite_gcode(g3, lambda b: b + b"; re-sliced\n")
+    assert key != dmw.cache_key("full", g3, tsv, ["bytes"])
+
+
+def test_hit_returns_the_stored_result(corpus):
+    folder = corpus[1][0]
+    miss = dmw.extract_design_cached(folder, True, "bytes")
+    hit = dmw.extract_design_cached(folder, True, "bytes")
+    assert json.dumps(hit, sort_keys=True) == json.dumps(miss, sort_keys=True)
+    assert dmw._cache_counts["full"] == [1, 1]
+
+
+def _stats(data_dir):
+    with open(os.path.join(data_dir, "metrics_cache", "_stats.json"), encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def test_counts_are_flushed_once(corpus, data_dir):
+    for _ in range(3):
+        dmw.extract_design_cached(corpus[1][0], False)
+    assert not os.path.exists(os.path.join(data_dir, "metrics_cache", "_stats.json"))
+    dmw.cache_flush_stats()
+    assert _stats(data_dir)["nobody"] == {"hits": 2, "misses": 1}
+    dmw.extract_design_cached(corpus[1][0], False)
+    dmw.cache_flush_stats()                               # added to the file, not replacing it
+    assert _stats(data_dir)["nobody"] == {"hits": 3, "misses": 1}
+    assert dmw.cache_stats()["kinds"]["nobody"]["hits"] == 3
+
+
+def test_pool_processes_hand_back_their_counts(corpus, data_dir, run_main):
+    n = len(corpus[1])
+    run_main(corpus[0], "--csv", "m.csv", "--no-body", "--jobs", "2")
+    run_main(corpus[0], "--csv", "m.csv", "--no-body", "--jobs", "2", "--overwrite")
+    dmw.cache_flush_stats()
+    assert _stats(data_dir)["nobody"] == {"hits": n, "misses": n}
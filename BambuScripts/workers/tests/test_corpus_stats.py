@@ -0,0 +1,86 @@
+"""corpus_stats.py: the running aggregates match a from-scratch pass, an update parses
+only the designs whose fingerprint moved, and the percentile sketch stays within
+SKETCH_ACCURACY in bounded space."""
+import json
+import math
+import random
+
+import pytest
+
+import corpus_stats as cs
+
+
+def _rows(n, seed=1):
+    rng = random.Random(seed)
+    out = []
+    for i in range(n):
+        r = {"folder": "d%d" % i, "printer": rng.choice(("X1C", "P1S")), "file_type": "STANDARD", "plate": "",
+             "src_3mf_size": str(1000 + i), "src_gcode_crc": str(i)}
+        for v in cs.VARS:
+            r[v["col"]] = "%.3f" % rng.lognormvariate(2, 0.6)
+        r["color_changes"] = str(rng.randint(0, 12))
+        out.append(r)
+    return out
+
+
+def _exact(values, q):
+    v = sorted(values)
+    pos = q / 100.0 * (len(v) - 1)
+    i = int(pos)
+    return v[i] if i + 1 >= len(v) else v[i] + (v[i + 1] - v[i]) * (pos - i)
+
+
+def test_moments_and_percentiles(tmp_path):
+    rows = _rows(300)
+    st, _ = cs.update_baselines(rows, "m.csv", str(tmp_path / "out.json"), str(tmp_path / "state.json"),
+                                min_rows=10)
+    ds = st.eff_datasets(10)["X1C|STANDARD"]
+    mine = [r for r in rows if r["printer"] == "X1C"]
+    pt = [float(r["print_time_h"]) for r in mine]
+    var = next(v for v in ds["Vars"] if v["Key"] == "print_time")
+    mean = sum(pt) / len(pt)
+    assert ds["N"] == len(mine) and var["Baseline"] == pytest.approx(mean, abs=1e-4)
+    assert var["Sd"] == pytest.approx(math.sqrt(sum((x - mean) ** 2 for x in pt) / len(pt)), abs=1e-4)
+    for q in cs.PERCENTILES:
+        assert var["P%d" % q] == pytest.approx(_exact(pt, q), rel=cs.SKETCH_ACCURACY + 1e-4), q
+
+
+def test_incremental_matches_rebuild(tmp_path):
+    out, state = str(tmp_path / "out.json"), str(tmp_path / "state.json")
+    rows = _rows(200)
+    cs.update_baselines(rows, "m.csv", out, state, min_rows=10)
+    rows = [dict(r) for r in rows[30:]]
+    for r in rows[:25]:
+        r["print_time_h"] = "7.25"; r["src_3mf_size"] += "0"    # re-sliced
+    _, msg = cs.update_baselines(rows, "m.csv", out, state, min_rows=10)
+    assert "0 new, 25 changed, 30 removed" in msg
+    with open(out, encoding="utf-8") as fh:
+        incremental = json.load(fh)
+    cs.update_baselines(rows, "m.csv", out, str(tmp_path / "fresh.json"), rebuild=True, min_rows=10)
+    with open(out, encoding="utf-8") as fh:
+        assert json.load(fh) == incremental
+
+
+def test_unchanged_fingerprint_is_not_parsed(monkeypatch):
+    st = cs.CorpusStats()
+    rows = _rows(50)
+    st.sync(rows)
+    parsed = []
+    real = cs.row_values
+    monkeypatch.setattr(cs, "row_values", lambda row: parsed.append(row["folder"]) or real(row))
+    rows[3]["src_gcode_crc"] = "changed"
+    assert st.sync(rows) == (0, 0, 0) and parsed == ["d3"]    # same values: re-stamped, not counted
+
+
+def test_sketch_is_bounded():
+    sk = cs._Sketch()
+    for i in range(100000):
+        sk.add(1.0 + (i % 1000) / 100.0)                      # 1.0 .. 11.0
+    assert len(sk.counts) <= math.log(11.0) / cs._LOG_GAMMA + 2
+    for i in range(100000):
+        sk.remove(1.0 + (i % 1000) / 100.0)
+    assert sk.counts == {} and sk.percentile(50) is None
+    for x in (0, 0, 0, -2.0, 4.0):
+        sk.add(x)
+    assert sk.percentile(0) == pytest.approx(-2.0, rel=cs.SKETCH_ACCURACY)
+    assert sk.percentile(50) == 0.0 and sk.percentile(100) == pytest.approx(4.0, rel=cs.SKETCH_ACCURACY)
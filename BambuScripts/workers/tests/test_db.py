@@ -0,0 +1,46 @@
+"""--db: the SQLite store upserts one design at a time and exports the same bytes the
+--csv harvest writes."""
+import os
+import shutil
+
+import design_metrics_worker as dmw
+
+
+def test_db_export_matches_csv(corpus, data_dir, run_main):
+    root = corpus[0]
+    run_main(root, "--csv", "m.csv", "--no-cache")
+    run_main(root, "--db", "m2.db", "--export-csv", "m2.csv", "--no-cache")
+    with open(os.path.join(data_dir, "m.csv"), "rb") as a, open(os.path.join(data_dir, "m2.csv"), "rb") as b:
+        csv_bytes = a.read()
+        assert csv_bytes == b.read()
+    assert csv_bytes.count(b"\n") == 1 + len(corpus[1])
+
+
+def test_upsert_replaces_in_place(tmp_path):
+    store = dmw.MetricsStore(str(tmp_path / "m.db"))
+    try:
+        store.upsert([{"folder": "a", "v": 1}, {"folder": "a", "plate": 1, "v": 1}])
+        store.upsert([{"folder": "b", "v": 1, "extra": "x"}])
+        store.upsert([{"folder": "a", "v": 2}])                    # re-parsed: one row now, still first
+        store.commit()
+        assert [(r["folder"], r["v"]) for r in store.rows(("folder", "v"))] == [("a", 2), ("b", 1)]
+        assert store.design_count() == 2
+        store.delete({"b"})
+        assert [r["folder"] for r in store.rows(("folder",))] == ["a"]
+    finally:
+        store.close()
+
+
+def test_store_starts_from_the_csv_and_drops_removed(corpus, tmp_path, data_dir, run_main, capsys):
+    root = shutil.copytree(corpus[0], str(tmp_path / "c"))
+    run_main(root, "--csv", "m.csv", "--no-body", "--no-cache")
+    capsys.readouterr()
+    run_main(root, "--db", "m.db", "--no-body", "--no-cache")       # picks up m.csv, nothing to parse
+    err = capsys.readouterr().err
+    assert "Starting the store from" in err and "Nothing changed" in err
+    gone = sorted(dmw.find_design_folders([root]))[0]
+    shutil.rmtree(gone)
+    run_main(root, "--db", "m.db", "--no-body", "--no-cache", "--export-csv", "out.csv")
+    with open(os.path.join(data_dir, "out.csv"), encoding="utf-8") as fh:
+        text = fh.read()
+    assert os.path.basename(gone) not in text and text.count("\n") == 1 + len(corpus[1]) - 1
@@ -0,0 +1,44 @@
+"""Cold-start gate for design_metrics_worker.py: the editor spawns it once per design,
+so the heavy modules must stay lazy, and a bare import and a --no-body readout must stay
+inside the bench's budgets. The same checks as `design_metrics_bench.py startup`.
+The timed ones only run with DMW_TIMING_TESTS=1 (on a quiet machine) - wall-clock
+budgets flake on shared CI runners."""
+import os
+import subprocess
+import sys
+
+import pytest
+
+WORKERS = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, WORKERS)
+import design_metrics_bench as bench                    # noqa: E402
+
+REPEAT = 3
+timed = pytest.mark.skipif(os.environ.get("DMW_TIMING_TESTS") != "1",
+                           reason="wall-clock budget - set DMW_TIMING_TESTS=1 to run")
+PROBE = ("import sys; sys.path.insert(0, %r); import design_metrics_worker; "
+         "print(' '.join(m for m in %r if m in sys.modules))" % (WORKERS, bench.LAZY_MODULES))
+
+
+def test_bare_import_loads_no_heavy_module():
+    out = subprocess.run([sys.executable, "-c", PROBE], capture_output=True, text=True, check=True).stdout
+    assert out.split() == []
+
+
+@timed
+def test_cold_import_within_budget():
+    ms = bench._cold([sys.executable, "-c", PROBE], REPEAT) * 1e3
+    assert ms <= bench.IMPORT_BUDGET_MS, "cold import %.0f ms > %d ms" % (ms, bench.IMPORT_BUDGET_MS)
+
+
+@pytest.fixture(scope="module")
+def small_design(tmp_path_factory):
+    return bench.make_design(str(tmp_path_factory.mktemp("startup")), layers=20, objects=4)
+
+
+@timed
+def test_no_body_readout_within_budget(small_design):
+    cmd = [sys.executable, os.path.join(WORKERS, "design_metrics_worker.py"), small_design,
+           "--no-body", "--no-cache", "--json"]
+    ms = bench._cold(cmd, REPEAT) * 1e3
+    assert ms <= bench.STARTUP_BUDGET_MS, "--no-body readout %.0f ms > %d ms" % (ms, bench.STARTUP_BUDGET_MS)
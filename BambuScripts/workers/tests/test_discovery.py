@@ -0,0 +1,47 @@
+"""Design-folder discovery: the scandir walk finds what os.walk would, hands each folder's
+files to find_design_files, keeps that map bounded, and relists only changed directories."""
+import os
+import shutil
+
+import design_metrics_worker as dmw
+
+
+def _walk(root):
+    return sorted(os.path.normpath(d) for d, _, files in os.walk(root)
+                  if any(f.lower().endswith("full.gcode.3mf") for f in files))
+
+
+def test_finds_what_os_walk_finds(corpus, tmp_path):
+    root = shutil.copytree(corpus[0], str(tmp_path / "c"))
+    os.makedirs(os.path.join(root, "empty", "deeper"))
+    assert sorted(dmw.find_design_folders([root])) == _walk(root)
+    g3 = dmw.find_design_files(dmw.find_design_folders([root])[0])[2]
+    assert dmw.find_design_folders([g3]) == [os.path.dirname(g3)]
+
+
+def test_design_files_come_from_the_listing(corpus, monkeypatch):
+    folder = dmw.find_design_folders([corpus[0]])[0]
+    def no_listing(*a):
+        raise AssertionError("listed again")
+    monkeypatch.setattr(dmw.os, "scandir", no_listing)
+    _, tsv, g3 = dmw.find_design_files(folder)
+    assert tsv.endswith("_Data.tsv") and g3.endswith("Full.gcode.3mf")
+
+
+def test_design_files_map_is_bounded(corpus, monkeypatch):
+    monkeypatch.setattr(dmw, "DESIGN_FILES_MAX", 1)
+    folders = dmw.find_design_folders([corpus[0]])
+    assert len(folders) == 2 and list(dmw._DESIGN_FILES) == [folders[-1]]
+    assert dmw.find_design_files(folders[0])[2]           # dropped: listed again
+
+
+def test_unchanged_dirs_are_not_listed_again(corpus, tmp_path, monkeypatch):
+    root = shutil.copytree(corpus[0], str(tmp_path / "c"))
+    monkeypatch.setattr(dmw, "DIR_INDEX_SETTLE_NS", -10 ** 12)
+    first = dmw.find_design_folders([root])
+    listed = []
+    real = dmw.os.scandir
+    monkeypatch.setattr(dmw.os, "scandir", lambda d: listed.append(d) or real(d))
+    assert dmw.find_design_folders([root]) == first and listed == []
+    shutil.rmtree(first[0]); del listed[:]
+    assert dmw.find_design_folders([root]) == first[1:] and listed == [root]
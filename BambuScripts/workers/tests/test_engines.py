@@ -0,0 +1,95 @@
+"""The three gcode-body engines (python / bytes / numpy) give identical results - on
+the synthetic plates and on generated gcode with the odd corners real files have."""
+import io
+import os
+import random
+import shutil
+
+import pytest
+
+import design_metrics_worker as dmw
+from conftest import body_of, engines, g3_of, rewrite_gcode
+
+LINES = ("; FEATURE: Outer wall", "; FEATURE: Sparse infill", "; FEATURE: Prime tower", "; CHANGE_LAYER",
+         "; Z_HEIGHT: 0.4", "M83", "M82", "M73 P10 R42", "T1", "G92 E0", "; just a comment", "",
+         "; start printing object, unique label id: 7", "; stop printing object, unique label id: 7",
+         "; CONFIG_BLOCK_START", "; CONFIG_BLOCK_END")
+NUMBERS = ("%.3f", "%d", ".%d", "-%.2f", "1e2", "+5", "5.", "123.456789", "abc", "", "-.8", "0")
+
+
+def gcode(seed):
+    """Random gcode: CRLF or LF, tabs and runs of spaces between words, inline
+    comments, number spellings float() takes and ones it doesn't, and half the time
+    no newline after the last line."""
+    rnd = random.Random(seed)
+    nl = rnd.choice(("\n", "\r\n"))
+    out = []
+    for _ in range(rnd.randrange(60)):
+        if rnd.random() < 0.55:
+            words = []
+            for _ in range(rnd.randrange(5)):
+                f = rnd.choice(NUMBERS)
+                words.append(rnd.choice("XYZEF") + (f % rnd.uniform(0, 250) if "%" in f else f))
+            line = rnd.choice(("G1", "G0")) + "".join(rnd.choice((" ", " ", "\t", "  ")) + w for w in words)
+            if rnd.random() < 0.2:
+                line += " ; note X9"
+        else:
+            line = rnd.choice(LINES)
+        out.append(line)
+    text = nl.join(out) + (nl if rnd.random() < 0.5 else "")
+    return text.encode("utf-8")
+
+
+def body(data, engine):
+    for kind, out in dmw._gcode_stream(io.BytesIO(data), True, engine, False):
+        if kind == "body":
+            return out
+
+
+def test_engines_agree(corpus):
+    for folder in corpus[1]:
+        ref = body_of(g3_of(folder), "python")
+        for e in engines()[1:]:
+            assert body_of(g3_of(folder), e) == ref, e
+
+
+def test_engines_agree_on_crlf(corpus, tmp_path):
+    folder = shutil.copytree(corpus[1][0], str(tmp_path / os.path.basename(corpus[1][0])))
+    rewrite_gcode(g3_of(folder), lambda b: b.replace(b"\n", b"\r\n"))
+    ref = body_of(g3_of(folder), "python")
+    assert ref["travel_moves"] > 0
+    for e in engines()[1:]:
+        assert body_of(g3_of(folder), e) == ref, e
+
+
+@pytest.mark.parametrize("seed", range(300))
+def test_engines_agree_on_varied_gcode(seed):
+    data = gcode(seed)
+    ref = body(data, "python")
+    for e in engines()[1:]:
+        assert body(data, e) == ref, (e, data)
+
+
+@pytest.mark.parametrize("data", [b"G1 X5\n", b"G1 X9", b"G1 X1 Y1\nG1 X9", b"G1 X1 Y1 E.5\r\nG1 X9 E1"])
+def test_short_and_unterminated_moves(data):
+    ref = body(data, "python")
+    for e in engines()[1:]:
+        assert body(data, e) == ref, e
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_bytes_engine_any_chunking(seed):
+    """Lines cut anywhere between chunks (mid-number, between \\r and \\n) parse the same."""
+    data = gcode(seed)
+    rnd = random.Random(seed)
+    cuts = sorted(rnd.sample(range(len(data) + 1), min(len(data) + 1, rnd.randrange(1, 40))))
+    chunks = [data[a:b] for a, b in zip([0] + cuts, cuts + [len(data)])]
+    assert dmw._body_chunks(iter(chunks)) == dmw._body_chunks(iter([data]))
+
+
+@pytest.mark.parametrize("size", [1, 7, 4096])
+def test_bytes_engine_small_reads(corpus, monkeypatch, size):
+    g3 = g3_of(corpus[1][0])
+    ref = body_of(g3, "python")
+    monkeypatch.setattr(dmw, "BYTES_CHUNK", size)
+    assert body_of(g3, "bytes") == ref
@@ -0,0 +1,57 @@
+"""--estimate K: body metrics from a stratified sample of K layers, with 95% CIs -
+exact when every layer is sampled, cached apart from the full pass, and refused
+with the modes it can't serve."""
+import json
+
+import pytest
+
+import design_metrics_worker as dmw
+from conftest import body_of, g3_of
+
+COUNTS = ("travel_moves", "retractions", "z_hops", "layers_gcode")
+
+
+def _estimate(g3, k):
+    with dmw.DesignArchive(g3) as arc:
+        for kind, out in dmw.gcode_stream(arc, True, "bytes", False, 1, k, False):
+            if kind == "body":
+                return out
+
+
+def test_estimate(corpus):
+    g3 = g3_of(corpus[1][0])
+    whole = body_of(g3, "bytes")
+    every = _estimate(g3, 10 ** 6)                        # every layer sampled: exact, no interval
+    assert every["estimate"]["sampled_layers"] == whole["layers_gcode"] and every["estimate"]["ci95"] == {}
+    for k in COUNTS + ("travel_distance_mm",):
+        assert every[k] == whole[k], k
+    some = _estimate(g3, 8)
+    ci = some["estimate"]["ci95"]
+    assert some["estimate"]["sampled_layers"] == 8 and 0 < some["estimate"]["parsed_pct"] < 100
+    for k in ("travel_distance_mm", "travel_moves", "retractions"):
+        assert abs(some[k] - whole[k]) <= 3 * ci[k] + 1, k
+
+
+def test_estimate_is_cached_by_k(corpus):
+    folder = corpus[1][0]
+    full = dmw.extract_design_cached(folder, True, "bytes")
+    a = dmw.extract_design_cached(folder, True, "bytes", estimate=6)
+    b = dmw.extract_design_cached(folder, True, "bytes", estimate=6)
+    c = dmw.extract_design_cached(folder, True, "bytes", estimate=12)
+    assert "estimate" not in full["part_b"] and a == b
+    assert a["part_b"]["estimate"]["sampled_layers"] == 6 and c["part_b"]["estimate"]["sampled_layers"] == 12
+    assert dmw._cache_counts["estimate"] == [1, 2]
+
+
+def test_cli_readout(corpus, run_main, capsys):
+    run_main(corpus[1][0], "--estimate", "5", "--json", "--no-cache", "--engine", "bytes")
+    out = json.loads(capsys.readouterr().out)
+    assert out["part_b"]["estimate"]["sampled_layers"] == 5
+
+
+@pytest.mark.parametrize("argv", [("--estimate", "1"), ("--estimate", "5", "--no-body"),
+                                  ("--estimate", "5", "--csv", "m.csv")])
+def test_cli_refuses(corpus, run_main, argv):
+    with pytest.raises(SystemExit) as e:
+        run_main(corpus[1][0], *argv)
+    assert e.value.code == 2
@@ -0,0 +1,74 @@
+"""gcode_stream's one pass over plate_N.gcode: the header it yields first is
+gcode_header's, the body after it gcode_body's, the member is opened once per design,
+and without the body the inflate stops right after the header block."""
+import pytest
+
+import design_metrics_worker as dmw
+from conftest import engines, g3_of
+
+
+class _Counted:
+    """A member stream counting the bytes read from it."""
+
+    def __init__(self, fh, log):
+        self._fh = fh; self._log = log
+
+    def read(self, n=-1):
+        b = self._fh.read(n)
+        self._log[-1] += len(b)
+        return b
+
+    def read1(self, n=-1):                       # what TextIOWrapper (the python engine) calls
+        b = self._fh.read1(n)
+        self._log[-1] += len(b)
+        return b
+
+    def __getattr__(self, name):
+        return getattr(self._fh, name)
+
+
+def counted(monkeypatch, arc):
+    """Bytes read from each arc.open() stream, one entry per open."""
+    log, real = [], arc.open
+
+    def open_(name):
+        log.append(0)
+        return _Counted(real(name), log)
+    monkeypatch.setattr(arc, "open", open_)
+    return log
+
+
+@pytest.mark.parametrize("engine", engines())
+def test_header_then_body(corpus, engine):
+    g3 = g3_of(corpus[1][0])
+    with dmw.DesignArchive(g3) as arc:
+        events = list(dmw.gcode_stream(arc, True, engine))
+        header, body = dmw.gcode_header(arc), dmw.gcode_body(arc, engine)
+    assert [k for k, _ in events][:2] == ["header", "body"]
+    assert events[0][1] == header and header["total_layers"] == 30
+    assert events[1][1] == body and body["layers_gcode"] == 30
+
+
+@pytest.mark.parametrize("engine", engines())
+def test_no_body_stops_after_the_header(corpus, monkeypatch, engine):
+    g3 = g3_of(corpus[1][0])
+    with dmw.DesignArchive(g3) as arc:
+        log = counted(monkeypatch, arc)
+        events = list(dmw.gcode_stream(arc, False, engine))
+        size = arc.info("Metadata/plate_1.gcode").file_size
+    assert [k for k, _ in events] == ["header"] and events[0][1]["total_layers"] == 30
+    assert 0 < log[0] <= 2 * dmw.HEADER_CHUNK < size
+
+
+def test_one_open_per_design(corpus, monkeypatch):
+    g3 = g3_of(corpus[1][0])
+    with dmw.DesignArchive(g3) as arc:
+        log = counted(monkeypatch, arc)
+        dmw.extract_design(corpus[1][0], arc=arc)
+        size = arc.info("Metadata/plate_1.gcode").file_size
+    assert log == [size]
+
+
+def test_missing_plate_gcode(corpus):
+    with dmw.DesignArchive(g3_of(corpus[1][0])) as arc:
+        assert list(dmw.gcode_stream(arc, True, plate=9)) == [("header", {}), ("body", {"gcode_body_error": "no plate_9.gcode"})]
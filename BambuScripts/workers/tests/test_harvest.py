@@ -0,0 +1,63 @@
+"""--csv harvest with --jobs: rows in input order whatever the finishing order, one CSV
+write per run, and the .partial journal that lets a cut-short harvest resume."""
+import os
+
+import pytest
+
+import design_metrics_worker as dmw
+
+
+def _csv(data_dir, name="m.csv"):
+    with open(os.path.join(data_dir, name), "rb") as fh:
+        return fh.read()
+
+
+def test_jobs_match_serial(corpus, data_dir, run_main):
+    run_main(corpus[0], "--csv", "a.csv", "--no-body", "--no-cache")
+    run_main(corpus[0], "--csv", "b.csv", "--no-body", "--no-cache", "--jobs", "2")
+    assert _csv(data_dir, "a.csv") == _csv(data_dir, "b.csv")
+
+
+def test_csv_written_once(corpus, data_dir, run_main, monkeypatch):
+    writes = []
+    real = dmw.write_csv
+    monkeypatch.setattr(dmw, "HARVEST_FLUSH_EVERY", 1)
+    monkeypatch.setattr(dmw, "write_csv", lambda rows, path: writes.append(path) or real(rows, path))
+    run_main(corpus[0], "--csv", "m.csv", "--no-body", "--no-cache")
+    assert len(writes) == 1 and not os.path.exists(os.path.join(data_dir, "m.csv.partial"))
+
+
+def test_interrupted_harvest_resumes(corpus, data_dir, run_main, monkeypatch, capsys):
+    run_main(corpus[0], "--csv", "whole.csv", "--no-body", "--no-cache")
+    real = dmw.harvest
+    def dies_after_one(todo, *a):
+        it = real(todo, *a)
+        yield next(it)
+        raise KeyboardInterrupt
+    monkeypatch.setattr(dmw, "HARVEST_FLUSH_EVERY", 1)
+    monkeypatch.setattr(dmw, "harvest", dies_after_one)
+    with pytest.raises(KeyboardInterrupt):
+        run_main(corpus[0], "--csv", "m.csv", "--no-body", "--no-cache")
+    assert not os.path.exists(os.path.join(data_dir, "m.csv"))
+    assert len(dmw.load_harvest_journal(os.path.join(data_dir, "m.csv.partial"))) == 1
+
+    parsed = []
+    monkeypatch.setattr(dmw, "harvest", lambda todo, *a: parsed.extend(todo) or real(todo, *a))
+    capsys.readouterr()
+    run_main(corpus[0], "--csv", "m.csv", "--no-body", "--no-cache")
+    assert "interrupted harvest" in capsys.readouterr().err and len(parsed) == 1
+    assert _csv(data_dir) == _csv(data_dir, "whole.csv")
+    assert not os.path.exists(os.path.join(data_dir, "m.csv.partial"))
+
+
+def test_torn_journal_line_is_dropped(tmp_path):
+    p = tmp_path / "m.csv.partial"
+    p.write_text('[{"folder": "a", "x": 1}]\n[{"folder": "b", "x"', encoding="utf-8")
+    assert dmw.load_harvest_journal(str(p)) == [[{"folder": "a", "x": 1}]]
+    assert dmw.load_harvest_journal(str(tmp_path / "none.partial")) == []
+
+
+def test_merge_rows_replaces_in_place():
+    kept = [{"folder": "a", "v": 1}, {"folder": "b", "v": 1}, {"folder": "b", "plate": 2, "v": 1}]
+    out = dmw.merge_rows(kept, [[{"folder": "c", "v": 2}], [{"folder": "b", "v": 2}]])
+    assert [(r["folder"], r["v"]) for r in out] == [("a", 1), ("b", 2), ("c", 2)]
@@ -0,0 +1,51 @@
+"""--layers A:B and the layer index behind it (layer_index / layer_range)."""
+import os
+
+import pytest
+
+import design_metrics_worker as dmw
+from conftest import body_of, g3_of
+
+COUNTS = ("travel_moves", "retractions", "z_hops", "layers_gcode")
+
+
+def _layer_entries(data_dir):
+    cache = os.path.join(data_dir, "metrics_cache")
+    return [n for n in os.listdir(cache) if n.startswith("layers-")] if os.path.isdir(cache) else []
+
+
+def test_layer_ranges_add_up(corpus):
+    with dmw.DesignArchive(g3_of(corpus[1][0])) as arc:
+        whole = dmw.gcode_body(arc, "bytes")
+        n = whole["layers_gcode"]
+        parts = [dmw.layer_range(arc, 1, 1, 7), dmw.layer_range(arc, 1, 8, n // 2), dmw.layer_range(arc, 1, n // 2 + 1)]
+    for k in COUNTS:
+        assert sum(p[k] for p in parts) == whole[k], k
+    assert sum(p["travel_distance_mm"] for p in parts) == pytest.approx(whole["travel_distance_mm"], abs=0.2)
+    assert [p["layer_range"]["first"] for p in parts] == [1, 8, n // 2 + 1]
+
+
+def test_body_pass_builds_no_index_by_default(corpus, data_dir):
+    body_of(g3_of(corpus[1][0]), "bytes")
+    assert _layer_entries(data_dir) == []
+
+
+def test_layer_index_opt_in(corpus, data_dir, monkeypatch):
+    monkeypatch.setattr(dmw, "INDEX_BODY_PASS", True)
+    g3 = g3_of(corpus[1][0])
+    body_of(g3, "python")
+    assert len(_layer_entries(data_dir)) == 1
+    with dmw.DesignArchive(g3) as arc:
+        recorded = dmw.layer_index(arc)                   # from the cache
+    monkeypatch.setattr(dmw, "LAYER_INDEX", False)
+    with dmw.DesignArchive(g3) as arc:
+        scanned = dmw.layer_index(arc)                    # a scan-only pass
+    assert recorded == scanned and len(recorded["layers"]) == 30
+
+
+def test_layer_range_bounds(corpus):
+    with dmw.DesignArchive(g3_of(corpus[1][0])) as arc, pytest.raises(ValueError):
+        dmw.layer_range(arc, 1, 20, 10)
+    assert dmw.parse_layer_range("5:") == (5, None) and dmw.parse_layer_range("7") == (7, 7)
+    with pytest.raises(ValueError):
+        dmw.parse_layer_range("0:3")
@@ -0,0 +1,135 @@
+"""Plate utilization from the model meshes (--util-source mesh): box footprints come
+out at their exact area, through component transforms and whichever way a surface is
+wound, overlapping instances count once, a non-printable item not at all, and a mesh
+the fast regexes can't read goes through the XML parser to the same answer."""
+import json
+import os
+import shutil
+import zipfile
+
+import pytest
+
+import design_metrics_bench as bench
+import design_metrics_worker as dmw
+from conftest import g3_of
+
+pytest.importorskip("numpy")
+
+CORE = "http://schemas.microsoft.com/3dmanufacturing/core/2015/02"
+PROD = "http://schemas.microsoft.com/3dmanufacturing/production/1015/06"
+BOX_TRIANGLES = ((0, 2, 1), (0, 3, 2), (4, 5, 6), (4, 6, 7), (0, 1, 5), (0, 5, 4),
+                 (1, 2, 6), (1, 6, 5), (2, 3, 7), (2, 7, 6), (3, 0, 4), (3, 4, 7))
+
+
+def mesh(V, T, vertex='<vertex x="%g" y="%g" z="%g"/>'):
+    return ("<mesh><vertices>%s</vertices><triangles>%s</triangles></mesh>"
+            % ("".join(vertex % v for v in V), "".join('<triangle v1="%d" v2="%d" v3="%d"/>' % t for t in T)))
+
+
+def box(w, d, h=5.0, **kw):
+    """A closed, outward-wound w x d x h box centred on the origin."""
+    V = [(x, y, z) for z in (0, h) for x, y in ((-w / 2, -d / 2), (w / 2, -d / 2), (w / 2, d / 2), (-w / 2, d / 2))]
+    return mesh(V, BOX_TRIANGLES, **kw)
+
+
+def model(objects, items):
+    """objects: [(id, name, body xml)]; items: [(id, transform, printable)]."""
+    return ('<?xml version="1.0" encoding="UTF-8"?><model unit="millimeter" xmlns="%s" xmlns:p="%s"><resources>%s'
+            '</resources><build>%s</build></model>'
+            % (CORE, PROD, "".join('<object id="%s" name="%s" type="model">%s</object>' % o for o in objects),
+               "".join('<item objectid="%s" transform="%s" printable="%d"/>' % i for i in items)))
+
+
+def at(x, y):
+    return "1 0 0 0 1 0 0 0 1 %g %g 0" % (x, y)
+
+
+def design_with(corpus, tmp_path, members, drop=()):
+    """A copy of the first corpus design with these members added (name -> text) and `drop` removed."""
+    folder = shutil.copytree(corpus[1][0], str(tmp_path / os.path.basename(corpus[1][0])))
+    g3 = g3_of(folder)
+    with zipfile.ZipFile(g3) as z:
+        keep = [(zi, z.read(zi)) for zi in z.infolist() if zi.filename not in drop]
+    with zipfile.ZipFile(g3, "w", zipfile.ZIP_DEFLATED) as z:
+        for zi, b in keep:
+            z.writestr(zi, b)
+        for name, text in members.items():
+            z.writestr(name, text)
+    return folder
+
+
+def bench_boxes(vertex='<vertex x="%g" y="%g" z="%g"/>', extra_items=()):
+    """The bench plate's six 14 x 14 mm objects as box meshes, placed where plate_1.json has them."""
+    objs, items = [], []
+    for o, (x0, y0, x1, y1) in enumerate(bench._object_boxes(6)):
+        objs.append((str(o + 1), "Body_%d.stl" % o, box(x1 - x0, y1 - y0, vertex=vertex)))
+        items.append((str(o + 1), at((x0 + x1) / 2, (y0 + y1) / 2), 1))
+    return model(objs, items + list(extra_items))
+
+
+def util(folder, res=0.5, source="mesh"):
+    with dmw.DesignArchive(g3_of(folder)) as arc:
+        return dmw.plate_utilization(arc, "X1C", source=source) if source != "mesh" \
+            else dmw.mesh_utilization(arc, "X1C", res=res)
+
+
+def test_boxes_at_their_area(corpus, tmp_path):
+    u = util(design_with(corpus, tmp_path, {dmw.MESH_MODEL: bench_boxes()}))
+    assert u["utilization_source"] == "mesh" and u["mesh_resolution_mm"] == 0.5
+    assert u["object_area_mm2"] == 6 * 196.0 and u["mesh_triangles"] == 6 * 12
+    assert u["object_area_by_object_mm2"] == {"Body_%d.stl" % o: 196.0 for o in range(6)}
+    pick = util(corpus[1][0], source="pick")
+    assert all(u[k] == pick[k] for k in ("available_area_mm2", "bed_area_mm2", "prime_tower_area_mm2",
+                                         "objects_on_plate"))
+    assert u["plate_utilization_pct"] == round(6 * 196.0 / u["available_area_mm2"] * 100, 1)
+
+
+def test_overlapping_instance_counts_once(corpus, tmp_path):
+    x0, y0, x1, y1 = bench._object_boxes(6)[0]
+    extra = [("1", at((x0 + x1) / 2 + 3.5, (y0 + y1) / 2), 1),     # 3/4 over the first object
+             ("2", at(128, 128), 0)]                               # not printable
+    u = util(design_with(corpus, tmp_path, {dmw.MESH_MODEL: bench_boxes(extra_items=extra)}))
+    assert u["object_area_mm2"] == 6 * 196.0 + 3.5 * 14
+
+
+def test_parser_fallback_same_footprint(corpus, tmp_path):
+    fast = util(design_with(corpus, tmp_path / "a", {dmw.MESH_MODEL: bench_boxes()}))
+    slow = util(design_with(corpus, tmp_path / "b",
+                            {dmw.MESH_MODEL: bench_boxes(vertex='<vertex y="%g" x="%g" z="%g"/>')}))
+    assert slow == fast                                            # x / y swapped: square boxes, same cells
+
+
+def test_rotated_component_and_open_surface(corpus, tmp_path):
+    part = model([("5", "part", box(10, 20))], [])
+    tri = mesh([(0, 0, 0), (0, 20, 0), (20, 0, 0)], [(0, 1, 2)])   # open, wound clockwise from above
+    root = model([("1", "rotated", '<components><component p:path="/3D/Objects/part.model" objectid="5" '
+                                  'transform="0 1 0 -1 0 0 0 0 1 0 0 0"/></components>'),
+                  ("2", "sheet", tri)],
+                 [("1", at(60, 60), 1), ("2", at(150, 60), 1)])
+    folder = design_with(corpus, tmp_path, {dmw.MESH_MODEL: root, "3D/Objects/part.model": part})
+    u = util(folder, res=0.25)
+    by = u["object_area_by_object_mm2"]
+    assert by["rotated"] == 200.0 and by["sheet"] == pytest.approx(200.0, rel=0.03)
+    assert u["mesh_triangles"] == 13
+    with dmw.DesignArchive(g3_of(folder)) as arc:
+        grid, names, _, res = dmw.mesh_footprint(arc, 1, 0.25)
+    rows, cols = (grid == names.index("rotated")).nonzero()
+    span = lambda a: (a.max() - a.min() + 1) * res
+    assert (span(cols), span(rows)) == (20, 10)                    # 10 x 20, turned a quarter
+
+
+def test_auto_falls_back_to_the_mesh(corpus, tmp_path):
+    folder = design_with(corpus, tmp_path, {dmw.MESH_MODEL: bench_boxes()}, drop=("Metadata/pick_1.png",))
+    u = util(folder, source="auto")
+    assert u["utilization_source"] == "mesh" and u["object_area_mm2"] == pytest.approx(6 * 196.0, rel=0.01)
+
+
+def test_cli_mesh_res(corpus, tmp_path, run_main, capsys):
+    folder = design_with(corpus, tmp_path, {dmw.MESH_MODEL: bench_boxes()})
+    run_main(folder, "--util-source", "mesh", "--mesh-res", "1", "--no-body", "--json", "--no-cache")
+    b = json.loads(capsys.readouterr().out)["part_b"]
+    assert b["utilization_source"] == "mesh" and b["mesh_resolution_mm"] == 1.0 and b["object_area_mm2"] == 6 * 196.0
+
+
+def test_missing_model(corpus):
+    assert "utilization_error" in util(corpus[1][0])
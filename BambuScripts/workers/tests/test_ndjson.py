@@ -0,0 +1,57 @@
+"""--ndjson: one compact JSON line per design, the same results --json gives, each
+flushed before the next design starts; the compact table likewise goes out row by row."""
+import io
+import json
+import os
+
+import design_metrics_worker as dmw
+
+
+class _Stdout(io.StringIO):
+    """stdout that remembers what had been flushed."""
+
+    def __init__(self):
+        super().__init__()
+        self.flushed = ""
+
+    def flush(self):
+        self.flushed = self.getvalue()
+
+
+def test_same_results_as_json(corpus, run_main, capsys):
+    run_main(*corpus[1], "--json", "--no-cache")
+    doc = json.loads(capsys.readouterr().out)
+    run_main(*corpus[1], "--ndjson", "--no-cache")
+    out = capsys.readouterr().out
+    assert [json.loads(ln) for ln in out.splitlines()] == doc
+    assert len(out.splitlines()) == 2 and all(": " not in ln for ln in out.splitlines())   # compact
+    run_main(corpus[1][0], "--ndjson", "--no-body", "--no-cache")
+    run_main(corpus[1][0], "--json", "--no-body", "--no-cache")
+    line, single = capsys.readouterr().out.split("\n", 1)
+    assert json.loads(line) == json.loads(single)
+
+
+def _seen_at_each_design(monkeypatch, run_main, *argv):
+    """stdout flushed when each design's extract starts."""
+    out, seen = _Stdout(), []
+    real = dmw.extract_design
+    def extract(folder, *a, **kw):
+        seen.append(out.flushed)
+        return real(folder, *a, **kw)
+    monkeypatch.setattr(dmw, "extract_design", extract)
+    monkeypatch.setattr(dmw.sys, "stdout", out)
+    run_main(*argv)
+    return seen, out.getvalue()
+
+
+def test_each_line_flushed_before_the_next_design(corpus, monkeypatch, run_main):
+    seen, out = _seen_at_each_design(monkeypatch, run_main, *corpus[1], "--ndjson", "--no-body", "--no-cache")
+    assert [s.count("\n") for s in seen] == [0, 1]
+    assert seen[1] == out.splitlines(True)[0]
+
+
+def test_compact_rows_as_they_come(corpus, monkeypatch, run_main):
+    seen, out = _seen_at_each_design(monkeypatch, run_main, *corpus[1], "--no-body", "--no-cache")
+    first, second = (os.path.basename(f) for f in corpus[1])
+    assert "Found 2 design(s)" in seen[1] and first in seen[1] and second not in seen[1]
+    assert second in out
@@ -0,0 +1,95 @@
+"""--objects: the per-object table from the body pass - exact on a hand-made plate
+(travel split into / within / out of each visit, feed-rate time, layer span), the
+same however the gcode is blocked, in step with the body's totals, and written as
+CSV or NDJSON."""
+import csv
+import io
+import json
+import os
+
+import pytest
+
+import design_metrics_worker as dmw
+from conftest import g3_of
+
+np = pytest.importorskip("numpy")
+
+GCODE = b"""M83
+G1 X0 Y0 F6000
+; CHANGE_LAYER
+; start printing object, unique label id: 7
+G1 X10 Y0 F6000
+G1 X10 Y10 E1 F600
+G1 X13 Y14 F6000
+G1 X13 Y24 E1 F600
+G1 E-.5
+G1 X13 Y27 F6000
+; stop printing object, unique label id: 7
+G1 X20 Y10 F6000
+; start printing object, unique label id: 9
+G1 X20 Y20 E2 F1200
+; stop printing object, unique label id: 9
+; CHANGE_LAYER
+G1 X30 Y20 F6000
+; start printing object, unique label id: 7
+G1 X30 Y30 E1
+; stop printing object, unique label id: 7
+"""
+
+
+def _table(arc_or_bytes):
+    if isinstance(arc_or_bytes, bytes):
+        events = dmw._gcode_stream(io.BytesIO(arc_or_bytes), True, "numpy", False, objects=True)
+    else:
+        events = dmw.gcode_stream(arc_or_bytes, True, "numpy", objects=True)
+    ev = dict(events)
+    return ev["body"], {k: v if k == "object" else v.tolist() for k, v in ev["objects"].items()}
+
+
+def test_hand_made_plate():
+    _, t = _table(GCODE)
+    assert t == {"object": ["7", "9"], "filament_mm": [3.0, 2.0], "extrude_mm": [30.0, 10.0],
+                 "travel_in_mm": [10.0, 0.0], "travel_mm": [5.0, 0.0], "travel_out_mm": [3.0, 0.0],
+                 "retractions": [1, 0], "time_s": pytest.approx([2.33, 0.5]), "first_layer": [1, 1],
+                 "last_layer": [2, 1], "visits": [2, 1]}
+
+
+def test_adds_up_to_the_body(corpus, monkeypatch):
+    with dmw.DesignArchive(g3_of(corpus[1][0])) as arc:
+        body, t = _table(arc)
+        monkeypatch.setattr(dmw, "NUMPY_BLOCK_BYTES", 4096)              # visits cut across blocks
+        body2, t2 = _table(arc)
+    assert body2 == body and t2.keys() == t.keys()
+    for k in t:                                                          # up to float summation order
+        assert t2[k] == (t[k] if k == "object" else pytest.approx(t[k], rel=1e-9)), k
+    assert t["object"] == [str(100 + o) for o in range(6)] == sorted(t["object"])
+    assert len(t["object"]) == body["object_count_gcode"]
+    assert sum(t["filament_mm"]) / 6 == pytest.approx(body["object_filament_mm_mean"], abs=0.05)
+    assert max(t["filament_mm"]) == pytest.approx(body["object_filament_mm_max"], abs=0.05)
+    assert t["visits"] == [30] * 6 and t["first_layer"] == [1] * 6 and t["last_layer"] == [30] * 6
+    assert sum(t["extrude_mm"]) <= body["_extrude_distance_mm"]
+    assert sum(t["travel_in_mm"] + t["travel_mm"] + t["travel_out_mm"]) <= body["travel_distance_mm"]
+    assert all(s > 0 for s in t["time_s"])
+
+
+def test_cli_csv_and_ndjson(corpus, tmp_path, run_main, capsys):
+    folder = corpus[1][0]
+    run_main(folder, "--objects", str(tmp_path / "o.csv"), "--no-cache")
+    run_main(folder, "--objects", str(tmp_path / "o.ndjson"), "--no-cache")
+    capsys.readouterr()
+    with open(str(tmp_path / "o.csv"), newline="", encoding="utf-8") as fh:
+        rows = list(csv.DictReader(fh))
+    with open(str(tmp_path / "o.ndjson"), encoding="utf-8") as fh:
+        lines = [json.loads(ln) for ln in fh]
+    assert len(rows) == len(lines) == 6
+    for row, ln in zip(rows, lines):
+        assert ln["design"] == row["design"] == os.path.basename(folder) and ln["plate"] == 1
+        assert ln["object"] == row["object"] and float(row["filament_mm"]) == ln["filament_mm"]
+        assert set(dmw._NumpyBody.OBJECT_COLUMNS) <= set(ln)
+
+
+def test_cli_per_design(corpus, tmp_path, run_main, capsys):
+    out = str(tmp_path / "objects")
+    run_main(*corpus[1], "--objects", out, "--json", "--no-cache")
+    capsys.readouterr()
+    assert sorted(os.listdir(out)) == sorted(os.path.basename(f) + ".csv" for f in corpus[1])
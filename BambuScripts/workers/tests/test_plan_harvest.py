@@ -0,0 +1,50 @@
+"""Staleness-aware harvest: rows carry their source fingerprint, and a re-run parses only
+the new and changed designs and drops the rows of removed ones."""
+import os
+import shutil
+
+import design_metrics_worker as dmw
+
+
+def test_plan_harvest(corpus, tmp_path):
+    root = shutil.copytree(corpus[0], str(tmp_path / "c"))
+    folders = dmw.find_design_folders([root])
+    rows = []
+    for f in folders:
+        for row in dmw.flatten_rows(dmw.extract_design(f, False)):
+            row.update(dmw.source_fingerprint(f)); rows.append(row)
+    kept, index, todo, stale, dropped = dmw.plan_harvest(rows, folders, folders, [root])
+    assert (len(kept), todo, stale, dropped) == (len(rows), [], 0, 0)
+
+    tsv = dmw.find_design_files(folders[0])[1]
+    with open(tsv, "a", encoding="utf-8") as fh:
+        fh.write("\n")                                    # an edited TSV: stale
+    gone = folders[1]
+    shutil.rmtree(gone)                                   # a removed design: dropped
+    left = [folders[0]]
+    kept, index, todo, stale, dropped = dmw.plan_harvest(rows, left, left, [root])
+    assert todo == left and stale == 1 and dropped == 1
+    assert all(os.path.normpath(r["folder"]) != os.path.normpath(gone) for r in kept)
+
+
+def test_rerun_parses_only_what_changed(corpus, tmp_path, data_dir, run_main, monkeypatch, capsys):
+    root = shutil.copytree(corpus[0], str(tmp_path / "c"))
+    run_main(root, "--csv", "m.csv", "--no-body", "--no-cache")
+    with open(os.path.join(data_dir, "m.csv"), "rb") as fh:
+        first = fh.read()
+    capsys.readouterr()
+    run_main(root, "--csv", "m.csv", "--no-body", "--no-cache")
+    assert "Nothing changed" in capsys.readouterr().err
+
+    folder = sorted(dmw.find_design_folders([root]))[0]
+    g3 = dmw.find_design_files(folder)[2]
+    st = os.stat(g3)
+    os.utime(g3, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))  # touched: a re-slice
+    parsed = []
+    real = dmw.harvest
+    monkeypatch.setattr(dmw, "harvest", lambda todo, *a: parsed.extend(todo) or real(todo, *a))
+    run_main(root, "--csv", "m.csv", "--no-body", "--no-cache")
+    assert parsed == [folder] and "1 changed" in capsys.readouterr().err
+    with open(os.path.join(data_dir, "m.csv"), "rb") as fh:
+        again = fh.read()
+    assert again.count(b"\n") == first.count(b"\n") and again != first    # same rows, new stamp
@@ -0,0 +1,72 @@
+"""Multi-plate projects: every Metadata/plate_N.gcode is measured, the plates come back
+under "plates" and PART B is their aggregate - the same on one thread or several."""
+import zipfile
+
+import pytest
+
+import design_metrics_bench as bench
+import design_metrics_worker as dmw
+from conftest import g3_of
+
+COUNTS = ("travel_moves", "retractions", "z_hops", "layers_gcode")
+
+
+@pytest.fixture(scope="module")
+def two_plates(tmp_path_factory):
+    """(project folder, plate-1 twin, plate-2 twin): plate 2 is another design's plate 1."""
+    root = str(tmp_path_factory.mktemp("plates"))
+    a = bench.make_design(root, "X1C_Multi_Theme", layers=20, objects=4, colors=2, pick_px=64)
+    b = bench.make_design(root, "X1C_Second_Theme", layers=30, objects=6, colors=3, pick_px=64, seed=2)
+    one = bench.make_design(root, "X1C_One_Theme", layers=20, objects=4, colors=2, pick_px=64)
+    with zipfile.ZipFile(g3_of(b)) as src, zipfile.ZipFile(g3_of(a), "a", zipfile.ZIP_DEFLATED) as dst:
+        for zi in src.infolist():
+            if "_1." in zi.filename:
+                dst.writestr(zi.filename.replace("_1.", "_2."), src.read(zi))
+    return a, one, b
+
+
+def test_body_keys_unchanged(corpus):
+    r = dmw.extract_design(corpus[1][0], True, "bytes")["part_b"]
+    assert "travel_ratio_pct" in r and not any(k.startswith("_") for k in r)
+
+
+def test_every_plate_is_measured(two_plates):
+    project, one, two = two_plates
+    r = dmw.extract_design(project, True, "bytes")
+    p1, p2 = (dmw.extract_design(f, True, "bytes")["part_b"] for f in (one, two))
+    assert [p["plate"] for p in r["plates"]] == [1, 2] and r["part_b"]["plate_count"] == 2
+    for k in COUNTS:
+        assert r["plates"][0][k] == p1[k] and r["plates"][1][k] == p2[k], k
+        assert r["part_b"][k] == p1[k] + p2[k], k
+    assert not any(k.startswith("_") for p in r["plates"] for k in p)
+
+
+def test_plate_threads_change_nothing(two_plates, monkeypatch):
+    monkeypatch.setattr(dmw, "PLATE_THREADS", 1)
+    serial = dmw.extract_design(two_plates[0], True, "bytes")
+    monkeypatch.setattr(dmw, "PLATE_THREADS", 4)
+    assert dmw.extract_design(two_plates[0], True, "bytes") == serial
+
+
+def test_flattened_rows_per_plate(two_plates):
+    rows = dmw.flatten_rows(dmw.extract_design(two_plates[0], False))
+    assert [r.get("plate") for r in rows][1:] == [1, 2]
+
+
+def test_aggregate_plates():
+    p1 = {"plate": 1, "travel_distance_mm": 10.0, "_extrude_distance_mm": 90.0, "travel_moves": 3,
+          "retractions": 2, "layers_gcode": 10, "feature_filament_mm": {"infill": 6.0, "outer_wall": 2.0},
+          "total_extruded_filament_mm": 8.0, "print_height_mm": 2.0, "total_layers": 10,
+          "outer_wall_loops": 20, "plate_error": "x"}
+    p2 = {"plate": 2, "travel_distance_mm": 30.0, "_extrude_distance_mm": 70.0, "travel_moves": 5,
+          "retractions": 1, "layers_gcode": 30, "feature_filament_mm": {"infill": 2.0, "outer_wall": 6.0},
+          "total_extruded_filament_mm": 8.0, "print_height_mm": 6.0, "total_layers": 30, "outer_wall_loops": 60}
+    out = dmw.aggregate_plates([p1, p2])
+    assert (out["travel_moves"], out["retractions"], out["layers_gcode"]) == (8, 3, 40)
+    assert out["travel_distance_mm"] == 40.0 and out["total_extruded_filament_mm"] == 16.0
+    assert out["travel_ratio_pct"] == 20.0                # from the summed distances, not the plates' ratios
+    assert out["feature_filament_mm"] == {"infill": 8.0, "outer_wall": 8.0}
+    assert out["feature_mix_pct"] == {"infill": 50.0, "outer_wall": 50.0}
+    assert out["print_height_mm"] == 6.0 and out["effective_layer_height_mm"] == 0.2
+    assert out["outer_loops_per_layer"] == 2.0
+    assert out["plate_error"] == "plate 1: x"
@@ -0,0 +1,82 @@
+"""_Prefetch, the body pass's reader thread: the same bytes as reading the stream
+directly, the reader's errors raised in the parser, a clean stop mid-stream, and the
+same body metrics with the thread off."""
+import io
+import random
+import time
+
+import pytest
+
+import design_metrics_worker as dmw
+from conftest import body_of, engines, g3_of
+
+DATA = bytes(random.Random(1).randrange(256) for _ in range(50000))
+
+
+class _Source(io.BytesIO):
+    """DATA, with the reads made counted and (fail_at) an OSError once that far in."""
+
+    def __init__(self, fail_at=None):
+        super().__init__(DATA)
+        self.fail_at = fail_at; self.reads = 0
+
+    def read(self, n=-1):
+        self.reads += 1
+        if self.fail_at is not None and self.tell() >= self.fail_at:
+            raise OSError("NAS went away")
+        return super().read(n)
+
+
+@pytest.mark.parametrize("block,depth", [(7, 1), (997, 2), (4096, 8), (1 << 20, 8)])
+@pytest.mark.parametrize("n", [1, 100, 5000, -1])
+def test_same_bytes(block, depth, n):
+    p = dmw._Prefetch(_Source(), block, depth)
+    got = []
+    while True:
+        b = p.read(n)
+        if not b: break
+        assert n < 0 or len(b) == n or len(b) == len(DATA) - sum(map(len, got))   # short only at the end
+        got.append(b)
+    p.close()
+    assert b"".join(got) == DATA
+
+
+def test_readinto():
+    p = dmw._Prefetch(_Source(), 1000, 2)
+    buf = bytearray(1500)
+    assert p.readinto(buf) == 1500 and bytes(buf) == DATA[:1500]
+    p.close()
+
+
+def test_reader_error_raised_in_the_parser():
+    p = dmw._Prefetch(_Source(fail_at=3000), 1000, 2)
+    with pytest.raises(OSError, match="NAS went away"):
+        while p.read(500): pass
+    p.close()
+
+
+def test_holds_after_the_first_block():
+    src = _Source()
+    p = dmw._Prefetch(src, 1000, 8)
+    assert p.read(10) == DATA[:10]
+    time.sleep(0.05)
+    assert src.reads == 1                        # the header block only, until the parser wants more
+    assert p.read(1500) == DATA[10:1510]
+    p.close()
+
+
+def test_close_mid_stream():
+    src = _Source()
+    p = dmw._Prefetch(src, 100, 2)
+    p.read(150)                                  # past the first block - the thread fills the queue
+    time.sleep(0.05)
+    p.close()
+    assert not p._t.is_alive() and src.closed and p.closed
+
+
+@pytest.mark.parametrize("engine", engines())
+def test_inline_inflate_same_body(corpus, monkeypatch, engine):
+    g3 = g3_of(corpus[1][0])
+    threaded = body_of(g3, engine)
+    monkeypatch.setattr(dmw, "PREFETCH_DEPTH", 0)
+    assert body_of(g3, engine) == threaded
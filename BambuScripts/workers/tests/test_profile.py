@@ -0,0 +1,60 @@
+"""--profile: extract_design's result unchanged, plus the wall time and bytes of each
+stage in "_timings"; the aggregate table on stderr; a cProfile dump per design."""
+import csv
+import json
+import os
+import pstats
+
+import design_metrics_worker as dmw
+from conftest import g3_of
+
+STAGES = ("data_tsv", "open", "metadata", "plate_utilization", "gcode_header", "gcode_body", "layer_profile")
+
+
+def test_stage_timings(corpus):
+    folder = corpus[1][0]
+    r = dmw.extract_profiled(folder)
+    t = r.pop("_timings")
+    assert r == dmw.extract_design(folder)
+    assert set(STAGES) <= set(t["stages"])
+    assert sum(st["ms"] for st in t["stages"].values()) <= t["total_ms"]
+    with dmw.DesignArchive(g3_of(folder)) as arc:
+        gi = arc.info("Metadata/plate_1.gcode")
+    body = t["stages"]["gcode_body"]
+    assert body["bytes"] == gi.file_size and "inflate_ms" in body and "wait_ms" in body
+    gcode_read = t["stages"]["gcode_header"]["read_bytes"] + body["read_bytes"]   # the reader thread reads ahead
+    assert gi.compress_size <= gcode_read <= sum(st["read_bytes"] for st in t["stages"].values())
+    assert t["stages"]["data_tsv"]["bytes"] == os.path.getsize(dmw.find_design_files(folder)[1])
+
+
+def test_profile_dump(corpus, tmp_path):
+    dump = str(tmp_path / "prof")
+    dmw.extract_profiled(corpus[1][0], dump_dir=dump)
+    prof = os.path.join(dump, os.path.basename(corpus[1][0]) + ".prof")
+    assert any(fn[2] == "extract_design" for fn in pstats.Stats(prof).stats)
+
+
+def test_cli_json(corpus, run_main, capsys):
+    run_main(*corpus[1], "--json", "--profile", "--no-cache")
+    out, err = capsys.readouterr()
+    assert all(set(STAGES) <= set(r["_timings"]["stages"]) for r in json.loads(out))
+    assert "Profile: 2 design(s)" in err and "slowest:" in err
+    assert all(os.path.basename(f) in err.split("slowest:")[1] for f in corpus[1])
+
+
+def test_cli_harvest_keeps_timings_out_of_the_csv(corpus, data_dir, run_main, capsys):
+    run_main(corpus[0], "--csv", "m.csv", "--profile", "--no-cache")
+    assert "Profile: 2 design(s)" in capsys.readouterr().err
+    with open(os.path.join(data_dir, "m.csv"), newline="", encoding="utf-8") as fh:
+        rows = list(csv.DictReader(fh))
+    assert len(rows) == 2 and not any("timings" in k for k in rows[0])
+
+
+def test_print_profile_percentiles(capsys):
+    items = [("d%d" % i, {"total_ms": 10.0 * i, "stages": {"gcode_body": {"ms": 10.0 * i, "bytes": 1 << 20}}})
+             for i in range(1, 21)]
+    dmw.print_profile(items, top=2)
+    err = capsys.readouterr().err
+    row = next(ln for ln in err.splitlines() if ln.strip().startswith("gcode_body")).split()
+    assert row[1:5] == ["2.10", "100%", "100.0", "190.0"]             # total s, share, p50, p95
+    assert err.split("slowest:")[1].split()[1:3] == ["ms", "d20"]
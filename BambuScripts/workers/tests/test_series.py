@@ -0,0 +1,51 @@
+"""--series: the per-layer .npz sidecar written from the body pass - one row per layer
+(plus the start gcode), adding up to the body's own totals."""
+import json
+import os
+
+import pytest
+
+import design_metrics_worker as dmw
+from conftest import body_of, g3_of
+
+np = pytest.importorskip("numpy")
+
+ARRAYS = ("layer", "z_mm", "m73_remaining_min", "time_min", "feature_buckets", "extrude_path_mm",
+          "travel_mm", "travel_moves", "retractions", "z_hops", "tool_changes", "extrude_mm")
+
+
+def test_series_adds_up_to_the_body(corpus, tmp_path, run_main, capsys):
+    folder = corpus[1][0]
+    out = str(tmp_path / "layers.npz")
+    run_main(folder, "--series", out, "--json", "--no-cache")
+    body = json.loads(capsys.readouterr().out)["part_b"]
+    assert all(body[k] == v for k, v in body_of(g3_of(folder), "python").items() if not k.startswith("_"))
+    with np.load(out) as S:
+        assert set(ARRAYS) <= set(S.files) and str(S["design"]) == os.path.basename(folder)
+        assert len(S["layer"]) == body["layers_gcode"] + 1 == 31
+        assert S["extrude_mm"].shape == (31, len(S["feature_buckets"]))
+        for k, total in (("travel_moves", "travel_moves"), ("retractions", "retractions"),
+                         ("z_hops", "z_hops"), ("tool_changes", "tool_changes_gcode")):
+            assert S[k].sum() == body[total], k
+        assert S["travel_mm"].sum() == pytest.approx(body["travel_distance_mm"], abs=0.1)
+        assert S["extrude_mm"].sum() == pytest.approx(body["total_extruded_filament_mm"], abs=0.1)
+        assert np.all(np.diff(S["z_mm"][1:]) > 0)                    # one row per layer, bottom up
+
+
+def test_series_per_design(corpus, tmp_path, run_main, capsys):
+    out = str(tmp_path / "series")
+    run_main(*corpus[1], "--series", out, "--json", "--no-cache")
+    assert len(json.loads(capsys.readouterr().out)) == 2
+    assert sorted(os.listdir(out)) == sorted(os.path.basename(f) + ".npz" for f in corpus[1])
+
+
+def test_series_needs_the_numpy_engine(corpus):
+    with dmw.DesignArchive(g3_of(corpus[1][0])) as arc:
+        with pytest.raises(ValueError):
+            list(dmw.gcode_stream(arc, True, "python", series=True))
+
+
+def test_series_refused_without_the_body(corpus, tmp_path, run_main):
+    with pytest.raises(SystemExit) as e:
+        run_main(corpus[1][0], "--series", str(tmp_path / "x.npz"), "--no-body")
+    assert e.value.code == 2
@@ -0,0 +1,61 @@
+"""--serve: JSON-lines requests in, one reply per request (matched on id), a bad line
+answered rather than fatal, and {"op": "shutdown"} ending the session."""
+import io
+import json
+import os
+
+import pytest
+
+import design_metrics_worker as dmw
+
+
+def _session(monkeypatch, capsys, *requests):
+    """Run serve() over stdin lines -> {id: reply}."""
+    lines = [r if isinstance(r, str) else json.dumps(r) for r in requests]
+    monkeypatch.setattr(dmw.sys, "stdin", io.StringIO("\n".join(lines) + "\n"))
+    dmw.serve(jobs=2, engine="bytes", use_cache=False)
+    replies = [json.loads(ln) for ln in capsys.readouterr().out.splitlines()]
+    assert len({r["id"] for r in replies}) == len(replies)
+    return {r["id"]: r for r in replies}
+
+
+def test_requests_and_errors(corpus, monkeypatch, capsys):
+    folder = corpus[1][0]
+    out = _session(monkeypatch, capsys,
+                   {"id": 1, "op": "extract", "path": folder},
+                   {"id": 2, "op": "no-body", "path": folder},
+                   {"id": 3, "op": "layers", "path": folder, "layers": "2:4"},
+                   {"id": 4, "op": "ping"},
+                   {"id": 5, "op": "bogus", "path": folder},
+                   {"id": 6, "op": "extract"},
+                   "{not json",
+                   {"op": "shutdown"},
+                   {"id": 7, "op": "ping"})
+    assert out[1]["ok"] and out[1]["result"]["part_b"] == dmw.extract_design(folder, True, "bytes")["part_b"]
+    assert out[2]["ok"] and "travel_moves" not in out[2]["result"]["part_b"]
+    assert out[3]["result"]["layer_range"]["first"] == 2 and out[3]["result"]["layer_range"]["last"] == 4
+    assert out[4]["result"]["pong"] and out[4]["result"]["pid"] == os.getpid()
+    assert not out[5]["ok"] and "unknown op" in out[5]["error"]
+    assert not out[6]["ok"] and "no 'path'" in out[6]["error"]
+    assert not out[None]["ok"] and out[None]["error"].startswith("bad request")
+    assert 7 not in out                                   # after shutdown
+
+
+def test_util_image(corpus, tmp_path, monkeypatch, capsys):
+    pytest.importorskip("PIL")
+    png = str(tmp_path / "u.png")
+    out = _session(monkeypatch, capsys, {"id": 1, "op": "util-image", "path": corpus[1][0], "out": png})
+    with open(png, "rb") as fh:
+        assert out[1]["ok"] and fh.read(8) == b"\x89PNG\r\n\x1a\n"
+
+
+def test_archives_stay_warm(corpus, monkeypatch, capsys):
+    monkeypatch.setattr(dmw, "_warm", {})
+    monkeypatch.setattr(dmw, "_warm_users", {})
+    opened = []
+    real = dmw.DesignArchive
+    monkeypatch.setattr(dmw, "DesignArchive", lambda *a: opened.append(a) or real(*a))
+    folder = corpus[1][0]
+    for i in range(3):
+        assert dmw.serve_request({"op": "no-body", "path": folder}, "bytes", use_cache=False)
+    assert len(opened) == 1
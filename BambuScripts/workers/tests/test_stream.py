@@ -0,0 +1,44 @@
+"""--stream / --paths-from: one compact JSON line per path as it completes, tagged with
+the path as given; a path that fails gets an error line and the exit status 1."""
+import io
+import json
+import sys
+
+import pytest
+
+import design_metrics_worker as dmw
+from conftest import g3_of
+
+
+def _stream(run_main, capsys, *argv):
+    with pytest.raises(SystemExit) as e:
+        run_main("--stream", *argv)
+    out = capsys.readouterr().out
+    assert all(len(ln.splitlines()) == 1 for ln in out.splitlines(True))
+    return e.value.code, {r["path"]: r for r in map(json.loads, out.splitlines())}
+
+
+def test_paths_from_file(corpus, tmp_path, run_main, capsys):
+    a, b = corpus[1]
+    lst = tmp_path / "paths.txt"
+    lst.write_text('\ufeff%s\n\n"%s"\n%s\n' % (a, g3_of(b), tmp_path / "nope"), encoding="utf-8")
+    code, lines = _stream(run_main, capsys, "--paths-from", str(lst), "--no-body", "--jobs", "2")
+    assert code == 1 and set(lines) == {a, g3_of(b), str(tmp_path / "nope")}
+    assert "no design folder" in lines[str(tmp_path / "nope")]["error"]
+    assert lines[a] == json.loads(json.dumps(dict(dmw.extract_design(a, False), path=a)))
+    assert lines[g3_of(b)]["design"] == dmw.extract_design(b, False)["design"]
+    assert "travel_moves" not in lines[a]["part_b"]
+
+
+def test_paths_from_stdin_with_body(corpus, run_main, capsys, monkeypatch):
+    monkeypatch.setattr(sys, "stdin", io.StringIO("\n".join(corpus[1]) + "\n"))
+    code, lines = _stream(run_main, capsys, "--paths-from", "-", "--engine", "bytes")
+    assert code == 0 and set(lines) == set(corpus[1])
+    for f in corpus[1]:
+        assert lines[f]["part_b"] == dmw.extract_design(f, True, "bytes")["part_b"]
+
+
+def test_stream_refuses_file_outputs(corpus, run_main):
+    with pytest.raises(SystemExit) as e:
+        run_main("--stream", corpus[1][0], "--csv", "m.csv")
+    assert e.value.code == 2
@@ -0,0 +1,77 @@
+"""--util-images and the overlay cache: one image per design, PNG or lossless WebP with
+the same pixels, and cache hits keyed on content - a copied 3mf or a pick base saved
+under a new name still hits."""
+import io
+import json
+import os
+import shutil
+
+import pytest
+
+import design_metrics_worker as dmw
+from conftest import g3_of
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def _batch(run_main, capsys, *argv):
+    with pytest.raises(SystemExit) as e:
+        run_main(*argv)
+    return e.value.code, {os.path.basename(r["path"]): r for r in map(json.loads, capsys.readouterr().out.splitlines())}
+
+
+def _pixels(path):
+    with Image.open(path) as im:
+        return im.format, im.size, im.convert("RGB").tobytes()
+
+
+def test_batch_then_cached(corpus, tmp_path, run_main, capsys):
+    out = str(tmp_path / "overlays")
+    code, lines = _batch(run_main, capsys, corpus[0], "--util-images", out, "--image-format", "webp")
+    names = sorted(os.path.basename(f) for f in corpus[1])
+    assert code == 0 and sorted(lines) == names and not any(r["cached"] for r in lines.values())
+    assert sorted(os.listdir(out)) == [n + ".webp" for n in names]
+    first = {n: _pixels(os.path.join(out, n + ".webp")) for n in names}
+    assert all(f[:2] == ("WEBP", (256, 256)) for f in first.values())     # 128 px pick, scale 2
+    code, lines = _batch(run_main, capsys, corpus[0], "--util-images", out, "--image-format", "webp")
+    assert code == 0 and all(r["cached"] for r in lines.values())
+    assert {n: _pixels(os.path.join(out, n + ".webp")) for n in names} == first
+
+
+def test_webp_is_lossless(corpus, tmp_path):
+    g3 = g3_of(corpus[1][0])
+    paths = [str(tmp_path / "o.png"), str(tmp_path / "o.webp"), str(tmp_path / "o0.png")]
+    with dmw.DesignArchive(g3) as arc:
+        for p, level in zip(paths, (None, None, 0)):
+            assert dmw.render_util_image(arc, "X1C", p, level=level)
+    png, webp, png0 = map(_pixels, paths)
+    assert webp[0] == "WEBP" and webp[1:] == png[1:] == png0[1:]
+    assert os.path.getsize(paths[2]) > os.path.getsize(paths[0])     # level 0: stored, not deflated
+
+
+def test_cache_is_content_addressed(corpus, tmp_path):
+    folder = shutil.copytree(corpus[1][0], str(tmp_path / "copy"))
+    g3, out = g3_of(folder), str(tmp_path / "o.png")
+    assert dmw.render_util_image_cached(g3_of(corpus[1][0]), "X1C", out) == (True, False)
+    os.utime(g3, (1, 1))
+    assert dmw.render_util_image_cached(g3, "X1C", out) == (True, True)
+    base = str(tmp_path / "pick_a.png")
+    with dmw.DesignArchive(g3) as arc:
+        arc.pick(1).save(base)
+    assert dmw.render_util_image_cached(g3, "X1C", out, pick_base=base) == (True, False)
+    shutil.copy(base, str(tmp_path / "pick_b.png"))
+    assert dmw.render_util_image_cached(g3, "X1C", out, pick_base=str(tmp_path / "pick_b.png")) == (True, True)
+    assert dmw.render_util_image_cached(g3, "X1C", out, scale=3) == (True, False)
+    assert dmw.render_util_image_cached(g3, "X1C", str(tmp_path / "o.webp")) == (True, False)
+
+
+def test_cached_matches_uncached(corpus, tmp_path):
+    g3 = g3_of(corpus[1][1])
+    buf = io.BytesIO()
+    with dmw.DesignArchive(g3) as arc:
+        dmw.render_util_image(arc, "X1C", buf, fmt="png")
+    out = str(tmp_path / "o.png")
+    for hit in (False, True):
+        assert dmw.render_util_image_cached(g3, "X1C", out) == (True, hit)
+        with open(out, "rb") as fh:
+            assert fh.read() == buf.getvalue()
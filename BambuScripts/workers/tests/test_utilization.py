@@ -0,0 +1,38 @@
+"""plate_utilization's pick coverage: the NumPy masks count the same pixels and colours
+as the per-pixel loop they replaced, which still runs without NumPy."""
+import sys
+
+import pytest
+
+import design_metrics_bench as bench
+import design_metrics_worker as dmw
+from conftest import g3_of
+
+pytest.importorskip("PIL")
+pytest.importorskip("numpy")
+
+
+@pytest.mark.parametrize("px", [64, 97, 256])
+@pytest.mark.parametrize("tower", [None, bench.TOWER, (0.0, 0.0, 256.0, 256.0)])
+def test_numpy_matches_the_pixel_loop(px, tower):
+    pick = bench.synthetic_pick(px, seed=px)
+    geo = (bench.BED[0], bench.BED[3], (bench.BED[2] - bench.BED[0]) / px, (bench.BED[3] - bench.BED[1]) / px, tower)
+    got, ref = dmw.pick_coverage(pick, *geo), dmw._pick_coverage_py(pick, *geo)
+    assert got == ref and list(got[1]) == list(ref[1])    # same counts, same largest-first order
+
+
+def test_alpha_threshold_edge():
+    from PIL import Image
+    im = Image.new("RGBA", (4, 1))
+    im.putdata([(1, 2, 3, dmw.ALPHA_THRESHOLD), (1, 2, 3, dmw.ALPHA_THRESHOLD + 1), (9, 9, 9, 255), (9, 9, 9, 0)])
+    assert dmw.pick_coverage(im, 0, 1, 1, 1) == dmw._pick_coverage_py(im, 0, 1, 1, 1) == (2, {0x090909: 1, 0x010203: 1})
+
+
+def test_plate_utilization_without_numpy(corpus, monkeypatch):
+    g3 = g3_of(corpus[1][0])
+    with dmw.DesignArchive(g3) as arc:
+        fast = dmw.plate_utilization(arc, "X1C", source="pick")
+    monkeypatch.setitem(sys.modules, "numpy", None)       # import numpy -> ImportError
+    with dmw.DesignArchive(g3) as arc:
+        slow = dmw.plate_utilization(arc, "X1C", source="pick")
+    assert fast == slow and 0 < fast["plate_utilization_pct"] < 100